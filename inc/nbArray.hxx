@@ -0,0 +1,266 @@
+/*
+This file is part of pyOCCT which provides Python bindings to the OpenCASCADE
+geometry kernel.
+
+Copyright (C) 2016-2018  Laughlin Research, LLC
+Copyright (C) 2019-2022  Trevor Laughlin and the pyOCCT contributors
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+*/
+#pragma once
+
+// NumPy views and bulk constructors of the NCollection arrays (see array_templates in the
+// configuration)
+
+#include <nbOCCT.hxx>
+#include <nanobind/ndarray.h>
+
+#include <cstring>
+#include <string>
+#include <type_traits>
+#include <vector>
+
+template <class TheItemType> class NCollection_Array1;
+template <class TheItemType> class NCollection_Array2;
+
+class gp_XYZ;
+class gp_Pnt;
+class gp_Vec;
+class gp_Dir;
+class gp_XY;
+class gp_Pnt2d;
+class gp_Vec2d;
+class gp_Dir2d;
+
+// Scalar type of an array item, its number of scalars (0 for a scalar item), and if it can be
+// written through a view
+template <typename T, typename = void>
+struct ArrayItem {
+	static constexpr bool is_supported = false;
+	typedef double scalar;
+	static constexpr size_t size = 0;
+	static constexpr bool is_writable = false;
+};
+
+template <typename T>
+struct ArrayItem<T, std::enable_if_t<std::is_arithmetic<T>::value>> {
+	static constexpr bool is_supported = true;
+	typedef T scalar;
+	static constexpr size_t size = 0;
+	static constexpr bool is_writable = true;
+};
+
+template <size_t Size, bool IsWritable>
+struct ArrayCoordinates {
+	static constexpr bool is_supported = true;
+	typedef double scalar;
+	static constexpr size_t size = Size;
+	static constexpr bool is_writable = IsWritable;
+};
+
+// Points and vectors are viewed as their coordinates (directions are read-only so they stay
+// normalized)
+template <> struct ArrayItem<gp_XYZ> : ArrayCoordinates<3, true> {};
+template <> struct ArrayItem<gp_Pnt> : ArrayCoordinates<3, true> {};
+template <> struct ArrayItem<gp_Vec> : ArrayCoordinates<3, true> {};
+template <> struct ArrayItem<gp_Dir> : ArrayCoordinates<3, false> {};
+template <> struct ArrayItem<gp_XY> : ArrayCoordinates<2, true> {};
+template <> struct ArrayItem<gp_Pnt2d> : ArrayCoordinates<2, true> {};
+template <> struct ArrayItem<gp_Vec2d> : ArrayCoordinates<2, true> {};
+template <> struct ArrayItem<gp_Dir2d> : ArrayCoordinates<2, false> {};
+
+// Shape and contiguous storage of an array
+template <typename Array>
+struct ArrayLayout;
+
+template <typename T>
+struct ArrayLayout<NCollection_Array1<T>> {
+	typedef T item;
+	static constexpr size_t ndim = 1;
+
+	static std::vector<size_t> shape(const NCollection_Array1<T> &array) {
+		return {static_cast<size_t>(array.Length())};
+	}
+
+	static T *data(NCollection_Array1<T> &array) {
+		return &array.ChangeValue(array.Lower());
+	}
+
+	static void construct(NCollection_Array1<T> *self, const std::vector<size_t> &shape,
+	                      int lower) {
+		if (shape[0] == 0)
+			new (self) NCollection_Array1<T>();
+		else
+			new (self) NCollection_Array1<T>(lower, lower + static_cast<int>(shape[0]) - 1);
+	}
+};
+
+template <typename T>
+struct ArrayLayout<NCollection_Array2<T>> {
+	typedef T item;
+	static constexpr size_t ndim = 2;
+
+	static std::vector<size_t> shape(const NCollection_Array2<T> &array) {
+		return {static_cast<size_t>(array.ColLength()), static_cast<size_t>(array.RowLength())};
+	}
+
+	static T *data(NCollection_Array2<T> &array) {
+		return &array.ChangeValue(array.LowerRow(), array.LowerCol());
+	}
+
+	static void construct(NCollection_Array2<T> *self, const std::vector<size_t> &shape,
+	                      int row_lower, int col_lower) {
+		if (shape[0] == 0 || shape[1] == 0)
+			new (self) NCollection_Array2<T>();
+		else
+			new (self) NCollection_Array2<T>(row_lower, row_lower + static_cast<int>(shape[0]) - 1,
+			                                 col_lower, col_lower + static_cast<int>(shape[1]) - 1);
+	}
+};
+
+inline size_t array_size(const std::vector<size_t> &shape) {
+	size_t size = 1;
+	for (size_t n : shape)
+		size *= n;
+	return size;
+}
+
+// View the items of an array as a NumPy array of scalars without copying them (the "dtype" and
+// "copy" arguments of "__array__" copy the view)
+template <typename Array>
+nb::object array_view(nb::pointer_and_handle<Array> self, nb::handle dtype, nb::handle copy) {
+	typedef typename ArrayLayout<Array>::item Item;
+	typedef typename ArrayItem<Item>::scalar Scalar;
+	typedef std::conditional_t<ArrayItem<Item>::is_writable, Scalar, const Scalar> Value;
+	const size_t size = ArrayItem<Item>::size;
+	static_assert(sizeof(Item) == sizeof(Scalar) * (size ? size : 1),
+	              "Array items are not laid out as their scalars");
+
+	std::vector<size_t> shape = ArrayLayout<Array>::shape(*self.p);
+	std::vector<int64_t> strides(shape.size());
+	int64_t stride = size ? size : 1;
+	for (size_t i = shape.size(); i-- > 0;) {
+		strides[i] = stride;
+		stride *= static_cast<int64_t>(shape[i]);
+	}
+	void *ptr = self.p;
+	if (array_size(shape))
+		ptr = ArrayLayout<Array>::data(*self.p);
+	if (size) {
+		shape.push_back(size);
+		strides.push_back(1);
+	}
+
+	nb::ndarray<nb::numpy, Value, nb::device::cpu> view(ptr, shape.size(), shape.data(), self.h,
+	                                                    strides.data());
+	nb::object result = nb::cast(view, nb::rv_policy::reference);
+	if (!dtype.is_none())
+		return result.attr("astype")(dtype);
+	if (!copy.is_none() && nb::cast<bool>(copy))
+		return result.attr("copy")();
+	return result;
+}
+
+// Copy the scalars of a strided array in C order
+template <typename Scalar>
+Scalar *copy_strided(const Scalar *src, const std::vector<size_t> &shape,
+                     const std::vector<int64_t> &strides, size_t dim, Scalar *dst) {
+	for (size_t i = 0; i < shape[dim]; ++i) {
+		if (dim + 1 == shape.size()) {
+			*dst++ = src[i * strides[dim]];
+		} else {
+			dst = copy_strided(src + i * strides[dim], shape, strides, dim + 1, dst);
+		}
+	}
+	return dst;
+}
+
+// Construct an array from the scalars of an array of shape (rows[, columns][, coordinates])
+// with one copy
+template <typename Array, typename... Lower>
+void array_from_ndarray(Array *self, nb::ndarray<nb::ro, nb::device::cpu> values,
+                        Lower... lower) {
+	typedef typename ArrayLayout<Array>::item Item;
+	typedef typename ArrayItem<Item>::scalar Scalar;
+	const size_t size = ArrayItem<Item>::size;
+	const size_t ndim = ArrayLayout<Array>::ndim + (size ? 1 : 0);
+
+	if (values.ndim() != ndim || (size && values.shape(ndim - 1) != size)) {
+		std::string expected = ArrayLayout<Array>::ndim == 1 ? "(n" : "(rows, columns";
+		if (size)
+			expected += ", " + std::to_string(size);
+		throw nb::value_error(("Expected an array of shape " + expected + ")").c_str());
+	}
+	if (values.dtype() != nb::dtype<Scalar>())
+		throw nb::type_error("Expected an array with the scalar type of the items");
+
+	std::vector<size_t> shape(ndim);
+	std::vector<int64_t> strides(ndim);
+	bool is_contiguous = true;
+	int64_t stride = 1;
+	for (size_t i = ndim; i-- > 0;) {
+		shape[i] = values.shape(i);
+		strides[i] = values.stride(i);
+		is_contiguous = is_contiguous && (shape[i] == 1 || strides[i] == stride);
+		stride *= static_cast<int64_t>(shape[i]);
+	}
+	std::vector<size_t> items(shape.begin(), shape.begin() + ArrayLayout<Array>::ndim);
+	ArrayLayout<Array>::construct(self, items, lower...);
+	if (!array_size(items))
+		return;
+
+	Scalar *dst = reinterpret_cast<Scalar *>(ArrayLayout<Array>::data(*self));
+	const Scalar *src = static_cast<const Scalar *>(values.data());
+	if (is_contiguous) {
+		std::memcpy(dst, src, sizeof(Scalar) * array_size(shape));
+	} else {
+		copy_strided(src, shape, strides, 0, dst);
+	}
+}
+
+template <typename T, typename... Extra>
+void bind_array_constructor(nb::class_<NCollection_Array1<T>, Extra...> &cls) {
+	typedef NCollection_Array1<T> Array;
+	cls.def("__init__", [](Array *self, nb::ndarray<nb::ro, nb::device::cpu> values, int lower) {
+		array_from_ndarray(self, values, lower);
+	}, nb::arg("values"), nb::arg("lower") = 1,
+	    "Copy the items of an array (e.g., a NumPy array).");
+}
+
+template <typename T, typename... Extra>
+void bind_array_constructor(nb::class_<NCollection_Array2<T>, Extra...> &cls) {
+	typedef NCollection_Array2<T> Array;
+	cls.def("__init__", [](Array *self, nb::ndarray<nb::ro, nb::device::cpu> values,
+	                       int row_lower, int col_lower) {
+		array_from_ndarray(self, values, row_lower, col_lower);
+	}, nb::arg("values"), nb::arg("row_lower") = 1, nb::arg("col_lower") = 1,
+	    "Copy the items of an array (e.g., a NumPy array).");
+}
+
+// View the items of an array class through "__array__" (e.g., numpy.asarray) and bind a
+// constructor from an array. The view keeps the array object alive but is invalidated by Resize,
+// Assign or Move of another size, and anything else reallocating the items.
+template <typename Class>
+void bind_array(Class &cls) {
+	typedef typename Class::Type Array;
+	typedef ArrayItem<typename ArrayLayout<Array>::item> Item;
+	if constexpr (Item::is_supported) {
+		cls.def("__array__", &array_view<Array>, nb::arg("dtype") = nb::none(),
+		        nb::arg("copy") = nb::none());
+	}
+	if constexpr (Item::is_supported && Item::is_writable) {
+		bind_array_constructor(cls);
+	}
+}
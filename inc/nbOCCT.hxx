@@ -0,0 +1,243 @@
+/*
+This file is part of pyOCCT which provides Python bindings to the OpenCASCADE
+geometry kernel.
+
+Copyright (C) 2016-2018  Laughlin Research, LLC
+Copyright (C) 2019-2022  Trevor Laughlin and the pyOCCT contributors
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+*/
+#pragma once
+
+#ifdef _WIN32
+#define WIN32_LEAN_AND_MEAN
+	#include<Windows.h>
+#endif
+
+#include <nanobind/nanobind.h>
+#include <nanobind/stl/shared_ptr.h>
+#include <nanobind/stl/string.h>
+
+#include <chrono>
+#include <string>
+#include <vector>
+
+#include <Standard_Handle.hxx>
+
+namespace nb = nanobind;
+
+NAMESPACE_BEGIN(NB_NAMESPACE)
+NAMESPACE_BEGIN(detail)
+
+// Pass Standard_Transient types through opencascade::handle. Every Python reference to a returned
+// object keeps its own handle so the OCCT reference count owns the object.
+template <typename T> struct type_caster<opencascade::handle<T>> {
+	using Caster = make_caster<T>;
+	static constexpr bool IsClass = true;
+	NB_TYPE_CASTER(opencascade::handle<T>, Caster::Name)
+
+	bool from_python(handle src, uint32_t flags, cleanup_list *cleanup) noexcept {
+		if (src.is_none()) {
+			value = Value();
+			return true;
+		}
+		Caster caster;
+		if (!caster.from_python(src, flags, cleanup))
+			return false;
+		value = Value(caster.operator T *());
+		return true;
+	}
+
+	static handle from_cpp(const Value &src, rv_policy, cleanup_list *cleanup) noexcept {
+		T *ptr = src.get();
+		if (!ptr)
+			return none().release();
+		handle result = Caster::from_cpp(ptr, rv_policy::reference, cleanup);
+		if (result.is_valid()) {
+#if NB_VERSION_MAJOR >= 3
+			keep_alive_cb(result, new Value(src), [](void *p) noexcept { delete (Value *) p; });
+#else
+			keep_alive(result.ptr(), new Value(src), [](void *p) noexcept { delete (Value *) p; });
+#endif
+		}
+		return result;
+	}
+};
+
+NAMESPACE_END(detail)
+NAMESPACE_END(NB_NAMESPACE)
+
+// Use a shared_ptr with a deleter for parity with the pybind11 holders (credit OCP)
+template<typename T, template<typename> typename Deleter = std::default_delete>
+struct shared_ptr : public std::shared_ptr<T> {
+	explicit shared_ptr(T* t = nullptr) : std::shared_ptr<T>(t, Deleter<T>()) {};
+	void reset(T* t = nullptr) { std::shared_ptr<T>::reset(t, Deleter<T>()); };
+};
+
+template<typename T> struct nodelete {
+	void operator()(T* p) const {};
+};
+
+template<typename T> using shared_ptr_nodelete = shared_ptr<T, nodelete>;
+
+// A type of a submodule bound the first time it is used (see lazy_types in the configuration)
+struct LazyType {
+	const char *name;
+	void (*bind)(nb::module_ &);
+	std::vector<std::pair<const char *, const char *>> before;
+	std::vector<std::pair<const char *, const char *>> after;
+	bool is_bound;
+	bool is_binding;
+};
+
+// Bind a type a lazy type needs through the "__bind__" of its submodule, or look it up if the
+// submodule binds all of its types at import
+inline void bind_lazy_dependency(nb::handle root, std::pair<const char *, const char *> const &d) {
+	nb::object dep = root.attr(d.first);
+	if (nb::hasattr(dep, "__bind__"))
+		dep.attr("__bind__")(d.second);
+	else
+		nb::getattr(dep, d.second);
+}
+
+// Bind the types of a submodule on first access through the module __getattr__ and list them in
+// __dir__ and __all__. The types listed in "before" and "after" are bound too through the
+// "__bind__" of their submodules, which returns whether the type is bound (False while a
+// dependency cycle is binding it). Python types are registered as they are bound, so a result is
+// only cast to its most derived type once that type has been bound (e.g., a Handle(Geom_Curve)
+// result holding a Geom_Line is returned as a Geom_Curve until Geom_Line is accessed).
+inline void bind_lazy_types(nb::module_ &main, const char *package, const char *name,
+                            std::vector<LazyType> &types) {
+	nb::module_ mod = nb::borrow<nb::module_>(main.attr(name));
+	nb::handle main_ptr = main;
+	nb::handle mod_ptr = mod;
+	std::vector<LazyType> *lazy = &types;
+	std::string package_name = package;
+
+	nb::list names;
+	for (auto item : nb::borrow<nb::dict>(mod.attr("__dict__"))) {
+		if (nb::str(item.first).c_str()[0] != '_')
+			names.append(item.first);
+	}
+	for (auto const &t : types)
+		names.append(t.name);
+	nb::setattr(mod, "__all__", names);
+
+	nb::setattr(mod, "__bind__", nb::cpp_function([main_ptr, mod_ptr, lazy, package_name](std::string const &attr) -> bool {
+		for (auto &t : *lazy) {
+			if (attr != t.name)
+				continue;
+			// Being bound by a dependency cycle
+			if (t.is_bound || t.is_binding)
+				return t.is_bound;
+			t.is_binding = true;
+			try {
+				nb::module_ root = nb::module_::import_(package_name.c_str());
+				for (auto const &d : t.before)
+					bind_lazy_dependency(root, d);
+				nb::module_ main = nb::borrow<nb::module_>(main_ptr);
+				t.bind(main);
+				t.is_bound = true;
+				t.is_binding = false;
+				for (auto const &d : t.after)
+					bind_lazy_dependency(root, d);
+			} catch (...) {
+				t.is_binding = false;
+				throw;
+			}
+			return true;
+		}
+		return nb::hasattr(mod_ptr, attr.c_str());
+	}));
+
+	nb::setattr(mod, "__getattr__", nb::cpp_function([mod_ptr, lazy](std::string const &attr) -> nb::object {
+		for (auto const &t : *lazy) {
+			if (attr != t.name)
+				continue;
+			if (!nb::cast<bool>(mod_ptr.attr("__bind__")(attr)))
+				throw nb::attribute_error(("type '" + attr + "' is being bound by a dependency cycle").c_str());
+			return mod_ptr.attr(t.name);
+		}
+		throw nb::attribute_error(("module has no attribute '" + attr + "'").c_str());
+	}));
+
+	nb::setattr(mod, "__dir__", nb::cpp_function([mod_ptr]() -> nb::object {
+		nb::module_ builtins = nb::module_::import_("builtins");
+		nb::object names = builtins.attr("set")(mod_ptr.attr("__dict__"));
+		names.attr("update")(mod_ptr.attr("__all__"));
+		return builtins.attr("sorted")(names);
+	}));
+}
+
+// Timings of the binding functions called while importing (see import_profile in the
+// configuration). Each call records the time it took and the number of types it added to its
+// submodule. The results are set as "__import_profile__" of the extension module.
+struct ImportProfile {
+	struct Entry {
+		const char *kind;
+		const char *module;
+		const char *name;
+		double seconds;
+		Py_ssize_t types;
+	};
+
+	std::vector<Entry> entries;
+	std::chrono::steady_clock::time_point start = std::chrono::steady_clock::now();
+
+	// Count the types among the entries added last to a module dictionary, which keeps the
+	// insertion order, so each call only looks at what it added
+	static Py_ssize_t count_types(nb::handle dict, Py_ssize_t added) {
+		Py_ssize_t n = 0;
+		if (added <= 0)
+			return n;
+		nb::object items = nb::module_::import_("builtins").attr("reversed")(dict.attr("items")());
+		for (nb::handle item : items) {
+			if (PyType_Check(PyTuple_GetItem(item.ptr(), 1)))
+				++n;
+			if (--added == 0)
+				break;
+		}
+		return n;
+	}
+
+	template <typename Bind>
+	void run(const char *kind, const char *module, const char *name, nb::object mod, Bind bind) {
+		nb::object dict = mod.attr("__dict__");
+		Py_ssize_t before = PyDict_Size(dict.ptr());
+		auto t0 = std::chrono::steady_clock::now();
+		bind();
+		std::chrono::duration<double> dt = std::chrono::steady_clock::now() - t0;
+		Py_ssize_t types = count_types(dict, PyDict_Size(dict.ptr()) - before);
+		entries.push_back({kind, module, name, dt.count(), types});
+	}
+
+	void finish(nb::module_ &main) {
+		std::chrono::duration<double> dt = std::chrono::steady_clock::now() - start;
+		nb::list items;
+		for (auto const &e : entries) {
+			nb::dict item;
+			item["kind"] = e.kind;
+			item["module"] = e.module;
+			item["name"] = e.name;
+			item["seconds"] = e.seconds;
+			item["types"] = e.types;
+			items.append(item);
+		}
+		nb::dict profile;
+		profile["seconds"] = dt.count();
+		profile["entries"] = items;
+		nb::setattr(main, "__import_profile__", profile);
+	}
+};
@@ -0,0 +1,272 @@
+/*
+This file is part of pyOCCT which provides Python bindings to the OpenCASCADE
+geometry kernel.
+
+Copyright (C) 2016-2018  Laughlin Research, LLC
+Copyright (C) 2019-2022  Trevor Laughlin and the pyOCCT contributors
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+*/
+#pragma once
+
+// Buffer protocol and bulk constructors of the NCollection arrays (see array_templates in the
+// configuration)
+
+#include <pyOCCT.hxx>
+
+#include <cstring>
+#include <string>
+#include <type_traits>
+#include <vector>
+
+template <class TheItemType> class NCollection_Array1;
+template <class TheItemType> class NCollection_Array2;
+
+class gp_XYZ;
+class gp_Pnt;
+class gp_Vec;
+class gp_Dir;
+class gp_XY;
+class gp_Pnt2d;
+class gp_Vec2d;
+class gp_Dir2d;
+
+// Scalar type of an array item, its number of scalars (0 for a scalar item), and if it can be
+// written through a buffer
+template <typename T, typename = void>
+struct ArrayItem {
+	static constexpr bool is_supported = false;
+	typedef double scalar;
+	static constexpr py::ssize_t size = 0;
+	static constexpr bool is_writable = false;
+};
+
+template <typename T>
+struct ArrayItem<T, typename std::enable_if<std::is_arithmetic<T>::value>::type> {
+	static constexpr bool is_supported = true;
+	typedef T scalar;
+	static constexpr py::ssize_t size = 0;
+	static constexpr bool is_writable = true;
+};
+
+template <py::ssize_t Size, bool IsWritable>
+struct ArrayCoordinates {
+	static constexpr bool is_supported = true;
+	typedef double scalar;
+	static constexpr py::ssize_t size = Size;
+	static constexpr bool is_writable = IsWritable;
+};
+
+// Points and vectors are viewed as their coordinates (directions are read-only so they stay
+// normalized)
+template <> struct ArrayItem<gp_XYZ> : ArrayCoordinates<3, true> {};
+template <> struct ArrayItem<gp_Pnt> : ArrayCoordinates<3, true> {};
+template <> struct ArrayItem<gp_Vec> : ArrayCoordinates<3, true> {};
+template <> struct ArrayItem<gp_Dir> : ArrayCoordinates<3, false> {};
+template <> struct ArrayItem<gp_XY> : ArrayCoordinates<2, true> {};
+template <> struct ArrayItem<gp_Pnt2d> : ArrayCoordinates<2, true> {};
+template <> struct ArrayItem<gp_Vec2d> : ArrayCoordinates<2, true> {};
+template <> struct ArrayItem<gp_Dir2d> : ArrayCoordinates<2, false> {};
+
+// Shape and contiguous storage of an array
+template <typename Array>
+struct ArrayLayout;
+
+template <typename T>
+struct ArrayLayout<NCollection_Array1<T>> {
+	typedef T item;
+	static constexpr size_t ndim = 1;
+
+	static std::vector<py::ssize_t> shape(const NCollection_Array1<T> &array) {
+		return {array.Length()};
+	}
+
+	static T *data(NCollection_Array1<T> &array) {
+		return &array.ChangeValue(array.Lower());
+	}
+
+	static NCollection_Array1<T> *create(const std::vector<py::ssize_t> &shape, int lower) {
+		if (shape[0] == 0)
+			return new NCollection_Array1<T>();
+		return new NCollection_Array1<T>(lower, lower + static_cast<int>(shape[0]) - 1);
+	}
+};
+
+template <typename T>
+struct ArrayLayout<NCollection_Array2<T>> {
+	typedef T item;
+	static constexpr size_t ndim = 2;
+
+	static std::vector<py::ssize_t> shape(const NCollection_Array2<T> &array) {
+		return {array.ColLength(), array.RowLength()};
+	}
+
+	static T *data(NCollection_Array2<T> &array) {
+		return &array.ChangeValue(array.LowerRow(), array.LowerCol());
+	}
+
+	static NCollection_Array2<T> *create(const std::vector<py::ssize_t> &shape, int row_lower,
+	                                     int col_lower) {
+		if (shape[0] == 0 || shape[1] == 0)
+			return new NCollection_Array2<T>();
+		return new NCollection_Array2<T>(row_lower, row_lower + static_cast<int>(shape[0]) - 1,
+		                                 col_lower, col_lower + static_cast<int>(shape[1]) - 1);
+	}
+};
+
+inline py::ssize_t array_size(const std::vector<py::ssize_t> &shape) {
+	py::ssize_t size = 1;
+	for (py::ssize_t n : shape)
+		size *= n;
+	return size;
+}
+
+// View the items of an array as a C-contiguous buffer of scalars without copying them
+template <typename Array>
+py::buffer_info array_buffer(Array &array) {
+	typedef typename ArrayLayout<Array>::item Item;
+	typedef typename ArrayItem<Item>::scalar Scalar;
+	const py::ssize_t size = ArrayItem<Item>::size;
+	static_assert(sizeof(Item) == sizeof(Scalar) * (size ? size : 1),
+	              "Array items are not laid out as their scalars");
+
+	std::vector<py::ssize_t> shape = ArrayLayout<Array>::shape(array);
+	std::vector<py::ssize_t> strides(shape.size());
+	py::ssize_t stride = sizeof(Item);
+	for (size_t i = shape.size(); i-- > 0;) {
+		strides[i] = stride;
+		stride *= shape[i];
+	}
+	void *ptr = &array;
+	if (array_size(shape))
+		ptr = ArrayLayout<Array>::data(array);
+	if (size) {
+		shape.push_back(size);
+		strides.push_back(sizeof(Scalar));
+	}
+	return py::buffer_info(ptr, sizeof(Scalar), py::format_descriptor<Scalar>::format(),
+	                       static_cast<py::ssize_t>(shape.size()), shape, strides,
+	                       !ArrayItem<Item>::is_writable);
+}
+
+// Copy the scalars of a strided buffer in C order
+template <typename Scalar>
+Scalar *copy_strided(const char *src, const std::vector<py::ssize_t> &shape,
+                     const std::vector<py::ssize_t> &strides, size_t dim, Scalar *dst) {
+	for (py::ssize_t i = 0; i < shape[dim]; ++i) {
+		if (dim + 1 == shape.size()) {
+			std::memcpy(dst++, src + i * strides[dim], sizeof(Scalar));
+		} else {
+			dst = copy_strided(src + i * strides[dim], shape, strides, dim + 1, dst);
+		}
+	}
+	return dst;
+}
+
+// Create an array from the scalars of a buffer of shape (rows[, columns][, coordinates]) with
+// one copy
+template <typename Array, typename... Lower>
+Array *array_from_buffer(py::buffer values, Lower... lower) {
+	typedef typename ArrayLayout<Array>::item Item;
+	typedef typename ArrayItem<Item>::scalar Scalar;
+	const py::ssize_t size = ArrayItem<Item>::size;
+	const size_t ndim = ArrayLayout<Array>::ndim + (size ? 1 : 0);
+
+	py::buffer_info info = values.request();
+	if (static_cast<size_t>(info.ndim) != ndim || (size && info.shape[ndim - 1] != size)) {
+		std::string expected = ArrayLayout<Array>::ndim == 1 ? "(n" : "(rows, columns";
+		if (size)
+			expected += ", " + std::to_string(size);
+		throw py::value_error("Expected a buffer of shape " + expected + ")");
+	}
+	if (!info.item_type_is_equivalent_to<Scalar>()) {
+		throw py::type_error("Expected items of format \"" +
+		                     py::format_descriptor<Scalar>::format() + "\", got \"" +
+		                     info.format + "\"");
+	}
+
+	std::vector<py::ssize_t> shape(info.shape.begin(),
+	                               info.shape.begin() + ArrayLayout<Array>::ndim);
+	Array *array = ArrayLayout<Array>::create(shape, lower...);
+	if (!array_size(shape))
+		return array;
+
+	Scalar *dst = reinterpret_cast<Scalar *>(ArrayLayout<Array>::data(*array));
+	const char *src = static_cast<const char *>(info.ptr);
+	py::ssize_t stride = sizeof(Scalar);
+	bool is_contiguous = true;
+	for (size_t i = ndim; i-- > 0;) {
+		is_contiguous = is_contiguous && (info.shape[i] == 1 || info.strides[i] == stride);
+		stride *= info.shape[i];
+	}
+	if (is_contiguous) {
+		std::memcpy(dst, src, sizeof(Scalar) * array_size(info.shape));
+	} else {
+		copy_strided(src, info.shape, info.strides, 0, dst);
+	}
+	return array;
+}
+
+template <typename T, typename... Extra>
+void bind_array_constructor(py::class_<NCollection_Array1<T>, Extra...> &cls) {
+	typedef NCollection_Array1<T> Array;
+	cls.def(py::init([](py::buffer values, int lower) {
+		return array_from_buffer<Array>(values, lower);
+	}), py::arg("values"), py::arg("lower") = 1,
+	    "Copy the items of a buffer (e.g., a NumPy array).");
+}
+
+template <typename T, typename... Extra>
+void bind_array_constructor(py::class_<NCollection_Array2<T>, Extra...> &cls) {
+	typedef NCollection_Array2<T> Array;
+	cls.def(py::init([](py::buffer values, int row_lower, int col_lower) {
+		return array_from_buffer<Array>(values, row_lower, col_lower);
+	}), py::arg("values"), py::arg("row_lower") = 1, py::arg("col_lower") = 1,
+	    "Copy the items of a buffer (e.g., a NumPy array).");
+}
+
+template <typename Class>
+void bind_array_items(Class &cls, std::false_type, std::false_type) {
+	typedef typename Class::type Array;
+	cls.def_buffer([](Array &) -> py::buffer_info {
+		throw py::type_error("Only arrays of numbers, points, and vectors support the buffer "
+		                     "protocol");
+	});
+}
+
+template <typename Class>
+void bind_array_items(Class &cls, std::true_type, std::false_type) {
+	typedef typename Class::type Array;
+	cls.def_buffer([](Array &array) { return array_buffer(array); });
+}
+
+template <typename Class>
+void bind_array_items(Class &cls, std::true_type, std::true_type) {
+	bind_array_items(cls, std::true_type(), std::false_type());
+	bind_array_constructor(cls);
+}
+
+// Expose the items of an array class through the buffer protocol (e.g., numpy.asarray) and bind
+// a constructor from a buffer. The class must be bound with py::buffer_protocol(). The buffer is
+// a view of the items of the array: it keeps the array object alive but is invalidated by Resize,
+// Assign or Move of another size, and anything else reallocating the items. Buffers are not
+// implicitly converted to arrays since a temporary array would drop the writes of methods
+// filling an array passed by reference.
+template <typename Class>
+void bind_array(Class &cls) {
+	typedef ArrayItem<typename ArrayLayout<typename Class::type>::item> Item;
+	bind_array_items(cls, std::integral_constant<bool, Item::is_supported>(),
+	                 std::integral_constant<bool, Item::is_supported && Item::is_writable>());
+}
@@ -0,0 +1,108 @@
+/*
+This file is part of pyOCCT which provides Python bindings to the OpenCASCADE
+geometry kernel.
+
+Copyright (C) 2016-2018  Laughlin Research, LLC
+Copyright (C) 2019-2022  Trevor Laughlin and the pyOCCT contributors
+
+This library is free software; you can redistribute it and/or
+modify it under the terms of the GNU Lesser General Public
+License as published by the Free Software Foundation; either
+version 2.1 of the License, or (at your option) any later version.
+
+This library is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with this library; if not, write to the Free Software
+Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+*/
+#pragma once
+
+// Awaitable companions of long-running methods (see async_methods in the configuration)
+
+#include <pyOCCT.hxx>
+
+#include <atomic>
+#include <string>
+
+#if __has_include(<Message_ProgressIndicator.hxx>) && __has_include(<Message_ProgressRange.hxx>)
+#define PYOCCT_ASYNC_PROGRESS
+
+#include <Message_ProgressIndicator.hxx>
+#include <Message_ProgressRange.hxx>
+#include <Message_ProgressScope.hxx>
+
+// Progress indicator that breaks the operation once the future of its call is cancelled
+class AsyncProgress : public Message_ProgressIndicator {
+public:
+	std::atomic<bool> is_cancelled{false};
+
+	Standard_Boolean UserBreak() override { return is_cancelled.load(); }
+
+	void Show(const Message_ProgressScope &, const Standard_Boolean) override {}
+};
+#endif
+
+// Run a callable in the default executor of the running event loop and return the asyncio
+// future. The executor holds the callable and so the arguments until the call completes. If the
+// "progress" keyword is given then a progress range is passed with it and cancelling the future
+// breaks the operation at its next progress check.
+inline py::object start_async(py::object func, py::args args, py::kwargs kwargs,
+                              std::string const &progress) {
+	py::object loop = py::module::import("asyncio").attr("get_running_loop")();
+
+#ifdef PYOCCT_ASYNC_PROGRESS
+	opencascade::handle<AsyncProgress> indicator;
+	if (!progress.empty() && !kwargs.contains(progress.c_str()) &&
+	    py::detail::get_type_handle(typeid(Message_ProgressRange), false)) {
+		indicator = new AsyncProgress();
+		kwargs[progress.c_str()] = py::cast(indicator->Start());
+	}
+#endif
+
+	py::object job = py::module::import("functools").attr("partial")(func, *args, **kwargs);
+
+#ifdef PYOCCT_ASYNC_PROGRESS
+	// Keep the indicator alive while the call runs even if the future is cancelled first
+	if (indicator.get() != nullptr) {
+		py::object call = job;
+		job = py::cpp_function([call, indicator]() { return call(); });
+	}
+#endif
+
+	py::object future = loop.attr("run_in_executor")(py::none(), job);
+
+#ifdef PYOCCT_ASYNC_PROGRESS
+	if (indicator.get() != nullptr) {
+		future.attr("add_done_callback")(py::cpp_function([indicator](py::object f) {
+			if (f.attr("cancelled")().cast<bool>())
+				indicator->is_cancelled = true;
+		}));
+	}
+#endif
+	return future;
+}
+
+// Bind "name" as an awaitable companion of the method "method". The method should release the
+// GIL so the event loop keeps running while it does.
+template <typename Class>
+void bind_async(Class &cls, const char *name, const char *method, const char *progress,
+                bool is_static) {
+	std::string method_name = method;
+	std::string progress_name = progress ? progress : "";
+	std::string doc = std::string("Awaitable ") + method + "() running in the default executor of the event loop.";
+
+	if (is_static) {
+		py::handle cls_ptr = cls;
+		cls.def_static(name, [cls_ptr, method_name, progress_name](py::args args, py::kwargs kwargs) {
+			return start_async(cls_ptr.attr(method_name.c_str()), args, kwargs, progress_name);
+		}, doc.c_str());
+	} else {
+		cls.def(name, [method_name, progress_name](py::object self, py::args args, py::kwargs kwargs) {
+			return start_async(self.attr(method_name.c_str()), args, kwargs, progress_name);
+		}, doc.c_str());
+	}
+}
@@ -28,6 +28,8 @@ Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
 #include <pybind11/pybind11.h>
 
+#include <chrono>
+
 #include <Standard_Handle.hxx>
 
 namespace py = pybind11;
@@ -50,3 +52,153 @@ template<typename T> using shared_ptr_nodelete = shared_ptr<T, nodelete>;
 
 PYBIND11_DECLARE_HOLDER_TYPE(T, shared_ptr<T>);
 PYBIND11_DECLARE_HOLDER_TYPE(T, shared_ptr_nodelete<T>);
+
+// A type of a submodule bound the first time it is used (see lazy_types in the configuration)
+struct LazyType {
+	const char *name;
+	void (*bind)(py::module &);
+	std::vector<std::pair<const char *, const char *>> before;
+	std::vector<std::pair<const char *, const char *>> after;
+	bool is_bound;
+	bool is_binding;
+};
+
+// Bind a type a lazy type needs through the "__bind__" of its submodule, or look it up if the
+// submodule binds all of its types at import
+inline void bind_lazy_dependency(py::handle root, std::pair<const char *, const char *> const &d) {
+	py::object dep = root.attr(d.first);
+	if (py::hasattr(dep, "__bind__"))
+		dep.attr("__bind__")(d.second);
+	else
+		py::getattr(dep, d.second);
+}
+
+// Bind the types of a submodule on first access through the module __getattr__ and list them in
+// __dir__ and __all__. The types listed in "before" and "after" are bound too through the
+// "__bind__" of their submodules, which returns whether the type is bound (False while a
+// dependency cycle is binding it). Python types are registered as they are bound, so a result is
+// only cast to its most derived type once that type has been bound (e.g., a Handle(Geom_Curve)
+// result holding a Geom_Line is returned as a Geom_Curve until Geom_Line is accessed).
+inline void bind_lazy_types(py::module &main, const char *package, const char *name,
+                            std::vector<LazyType> &types) {
+	py::module mod = main.attr(name);
+	py::handle main_ptr = main;
+	py::handle mod_ptr = mod;
+	std::vector<LazyType> *lazy = &types;
+	std::string package_name = package;
+
+	py::list names;
+	for (auto item : py::reinterpret_borrow<py::dict>(mod.attr("__dict__"))) {
+		if (py::str(item.first).cast<std::string>()[0] != '_')
+			names.append(item.first);
+	}
+	for (auto const &t : types)
+		names.append(t.name);
+	mod.attr("__all__") = names;
+
+	mod.attr("__bind__") = py::cpp_function([main_ptr, mod_ptr, lazy, package_name](std::string const &attr) -> bool {
+		for (auto &t : *lazy) {
+			if (attr != t.name)
+				continue;
+			// Being bound by a dependency cycle
+			if (t.is_bound || t.is_binding)
+				return t.is_bound;
+			t.is_binding = true;
+			try {
+				py::module root = py::module::import(package_name.c_str());
+				for (auto const &d : t.before)
+					bind_lazy_dependency(root, d);
+				py::module main = py::reinterpret_borrow<py::module>(main_ptr);
+				t.bind(main);
+				t.is_bound = true;
+				t.is_binding = false;
+				for (auto const &d : t.after)
+					bind_lazy_dependency(root, d);
+			} catch (...) {
+				t.is_binding = false;
+				throw;
+			}
+			return true;
+		}
+		return py::hasattr(mod_ptr, attr.c_str());
+	});
+
+	mod.attr("__getattr__") = py::cpp_function([mod_ptr, lazy](std::string const &attr) -> py::object {
+		for (auto const &t : *lazy) {
+			if (attr != t.name)
+				continue;
+			if (!py::cast<bool>(mod_ptr.attr("__bind__")(attr)))
+				throw py::attribute_error(("type '" + attr + "' is being bound by a dependency cycle").c_str());
+			return mod_ptr.attr(t.name);
+		}
+		throw py::attribute_error("module has no attribute '" + attr + "'");
+	});
+
+	mod.attr("__dir__") = py::cpp_function([mod_ptr]() -> py::object {
+		py::module builtins = py::module::import("builtins");
+		py::object names = builtins.attr("set")(mod_ptr.attr("__dict__"));
+		names.attr("update")(mod_ptr.attr("__all__"));
+		return builtins.attr("sorted")(names);
+	});
+}
+
+// Timings of the binding functions called while importing (see import_profile in the
+// configuration). Each call records the time it took and the number of types it added to its
+// submodule. The results are set as "__import_profile__" of the extension module.
+struct ImportProfile {
+	struct Entry {
+		const char *kind;
+		const char *module;
+		const char *name;
+		double seconds;
+		Py_ssize_t types;
+	};
+
+	std::vector<Entry> entries;
+	std::chrono::steady_clock::time_point start = std::chrono::steady_clock::now();
+
+	// Count the types among the entries added last to a module dictionary, which keeps the
+	// insertion order, so each call only looks at what it added
+	static Py_ssize_t count_types(py::handle dict, Py_ssize_t added) {
+		Py_ssize_t n = 0;
+		if (added <= 0)
+			return n;
+		py::object items = py::module::import("builtins").attr("reversed")(dict.attr("items")());
+		for (py::handle item : items) {
+			if (PyType_Check(PyTuple_GetItem(item.ptr(), 1)))
+				++n;
+			if (--added == 0)
+				break;
+		}
+		return n;
+	}
+
+	template <typename Bind>
+	void run(const char *kind, const char *module, const char *name, py::object mod, Bind bind) {
+		py::object dict = mod.attr("__dict__");
+		Py_ssize_t before = PyDict_Size(dict.ptr());
+		auto t0 = std::chrono::steady_clock::now();
+		bind();
+		std::chrono::duration<double> dt = std::chrono::steady_clock::now() - t0;
+		Py_ssize_t types = count_types(dict, PyDict_Size(dict.ptr()) - before);
+		entries.push_back({kind, module, name, dt.count(), types});
+	}
+
+	void finish(py::module &main) {
+		std::chrono::duration<double> dt = std::chrono::steady_clock::now() - start;
+		py::list items;
+		for (auto const &e : entries) {
+			py::dict item;
+			item["kind"] = e.kind;
+			item["module"] = e.module;
+			item["name"] = e.name;
+			item["seconds"] = e.seconds;
+			item["types"] = e.types;
+			items.append(item);
+		}
+		py::dict profile;
+		profile["seconds"] = dt.count();
+		profile["entries"] = items;
+		main.attr("__import_profile__") = profile;
+	}
+};
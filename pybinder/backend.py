@@ -0,0 +1,317 @@
+__all__ = ['Backend', 'PybindBackend', 'NanobindBackend', 'get_backend']
+
+
+class Backend(object):
+    """
+    The binding library specific pieces of the generated source. The emitters in pybinder.bind and
+    pybinder.generate only write library specific code through a backend.
+    """
+
+    # Backend name as used in the configuration file
+    name = ''
+
+    # Namespace alias of the binding library
+    ns = ''
+
+    # Type of a module object
+    module_type = ''
+
+    # Macro defining the extension module
+    module_macro = ''
+
+    # Maximum number of bound base classes per class (None for no limit)
+    max_bases = None
+
+    # Oldest Python version whose limited C API the bindings can target (None if not supported)
+    stable_abi = None
+
+    # Header with the helpers of the awaitable method companions
+    async_header = ''
+
+    # Header with the buffer protocol helpers of the array class templates
+    array_header = ''
+
+    # Module macro argument declaring the module does not need the GIL (empty if declared by
+    # building with the free-threading option of the library instead)
+    free_threaded_option = ''
+
+    # Macro defined when the library is built with its free-threading option (empty if not needed)
+    free_threaded_macro = ''
+
+    # Module macro argument declaring the module can be loaded in subinterpreters with their own
+    # GIL (None if not supported)
+    subinterpreter_option = None
+
+    def get_module(self, name, var='main'):
+        """
+        :param str name: The submodule name.
+        :param str var: The variable holding the parent module.
+
+        :return: Statement declaring "mod" as the given submodule.
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    def class_type(self, register_name, holder, bases):
+        """
+        :param str register_name: The C++ type.
+        :param str holder: The holder template (e.g., "shared_ptr").
+        :param list(str) bases: The C++ types of the bound base classes.
+
+        :return: The class binding type.
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    def class_extras(self, holder, is_nested, is_array=False):
+        """
+        :param str holder: The holder template.
+        :param bool is_nested: Whether the class is a nested class.
+        :param bool is_array: Whether the class exposes its items through the buffer protocol.
+
+        :return: Extra class binding arguments, each preceded by ", ".
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    def init(self, klass, ctor):
+        """
+        :param pybinder.wrap.ClassWrapper klass: The class.
+        :param pybinder.wrap.ConstructorWrapper ctor: The constructor.
+
+        :return: The constructor binding expression.
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    def is_registered(self, register_name):
+        """
+        :param str register_name: The C++ type.
+
+        :return: Expression that is true if the type is already bound.
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    def make_iterator(self, klass):
+        """
+        :param pybinder.wrap.ClassWrapper klass: The class.
+
+        :return: Expression creating a Python iterator over "self".
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    def alias(self, mod, name, other_mod, other_name, var='main', other_var=None):
+        """
+        :param str other_var: The variable holding the parent module of "other_mod" if it is not
+            the same as "var".
+
+        :return: Statement making "mod.name" refer to "other_mod.other_name".
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    def set_attr(self, var, name, value):
+        """
+        :param str var: The variable holding the object.
+        :param str name: The attribute name.
+        :param str value: A C++ expression holding the value.
+
+        :return: Statement setting an attribute of an object.
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    def import_module(self, var, name):
+        """
+        :param str var: The variable to declare.
+        :param str name: The full name of the module.
+
+        :return: Statement importing a module into "var".
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    def arg(self, name):
+        """
+        :param str name: The argument name.
+
+        :return: The named argument annotation.
+        :rtype: str
+        """
+        return '{}::arg(\"{}\")'.format(self.ns, name)
+
+    def arg_value(self, name):
+        """
+        :param str name: A C++ expression holding the argument name.
+
+        :return: The named argument annotation.
+        :rtype: str
+        """
+        return '{}::arg({})'.format(self.ns, name)
+
+    def enum_type(self, register_name):
+        """
+        :param str register_name: The C++ enum.
+
+        :return: The enum binding type.
+        :rtype: str
+        """
+        return '{}::enum_<{}>'.format(self.ns, register_name)
+
+    def cast(self, value):
+        """
+        :param str value: A C++ expression.
+
+        :return: Expression casting the value to a Python object.
+        :rtype: str
+        """
+        return '{}::cast({})'.format(self.ns, value)
+
+    def keep_alive(self, nurse, patient):
+        """
+        :return: The keep alive call policy.
+        :rtype: str
+        """
+        return '{}::keep_alive<{}, {}>()'.format(self.ns, nurse, patient)
+
+    def release_gil(self):
+        """
+        :return: The call guard releasing the GIL while the C++ function runs.
+        :rtype: str
+        """
+        return '{0}::call_guard<{0}::gil_scoped_release>()'.format(self.ns)
+
+
+class PybindBackend(Backend):
+    """
+    Emit pybind11 bindings.
+    """
+
+    name = 'pybind11'
+    ns = 'py'
+    module_type = 'py::module'
+    module_macro = 'PYBIND11_MODULE'
+    async_header = 'pyAsync.hxx'
+    array_header = 'pyArray.hxx'
+    free_threaded_option = 'py::mod_gil_not_used()'
+    subinterpreter_option = 'py::multiple_interpreters::per_interpreter_gil()'
+
+    def get_module(self, name, var='main'):
+        return 'py::module mod = {}.attr(\"{}\");'.format(var, name)
+
+    def class_type(self, register_name, holder, bases):
+        args = [register_name, '{}<{}>'.format(holder, register_name)] + bases
+        return 'py::class_<{}>'.format(', '.join(args))
+
+    def class_extras(self, holder, is_nested, is_array=False):
+        extras = ''
+        if is_nested:
+            extras += ', py::module_local()'
+        if is_array:
+            extras += ', py::buffer_protocol()'
+        return extras
+
+    def init(self, klass, ctor):
+        params = ', '.join([p.register_name for p in ctor.parameters])
+        return 'py::init<{}>()'.format(params)
+
+    def is_registered(self, register_name):
+        return 'py::detail::get_type_handle(typeid({}), false)'.format(register_name)
+
+    def make_iterator(self, klass):
+        return 'py::make_iterator(self.begin(), self.end())'
+
+    def alias(self, mod, name, other_mod, other_name, var='main', other_var=None):
+        return '{}.attr(\"{}\").attr(\"{}\") = {}.attr(\"{}\").attr(\"{}\");'.format(
+            var, mod, name, other_var or var, other_mod, other_name)
+
+    def set_attr(self, var, name, value):
+        return '{}.attr(\"{}\") = {};'.format(var, name, value)
+
+    def import_module(self, var, name):
+        return 'py::module {} = py::module::import(\"{}\");'.format(var, name)
+
+
+class NanobindBackend(Backend):
+    """
+    Emit nanobind bindings. Standard_Transient types are returned to Python through the
+    opencascade::handle type caster in "nbOCCT.hxx" and are constructed through factory functions
+    so their lifetime is always managed by the OCCT reference count.
+    """
+
+    name = 'nanobind'
+    ns = 'nb'
+    module_type = 'nb::module_'
+    module_macro = 'NB_MODULE'
+    max_bases = 1
+    stable_abi = (3, 12)
+    async_header = 'nbAsync.hxx'
+    array_header = 'nbArray.hxx'
+    free_threaded_macro = 'NB_FREE_THREADED'
+
+    def get_module(self, name, var='main'):
+        return 'nb::module_ mod = nb::borrow<nb::module_>({}.attr(\"{}\"));'.format(var, name)
+
+    def class_type(self, register_name, holder, bases):
+        args = [register_name] + bases[:self.max_bases]
+        return 'nb::class_<{}>'.format(', '.join(args))
+
+    def class_extras(self, holder, is_nested, is_array=False):
+        if holder == 'shared_ptr_nodelete':
+            return ', nb::never_destruct()'
+        return ''
+
+    def init(self, klass, ctor):
+        if klass.handle != 'opencascade::handle':
+            params = ', '.join([p.register_name for p in ctor.parameters])
+            return 'nb::init<{}>()'.format(params)
+
+        # Construct through the handle so the OCCT reference count owns the object
+        params = []
+        args = []
+        for i, p in enumerate(ctor.parameters):
+            name = 'a{}'.format(i)
+            params.append('{} {}'.format(p.register_name, name))
+            if p.type.is_rvalue:
+                name = 'std::move({})'.format(name)
+            args.append(name)
+        return 'nb::new_([]({}) {{ return opencascade::handle<{}>(new {}({})); }})'.format(
+            ', '.join(params), klass.type_name, klass.type_name, ', '.join(args))
+
+    def is_registered(self, register_name):
+        return 'nb::type<{}>().is_valid()'.format(register_name)
+
+    def make_iterator(self, klass):
+        return 'nb::make_iterator(nb::type<{}>(), \"iterator\", self.begin(), self.end())'.format(
+            klass.type_name)
+
+    def alias(self, mod, name, other_mod, other_name, var='main', other_var=None):
+        return 'nb::setattr({}.attr(\"{}\"), \"{}\", {}.attr(\"{}\").attr(\"{}\"));'.format(
+            var, mod, name, other_var or var, other_mod, other_name)
+
+    def set_attr(self, var, name, value):
+        return 'nb::setattr({}, \"{}\", {});'.format(var, name, value)
+
+    def import_module(self, var, name):
+        return 'nb::module_ {} = nb::module_::import_(\"{}\");'.format(var, name)
+
+
+_backends = {b.name: b() for b in (PybindBackend, NanobindBackend)}
+
+
+def get_backend(name):
+    """
+    Get a backend by name.
+
+    :param str name: The backend name ("pybind11" or "nanobind").
+
+    :return: The backend.
+    :rtype: pybinder.backend.Backend
+    """
+    try:
+        return _backends[name]
+    except KeyError:
+        msg = 'Unknown binding backend: {}'.format(name)
+        raise RuntimeError(msg)
@@ -0,0 +1,496 @@
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import time
+
+from pybinder.configure import Configurator
+from pybinder.events import EventLog
+from pybinder.generate import generate_bindings
+from pybinder.parse import Parser
+from pybinder.profile import Profiler
+from pybinder.synthetic import write_corpus
+from pybinder.verify import get_verify_command
+
+__all__ = ['run_benchmark', 'run_single', 'measure_import', 'read_import_profile',
+           'measure_threads', 'measure_interpreters', 'compare_backends']
+
+# The pyOCCT headers shipped next to the generator
+_inc_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'inc')
+
+_source_re = re.compile(r'\$\{CMAKE_CURRENT_LIST_DIR\}/(\S+\.cxx)')
+
+_common_headers = {'pybind11': 'pyOCCT.hxx', 'nanobind': 'nbOCCT.hxx'}
+
+
+def make_config(corpus_dir, work_dir):
+    """
+    Create a configuration for parsing a synthetic corpus.
+
+    :param str corpus_dir: The directory of the corpus headers.
+    :param str work_dir: The directory for the generated include file.
+
+    :return:
+    :rtype: pybinder.configure.Configurator
+    """
+    config = Configurator()
+    config.args = ['-x', 'c++', '-std=c++14', '-ferror-limit=0']
+    config.header_extensions = ['.hxx']
+    config.header_file = os.path.join(work_dir, 'all_includes.h')
+    config.excluded_modules = {'any': [], config.platform: []}
+    config.common_headers = ['pyOCCT.hxx']
+    config.add_include_paths(corpus_dir)
+    return config
+
+
+def run_single(npackages, work_dir, nmethods=10):
+    """
+    Generate a corpus and run the full pipeline on it in the current process.
+
+    :param int npackages: The number of packages in the corpus.
+    :param str work_dir: The working directory.
+    :param int nmethods: Number of extra methods per transient class.
+
+    :return: The profile report.
+    :rtype: dict
+    """
+    corpus_dir = os.path.join(work_dir, 'inc')
+    src_dir = os.path.join(work_dir, 'src')
+    headers = write_corpus(corpus_dir, npackages, nmethods)
+    if not os.path.exists(src_dir):
+        os.makedirs(src_dir)
+
+    profiler = Profiler()
+    profiler.start()
+    profiler.instrument_libclang()
+
+    config = make_config(corpus_dir, work_dir)
+    parser = Parser(config)
+    with profiler.stage('header_file'):
+        parser.generate_header_file(corpus_dir)
+    with profiler.stage('parse'):
+        parser.parse()
+
+    generate_bindings(parser, config, src_dir, True, EventLog(quiet=True), profiler)
+    profiler.stop()
+
+    report = profiler.report()
+    report['packages'] = npackages
+    report['headers'] = len(headers)
+    return report
+
+
+def scaling_exponents(results, key):
+    """
+    Estimate the exponent k in "cost ~ size^k" between successive sizes.
+
+    :param list(dict) results: The reports sorted by size.
+    :param callable key: Function returning the cost of a report.
+
+    :return: The exponents.
+    :rtype: list(float)
+    """
+    exponents = []
+    for r0, r1 in zip(results[:-1], results[1:]):
+        c0, c1 = key(r0), key(r1)
+        if not c0 or not c1:
+            exponents.append(None)
+            continue
+        exponents.append(math.log(c1 / c0) / math.log(r1['packages'] / r0['packages']))
+    return exponents
+
+
+def run_benchmark(scales=(1, 10, 100), base_packages=5, nmethods=10):
+    """
+    Run the pipeline on synthetic corpora of increasing size. Each size runs in a separate process
+    so the memory of one run does not affect the next.
+
+    :param scales: The size multipliers.
+    :param int base_packages: The number of packages at a scale of one.
+    :param int nmethods: Number of extra methods per transient class.
+
+    :return: The reports and the estimated scaling exponents per stage.
+    :rtype: dict
+    """
+    results = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as work_dir:
+            cmd = [sys.executable, '-m', 'pybinder.benchmark', str(base_packages * scale),
+                   work_dir, str(nmethods)]
+            out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, universal_newlines=True)
+        report = json.loads(out.stdout)
+        report['scale'] = scale
+        results.append(report)
+
+    stages = [s['name'] for s in results[0]['stages']]
+    scaling = {}
+    for name in stages:
+        def seconds(r, name=name):
+            return sum(s['seconds'] for s in r['stages'] if s['name'] == name)
+        scaling[name] = scaling_exponents(results, seconds)
+    scaling['total_seconds'] = scaling_exponents(results, lambda r: r['total_seconds'])
+    scaling['process_peak_rss'] = scaling_exponents(
+        results, lambda r: r['stages'][-1]['process_peak_rss'])
+
+    return {'results': results, 'scaling': scaling}
+
+
+# Script run in a fresh interpreter to measure an import
+_import_script = """
+import importlib, json, sys, time
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def peak_rss():
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+obj = importlib.import_module(sys.argv[2])
+seconds = time.perf_counter() - start
+for name in sys.argv[3:]:
+    obj = importlib.import_module(sys.argv[2])
+    for part in name.split('.'):
+        obj = getattr(obj, part)
+json.dump({'seconds': seconds, 'total_seconds': time.perf_counter() - start,
+           'peak_rss': peak_rss()}, sys.stdout)
+"""
+
+
+def measure_import(path, package='OCCT', repeat=5, names=()):
+    """
+    Measure the cold import of a built package. Each import runs in a fresh interpreter.
+
+    :param str path: The directory containing the package.
+    :param str package: The package name.
+    :param int repeat: The number of imports. The fastest one is reported.
+    :param list(str) names: Attributes to use after the import (e.g., "gp.gp_Pnt").
+
+    :return: The import time, the time including the use of the names (in seconds), and the
+        peak memory of the interpreter (in bytes).
+    :rtype: dict
+    """
+    runs = []
+    for _ in range(repeat):
+        cmd = [sys.executable, '-c', _import_script, path, package] + list(names)
+        out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, universal_newlines=True)
+        runs.append(json.loads(out.stdout))
+    runs.sort(key=lambda r: r['seconds'])
+    return runs[0]
+
+
+_profile_script = """
+import importlib, json, sys
+
+sys.path.insert(0, sys.argv[1])
+importlib.import_module(sys.argv[2])
+for name in sys.argv[3:]:
+    obj = importlib.import_module(sys.argv[2])
+    for part in name.split('.'):
+        obj = getattr(obj, part)
+
+seconds = 0.
+entries = []
+for name, module in sorted(sys.modules.items()):
+    if name != sys.argv[2] and not name.startswith(sys.argv[2] + '.'):
+        continue
+    profile = getattr(module, '__import_profile__', None)
+    if not isinstance(profile, dict):
+        continue
+    seconds += profile['seconds']
+    for entry in profile['entries']:
+        entry['extension'] = name
+        entries.append(entry)
+json.dump({'seconds': seconds, 'entries': entries}, sys.stdout)
+"""
+
+
+def read_import_profile(path, package='OCCT', names=()):
+    """
+    Import a package built with import_profile in a fresh interpreter and collect the timings of
+    its binding functions from every extension loaded.
+
+    :param str path: The directory containing the package.
+    :param str package: The package name.
+    :param list(str) names: Attributes to use after the import so the extensions they need are
+        loaded (e.g., "gp.gp_Pnt").
+
+    :return: The time spent in the extension module bodies (in seconds) and the entries with
+        the kind ("enums", "functions", "type", or "alias"), extension, module, name, seconds,
+        and number of types each binding function added to its module.
+    :rtype: dict
+    """
+    cmd = [sys.executable, '-c', _profile_script, path, package] + list(names)
+    out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, universal_newlines=True)
+    return json.loads(out.stdout)
+
+
+_threads_script = """
+import json, sys, time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, sys.argv[1])
+namespace = {}
+exec(sys.argv[2], namespace)
+call = compile(sys.argv[3], '<call>', 'eval')
+calls = int(sys.argv[4])
+
+def task(_):
+    return eval(call, namespace)
+
+results = []
+for workers in [int(w) for w in sys.argv[5:]]:
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(task, range(workers)))
+        start = time.perf_counter()
+        list(pool.map(task, range(calls)))
+        seconds = time.perf_counter() - start
+    results.append({'workers': workers, 'seconds': seconds, 'throughput': calls / seconds,
+                    'gil_enabled': getattr(sys, '_is_gil_enabled', lambda: True)()})
+json.dump(results, sys.stdout)
+"""
+
+
+def _measure(script, python, path, setup, call, workers, calls):
+    cmd = [python or sys.executable, '-c', script, path, setup, call, str(calls)]
+    cmd += [str(w) for w in workers]
+    out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, universal_newlines=True)
+    results = json.loads(out.stdout)
+    for r in results:
+        r['speedup'] = r['throughput'] / results[0]['throughput']
+    return results
+
+
+def measure_threads(path, setup, call, workers=(1, 2, 4, 8), calls=64, python=None):
+    """
+    Measure the throughput of a call made from a pool of Python threads. With the GIL released
+    by the call (see release_gil in the configuration) or on free-threaded Python with modules
+    that do not need it (see free_threaded in the configuration) the throughput can scale with
+    the number of threads up to the number of cores, otherwise it stays the same. Use it to check
+    that a call scales before listing it in release_gil.
+
+    :param str path: The directory containing the package.
+    :param str setup: Statements run once first (e.g., imports and inputs).
+    :param str call: The expression evaluated by each task.
+    :param collection(int) workers: The numbers of threads.
+    :param int calls: The number of calls for each number of threads.
+    :param str python: The Python executable (e.g., a free-threaded one). If None then the
+        current one is used.
+
+    :return: The number of threads, the time (in seconds), the calls per second, the speedup
+        over the first number of threads, and if the GIL was enabled after the setup of each run.
+    :rtype: list(dict)
+    """
+    return _measure(_threads_script, python, path, setup, call, workers, calls)
+
+
+_interpreters_script = """
+import json, sys, threading, time
+import _interpreters
+
+path, setup, call, calls = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4])
+prelude = '\\n'.join(['import sys', 'sys.path.insert(0, {!r})'.format(path), 'namespace = {}',
+                      'exec({!r}, namespace)'.format(setup),
+                      'call = compile({!r}, "<call>", "eval")'.format(call),
+                      'eval(call, namespace)'])
+
+errors = []
+
+def run(interp, code):
+    error = _interpreters.exec(interp, code)
+    if error is not None:
+        errors.append(getattr(error, 'formatted', error))
+
+results = []
+for workers in [int(w) for w in sys.argv[5:]]:
+    # Each interpreter has its own GIL and imports the package on its own
+    interps = [_interpreters.create() for _ in range(workers)]
+    for interp in interps:
+        run(interp, prelude)
+    if errors:
+        raise RuntimeError(errors[0])
+    loop = 'for _ in range({}): eval(call, namespace)'.format(calls // workers)
+    threads = [threading.Thread(target=run, args=(interp, loop)) for interp in interps]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    if errors:
+        raise RuntimeError(errors[0])
+    for interp in interps:
+        _interpreters.destroy(interp)
+    n = calls // workers * workers
+    results.append({'workers': workers, 'seconds': seconds, 'throughput': n / seconds})
+json.dump(results, sys.stdout)
+"""
+
+
+def measure_interpreters(path, setup, call, workers=(1, 2, 4, 8), calls=64, python=None):
+    """
+    Measure the throughput of a call made from subinterpreters with their own GIL, one thread
+    each. The package must be built with subinterpreters in the configuration to be imported in
+    them and the Python version must be 3.13 or newer.
+
+    :param str path: The directory containing the package.
+    :param str setup: Statements run once first in each interpreter (e.g., imports and inputs).
+    :param str call: The expression evaluated by each interpreter.
+    :param collection(int) workers: The numbers of interpreters.
+    :param int calls: The number of calls for each number of interpreters.
+    :param str python: The Python executable. If None then the current one is used.
+
+    :return: The number of interpreters, the time (in seconds), the calls per second, and the
+        speedup over the first number of interpreters of each run.
+    :rtype: list(dict)
+    """
+    return _measure(_interpreters_script, python, path, setup, call, workers, calls)
+
+
+def _compile(cmd, src, obj):
+    start = time.perf_counter()
+    subprocess.run(cmd + ['-c', src, '-o', obj], check=True)
+    return time.perf_counter() - start
+
+
+def build_extension(config, src_dir, build_dir, opt='-O2'):
+    """
+    Compile the generated sources one at a time and link them into the OCCT extension module.
+
+    :param pybinder.configure.Configurator config:
+    :param str src_dir: The directory of the generated sources.
+    :param str build_dir: The directory for the objects and the extension module.
+    :param str opt: The optimization option.
+
+    :return: The compile time of the generated sources, the compile time of the binding library
+        if it is built from source (nanobind), and the link time (in seconds).
+    :rtype: dict
+    """
+    if not os.path.exists(build_dir):
+        os.makedirs(build_dir)
+    cmd = [a for a in get_verify_command(config, src_dir) if a != '-fsyntax-only']
+    cmd += [opt, '-fPIC', '-w']
+
+    with open(os.path.join(src_dir, 'sources.cmake')) as fin:
+        sources = _source_re.findall(fin.read())
+    objects = []
+    seconds = 0.
+    for src in sources:
+        obj = os.path.join(build_dir, os.path.splitext(src)[0] + '.o')
+        seconds += _compile(cmd, os.path.join(src_dir, src), obj)
+        objects.append(obj)
+
+    library_seconds = 0.
+    if config.backend == 'nanobind':
+        import nanobind
+        root = os.path.dirname(nanobind.include_dir())
+        obj = os.path.join(build_dir, 'nb_combined.o')
+        lib_cmd = cmd + ['-I' + os.path.join(root, 'ext', 'robin_map', 'include')]
+        library_seconds = _compile(lib_cmd, os.path.join(root, 'src', 'nb_combined.cpp'), obj)
+        objects.append(obj)
+
+    start = time.perf_counter()
+    ext = os.path.join(build_dir, 'OCCT' + sysconfig.get_config_var('EXT_SUFFIX'))
+    subprocess.run([cmd[0], '-shared', '-o', ext] + objects, check=True)
+    link_seconds = time.perf_counter() - start
+
+    return {'sources': len(sources), 'compile_seconds': seconds,
+            'library_seconds': library_seconds, 'link_seconds': link_seconds,
+            'size': os.path.getsize(ext)}
+
+
+_calls_script = """
+import json, sys, timeit
+
+sys.path.insert(0, sys.argv[1])
+namespace = {}
+exec(sys.argv[2], namespace)
+results = {}
+for call in sys.argv[4:]:
+    timer = timeit.Timer(call, globals=namespace)
+    results[call] = min(timer.repeat(5, int(sys.argv[3]))) / int(sys.argv[3])
+json.dump(results, sys.stdout)
+"""
+
+# Calls of the synthetic corpus: a getter, a method with an argument converted from a float, a
+# method taking a bound type, a static function, and a constructor through the handle holder
+_calls = ['p.X()', 'p.SetCoord(1., 2., 3.)', 'p.Distance(p)', 'Pkg0_Tool.NbPoints_s(a)',
+          'Pkg0_Object()']
+_calls_setup = 'import OCCT\n' \
+               'Pkg0_Object = OCCT.Pkg0.Pkg0_Object\n' \
+               'Pkg0_Tool = OCCT.Pkg0.Pkg0_Tool\n' \
+               'p = OCCT.Pkg0.Pkg0_Point(1., 2., 3.)\n' \
+               'a = OCCT.Pkg0.Pkg0_Array1OfPoint()'
+
+
+def measure_calls(path, setup, calls, number=100000):
+    """
+    Measure the time of calls through the bindings in a fresh interpreter.
+
+    :param str path: The directory containing the package.
+    :param str setup: Statements run once first (e.g., imports and inputs).
+    :param list(str) calls: The expressions to time.
+    :param int number: The number of calls in each of five repeats. The fastest is reported.
+
+    :return: The time of one call (in seconds) by expression.
+    :rtype: dict
+    """
+    cmd = [sys.executable, '-c', _calls_script, path, setup, str(number)] + list(calls)
+    out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, universal_newlines=True)
+    return json.loads(out.stdout)
+
+
+def compare_backends(work_dir, npackages=5, nmethods=10, backends=('pybind11', 'nanobind'),
+                     opt='-O2'):
+    """
+    Generate, build, and call the bindings of a synthetic corpus with each backend. The build
+    compiles the sources one at a time with the compiler used to verify them (see
+    verify_compiler in the configuration), so the times add up the work of a serial build.
+
+    :param str work_dir: The working directory.
+    :param int npackages: The number of packages in the corpus.
+    :param int nmethods: Number of extra methods per transient class.
+    :param collection(str) backends: The backends to compare.
+    :param str opt: The optimization option.
+
+    :return: The build times and extension size (see build_extension) and the time of each
+        call (in seconds) by backend.
+    :rtype: dict
+    """
+    corpus_dir = os.path.join(work_dir, 'inc')
+    write_corpus(corpus_dir, npackages, nmethods)
+
+    results = {}
+    for backend in backends:
+        src_dir = os.path.join(work_dir, backend, 'src')
+        build_dir = os.path.join(work_dir, backend, 'build')
+        if not os.path.exists(src_dir):
+            os.makedirs(src_dir)
+
+        config = make_config(corpus_dir, work_dir)
+        config.backend = backend
+        config.common_headers = [_common_headers[backend]]
+        config.verify_include_paths = [_inc_dir]
+        parser = Parser(config)
+        parser.generate_header_file(corpus_dir)
+        parser.parse()
+        generate_bindings(parser, config, src_dir, True, EventLog(quiet=True))
+
+        result = build_extension(config, src_dir, build_dir, opt)
+        result['calls'] = measure_calls(build_dir, _calls_setup, _calls)
+        results[backend] = result
+    return results
+
+
+if __name__ == '__main__':
+    npackages_, work_dir_, nmethods_ = sys.argv[1:4]
+    json.dump(run_single(int(npackages_), work_dir_, int(nmethods_)), sys.stdout)
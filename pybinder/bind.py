@@ -1,8 +1,15 @@
-def bind_function(func, fout):
+from collections import Counter
+
+from pybinder.backend import get_backend
+from pybinder.utilities import open_source_file
+
+
+def bind_function(func, fout, config):
     """
 
     :param pybinder.wrap.FunctionWrapper func:
     :param fout:
+    :param pybinder.configure.Configurator config:
 
     :return:
     """
@@ -10,6 +17,8 @@ def bind_function(func, fout):
     if func.is_excluded:
         return
 
+    backend = get_backend(config.backend)
+
     # Write source label
     line1 = '// ' + 93 * '=' + ' //\n'
     line2 = '// Function: {}\n'.format(func.register_name)
@@ -23,7 +32,7 @@ def bind_function(func, fout):
 
     # Parameters
     params = ', '.join([p.register_name for p in func.parameters])
-    args = ', '.join(['py::arg(\"{}\")'.format(p.python_name) for p in func.parameters])
+    args = ', '.join([backend.arg(p.python_name) for p in func.parameters])
 
     # Signature
     txt = '     ({} (*) ({})) &{},\n'.format(func.result_name, params, func.register_name)
@@ -33,6 +42,10 @@ def bind_function(func, fout):
     txt = '     R\"({})\"'.format(func.docs)
     fout.write(txt)
 
+    # Release the GIL while the function runs
+    if config.is_gil_released(func.module_name, '', func.register_name):
+        args = ', '.join([a for a in (args, backend.release_gil()) if a])
+
     # Write arguments
     if args:
         fout.write(',\n')
@@ -41,17 +54,20 @@ def bind_function(func, fout):
         fout.write(');\n\n')
 
 
-def bind_enum(enum, fout):
+def bind_enum(enum, fout, config):
     """
 
     :param pybinder.wrap.EnumWrapper enum:
     :param TextIO fout:
+    :param pybinder.configure.Configurator config:
 
     :return:
     """
     if enum.is_excluded:
         return
 
+    backend = get_backend(config.backend)
+
     # Write source label
     if enum.is_nested:
         label = '// Nested enum: {}\n'.format(enum.register_name)
@@ -69,18 +85,18 @@ def bind_enum(enum, fout):
     # Bind anonymous enums as integers (special case)
     if enum.is_anonymous:
         for ec in enum.constants:
-            txt = '{}.attr(\"{}\") = py::cast(int({}));\n'.format(enum.container,
-                                                                  ec.python_name,
-                                                                  ec.register_name)
+            txt = '{}.attr(\"{}\") = {};\n'.format(enum.container,
+                                                    ec.python_name,
+                                                    backend.cast('int({})'.format(ec.register_name)))
             fout.write(txt)
         fout.write('\n')
         return
 
     # Normal enum
-    txt = 'py::enum_<{}>({}, \"{}\", R\"({})\")\n'.format(enum.register_name,
-                                                          enum.container,
-                                                          enum.python_name,
-                                                          enum.docs)
+    txt = '{}({}, \"{}\", R\"({})\")\n'.format(backend.enum_type(enum.register_name),
+                                                enum.container,
+                                                enum.python_name,
+                                                enum.docs)
     fout.write(txt)
     for ec in enum.constants:
         txt = '\t.value(\"{}\", {})\n'.format(ec.python_name, ec.register_name)
@@ -100,6 +116,8 @@ def bind_class(klass, fout, config):
     if klass.is_excluded:
         return
 
+    backend = get_backend(config.backend)
+
     # Write source label
     if klass.is_nested:
         label = '// Nested class: {}\n'.format(klass.register_name)
@@ -113,9 +131,10 @@ def bind_class(klass, fout, config):
         label = line1 + line2 + line3 + line4
     fout.write(label)
 
-    # Function
+    # Function (takes the submodule if registered in order)
+    var = 'mod' if config.ordered_registration else 'main'
     if not klass.is_nested and not klass.is_template and not klass.is_alias:
-        txt = 'void bind_{}(py::module &main){{\n\n'.format(klass.python_name)
+        txt = 'void bind_{}({} &{}){{\n\n'.format(klass.python_name, backend.module_type, var)
         fout.write(txt)
 
     # Before
@@ -128,9 +147,10 @@ def bind_class(klass, fout, config):
         fout.write('\n')
 
     # Get the module
-    if not klass.is_nested and not klass.is_template and not klass.is_alias:
-        txt = 'py::module mod = main.attr(\"{}\");\n'.format(klass.module_name)
-        fout.write(txt)
+    if (not klass.is_nested and not klass.is_template and not klass.is_alias and
+            not config.ordered_registration):
+        fout.write(backend.get_module(klass.module_name))
+        fout.write('\n')
 
     # Register name to handle bases
     if klass.is_template and not klass.is_nested:
@@ -143,10 +163,9 @@ def bind_class(klass, fout, config):
         fout.write('}\n\n')
 
     # Skip is type already registered
-    if klass.is_template and not klass.is_nested:
+    if klass.is_template and not klass.is_nested and not config.ordered_registration:
         fout.write('// Skip if a base class is already registered\n')
-        txt = 'if (py::detail::get_type_handle(typeid({}), false) && is_base) {{\n'.format(
-            klass.register_name)
+        txt = 'if ({} && is_base) {{\n'.format(backend.is_registered(klass.type_name))
         fout.write(txt)
         # fout.write('\tstd::cout << "-- Skipping base type: \" << register_name << \"\\n\";\n')
         fout.write('\treturn;\n')
@@ -163,16 +182,20 @@ def bind_class(klass, fout, config):
             raise RuntimeError('Unknown base {}'.format(base.referenced_name))
 
         txt = '{}{}(mod, {}, true);\n'.format(base.template.function_name, base.parameters, name)
+        if config.ordered_registration:
+            if base.is_registered:
+                # Registered by its typedef or a class before
+                fout.write('// Already registered\n\n')
+                continue
+            if klass.is_template or base.is_shared:
+                # Depends on the template parameters or also registered by another extension
+                txt = 'if (!{}) {{\n\t{}}}\n'.format(
+                    backend.is_registered(base.base_name), txt)
         fout.write(txt)
         fout.write('\n')
 
-    # Handle
-    handle = '{}<{}>'.format(klass.handle, klass.register_name)
-
     # Bases
-    bases = ', '.join([b.base_name for b in klass.bases if not b.is_excluded])
-    if bases:
-        bases = ', ' + bases
+    bases = [b.base_name for b in klass.bases if not b.is_excluded]
 
     # TODO Trampoline base (only if included)
     # if klass.trampoline and not klass.trampoline.is_excluded:
@@ -184,13 +207,10 @@ def bind_class(klass, fout, config):
     else:
         python_name = '\"' + klass.python_name + '\"'
 
-    if klass.is_nested:
-        is_local = ', py::module_local()'
-    else:
-        is_local = ''
-    fout.write('py::class_<{}, {}{}>'.format(klass.register_name, handle, bases))
+    extras = backend.class_extras(klass.handle, klass.is_nested, klass.is_array)
+    fout.write(backend.class_type(klass.type_name, klass.handle, bases))
     fout.write('{}({}, {}, R\"({})\"{});\n'.format(klass.object_name, klass.container,
-                                                   python_name, klass.docs, is_local))
+                                                   python_name, klass.docs, extras))
 
     # Constructors
     fout.write('\n// Constructors\n')
@@ -198,22 +218,32 @@ def bind_class(klass, fout, config):
         fout.write('// Constructors not yet supported for abstract classes\n')
     else:
         for ctor in klass.constructors:
-            bind_constructor(ctor, fout)
+            bind_constructor(klass, ctor, fout, config)
 
     # Method
     fout.write('\n// Methods\n')
-    for method in klass.methods:
-        bind_method(klass, method, fout)
+    methods = klass.methods
+    if config.method_tables:
+        methods = bind_method_tables(klass, methods, fout, config)
+    for method in methods:
+        bind_method(klass, method, fout, config)
+
+    # Awaitable companions
+    bind_async_methods(klass, fout, config)
 
     # Iterator
     if klass.is_iterator:
-        bind_class_iterator(klass, fout)
+        bind_class_iterator(klass, fout, config)
+
+    # Buffer protocol and bulk constructors
+    if klass.is_array:
+        bind_class_array(klass, fout, config)
 
     # Nested enums
     if klass.nested_enums:
         fout.write('\n')
     for enum in klass.nested_enums:
-        bind_enum(enum, fout)
+        bind_enum(enum, fout, config)
 
     # Nested classes
     if klass.nested_classes:
@@ -226,16 +256,19 @@ def bind_class(klass, fout, config):
         fout.write('}\n\n')
 
 
-def bind_typedef(typedef, fout):
+def bind_typedef(typedef, fout, config):
     """
 
     :param pybinder.wrap.TypedefWrapper typedef:
     :param fout:
+    :param pybinder.configure.Configurator config:
     :return:
     """
     if typedef.is_excluded or typedef.is_alias:
         return
 
+    backend = get_backend(config.backend)
+
     # Write source label
     line1 = '// ' + 93 * '=' + ' //\n'
     line2 = '// Typedef: {}\n'.format(typedef.register_name)
@@ -245,12 +278,16 @@ def bind_typedef(typedef, fout):
     fout.write(label)
 
     # Function
-    txt = 'void bind_{}(py::module &main){{\n\n'.format(typedef.python_name)
-    fout.write(txt)
+    if config.ordered_registration:
+        txt = 'void bind_{}({} &mod){{\n\n'.format(typedef.python_name, backend.module_type)
+        fout.write(txt)
+    else:
+        txt = 'void bind_{}({} &main){{\n\n'.format(typedef.python_name, backend.module_type)
+        fout.write(txt)
 
-    # Get the module
-    txt = 'py::module mod = main.attr(\"{}\");\n'.format(typedef.module_name)
-    fout.write(txt)
+        # Get the module
+        fout.write(backend.get_module(typedef.module_name))
+        fout.write('\n')
 
     if not typedef.is_templated:
         msg = 'Non-templated typedef encountered: {}'.format(typedef.register_name)
@@ -276,9 +313,20 @@ def bind_class_template(output_dir, template, config):
         return
 
     # Open a new file for writing
-    fdir = '/'.join([output_dir, template.source_name])
-    fout = open(fdir, 'w')
+    fout = open_source_file(output_dir, template.source_name)
+    write_class_template(template, fout, config)
+    fout.close()
+
 
+def write_class_template(template, fout, config):
+    """
+
+    :param pybinder.wrap.ClassTemplateWrapper template:
+    :param fout:
+    :param pybinder.configure.Configurator config:
+
+    :return:
+    """
     # Preamble
     fout.write(config.preamble)
 
@@ -299,7 +347,7 @@ def bind_class_template(output_dir, template, config):
     # Extra includes
     if template.extra_includes:
         fout.write('// Extra includes\n')
-        for h in template.extra_includes:
+        for h in sorted(set(template.extra_includes)):
             fout.write('#include <{}>\n'.format(h))
         fout.write('\n')
 
@@ -309,8 +357,6 @@ def bind_class_template(output_dir, template, config):
 
     bind_template(template, fout, config)
 
-    fout.close()
-
 
 def bind_template(template, fout, config):
     """
@@ -341,7 +387,8 @@ def bind_template(template, fout, config):
     fout.write(txt)
 
     # Template function
-    args = 'py::module &mod, std::string const &name, bool const is_base=false'
+    backend = get_backend(config.backend)
+    args = '{} &mod, std::string const &name, bool const is_base=false'.format(backend.module_type)
     fout.write('void {}({}){{\n\n'.format(template.function_name, args))
 
     # Generate the class
@@ -352,40 +399,49 @@ def bind_template(template, fout, config):
         bind_template(ntemplate, fout, config)
 
 
-def bind_constructor(ctor, fout):
+def bind_constructor(klass, ctor, fout, config):
     """
 
+    :param pybinder.wrap.ClassWrapper klass:
     :param pybinder.wrap.ConstructorWrapper ctor:
     :param fout:
+    :param pybinder.configure.Configurator config:
     :return:
     """
     if ctor.is_excluded:
         return
 
-    params = ', '.join([p.register_name for p in ctor.parameters])
+    backend = get_backend(config.backend)
 
     args = ', '
     for p in ctor.parameters:
         dval = ''
         if p.default_value:
             dval = '={}'.format(p.default_value)
-        args += 'py::arg(\"{}\")'.format(p.spelling) + dval + ', '
+        args += backend.arg(p.spelling) + dval + ', '
+
+    # Release the GIL while the constructor runs
+    if is_gil_released(klass, ctor, config):
+        args += backend.release_gil() + ', '
 
-    fout.write('{}.def(py::init<{}>(){}R\"({})\");\n'.format(ctor.object_name,
-                                                             params, args, ctor.docs))
+    fout.write('{}.def({}{}R\"({})\");\n'.format(ctor.object_name, backend.init(klass, ctor),
+                                                 args, ctor.docs))
 
 
-def bind_method(klass, method, fout):
+def bind_method(klass, method, fout, config):
     """
 
     :param pybinder.wrap.ClassWrapper klass:
     :param pybinder.wrap.MethodWrapper method:
     :param fout:
+    :param pybinder.configure.Configurator config:
     :return:
     """
     if method.is_excluded:
         return
 
+    backend = get_backend(config.backend)
+
     static = ''
     prefix = '{}::*'.format(klass.register_name)
     if method.is_static:
@@ -399,7 +455,11 @@ def bind_method(klass, method, fout):
         dval = ''
         if p.default_value:
             dval = '={}'.format(p.default_value)
-        args += 'py::arg(\"{}\")'.format(p.spelling) + dval + ', '
+        args += backend.arg(p.spelling) + dval + ', '
+
+    # Release the GIL while the method runs
+    if is_gil_released(klass, method, config):
+        args += backend.release_gil() + ', '
 
     const = ''
     if method.is_const:
@@ -418,19 +478,191 @@ def bind_method(klass, method, fout):
                                                                      method.docs))
 
 
-def bind_class_iterator(klass, fout):
+def is_gil_released(klass, item, config):
+    """
+    Check if the GIL is released while a method or constructor runs. It is always released by the
+    methods with an awaitable companion.
+
+    :param pybinder.wrap.ClassWrapper klass:
+    :param item: The method or constructor.
+    :param pybinder.configure.Configurator config:
+
+    :return: True if the GIL is released.
+    :rtype: bool
+    """
+    if item.is_class_method and item.is_async:
+        return True
+    return config.is_gil_released(klass.module_name, item.semantic_parent.qualified_displayname,
+                                  item.spelling)
+
+
+def bind_async_methods(klass, fout, config):
+    """
+    Bind an awaitable "<name>_async" companion for each method name with an async method. The
+    companion runs the method in the default executor of the running event loop. If every overload
+    of the method takes a Message_ProgressRange of the same name then cancelling the returned
+    future stops it. Otherwise no progress argument is passed, since it would make the calls
+    meant for the other overloads fail.
+
+    :param pybinder.wrap.ClassWrapper klass:
+    :param fout:
+    :param pybinder.configure.Configurator config:
+
+    :return: None.
+    """
+    names = []
+    static = {}
+    for method in klass.methods:
+        if method.is_excluded or not method.is_async:
+            continue
+        if method.python_name not in names:
+            names.append(method.python_name)
+        static[method.python_name] = method.is_static
+
+    if not names:
+        return
+
+    # Progress parameter of each overload bound under the name of a companion
+    progress = {}
+    for method in klass.methods:
+        if method.is_excluded or method.python_name not in static:
+            continue
+        found = [p.spelling for p in method.parameters
+                 if 'Message_ProgressRange' in p.register_name]
+        progress.setdefault(method.python_name, set()).add(found[0] if found else None)
+
+    fout.write('\n// Awaitable companions\n')
+    for name in names:
+        arg = 'nullptr'
+        if len(progress[name]) == 1 and None not in progress[name]:
+            arg = '\"{}\"'.format(list(progress[name])[0])
+        fout.write('bind_async({}, \"{}_async\", \"{}\", {}, {});\n'.format(
+            klass.object_name, name, name, arg, 'true' if static[name] else 'false'))
+
+
+def method_signature(klass, method):
+    """
+
+    :param pybinder.wrap.ClassWrapper klass:
+    :param pybinder.wrap.MethodWrapper method:
+
+    :return: The method pointer type with "{}" in place of the declarator name.
+    :rtype: str
+    """
+    prefix = '{}::*'.format(klass.register_name)
+    if method.is_static:
+        prefix = '*'
+
+    const = ''
+    if method.is_const:
+        const = ' const'
+
+    params = ', '.join([p.register_name for p in method.parameters])
+    return '{} ({}{{}})({}){}'.format(method.result_name, prefix, params, const)
+
+
+def bind_method_tables(klass, methods, fout, config):
     """
+    Bind the methods that share a signature from a static table and a loop so the binding code is
+    written once per signature instead of once per method. Each signature still instantiates
+    "def" once, as before. Methods with default arguments are not put in a table and neither are
+    overloaded methods, since their overloads must be registered in declaration order.
 
     :param pybinder.wrap.ClassWrapper klass:
+    :param list(pybinder.wrap.MethodWrapper) methods:
     :param fout:
+    :param pybinder.configure.Configurator config:
+
+    :return: The methods that were not bound and still need :func:`bind_method`.
+    :rtype: list(pybinder.wrap.MethodWrapper)
+    """
+    backend = get_backend(config.backend)
+
+    # Names bound more than once
+    names = Counter([m.python_name for m in methods if not m.is_excluded])
+
+    # Group by signature
+    groups = {}
+    order = []
+    for method in methods:
+        if method.is_excluded or any([p.default_value for p in method.parameters]):
+            continue
+        if names[method.python_name] > 1:
+            continue
+        if is_gil_released(klass, method, config):
+            continue
+        signature = method_signature(klass, method)
+        if signature not in groups:
+            groups[signature] = []
+            order.append(signature)
+        groups[signature].append(method)
+
+    tabled = set()
+    for signature in order:
+        group = groups[signature]
+        if len(group) < 2:
+            continue
+        tabled.update([id(m) for m in group])
+
+        nargs = len(group[0].parameters)
+        fout.write('{\n')
+        fout.write('struct entry {{ const char *name; {}; const char *doc;'.format(
+            signature.format('ptr')))
+        if nargs:
+            fout.write(' const char *args[{}];'.format(nargs))
+        fout.write(' };\n')
+        fout.write('static const entry methods[] = {\n')
+        for method in group:
+            args = ''
+            if nargs:
+                arg_names = ', '.join(['\"{}\"'.format(p.spelling) for p in method.parameters])
+                args = ', {{{}}}'.format(arg_names)
+            fout.write('\t{{\"{}\", &{}, R\"({})\"{}}},\n'.format(method.python_name,
+                                                                method.register_name,
+                                                                method.docs, args))
+        fout.write('};\n')
+
+        static = ''
+        if group[0].is_static:
+            static = '_static'
+        args = ''.join([', ' + backend.arg_value('m.args[{}]'.format(i)) for i in range(nargs)])
+        fout.write('for (auto const &m : methods)\n')
+        fout.write('\t{}.def{}(m.name, m.ptr, m.doc{});\n'.format(klass.object_name, static, args))
+        fout.write('}\n')
+
+    return [m for m in methods if id(m) not in tabled]
+
+
+def bind_class_iterator(klass, fout, config):
+    """
+
+    :param pybinder.wrap.ClassWrapper klass:
+    :param fout:
+    :param pybinder.configure.Configurator config:
     :return:
     """
+    backend = get_backend(config.backend)
 
-    txt = '{}.def(\"__iter__\", [](const {}& self) {{return py::make_iterator(self.begin(), self.end());}}, {}());\n'.format(
-        klass.object_name, klass.register_name, klass.keep_alive)
+    txt = '{}.def(\"__iter__\", [](const {}& self) {{return {};}}, {});\n'.format(
+        klass.object_name, klass.type_name, backend.make_iterator(klass),
+        backend.keep_alive(*klass.keep_alive))
     fout.write(txt)
 
 
+def bind_class_array(klass, fout, config):
+    """
+    Expose the items of an array class template through the buffer protocol and bind a
+    constructor from a buffer with the helpers of the backend array header.
+
+    :param pybinder.wrap.ClassWrapper klass: The class template.
+    :param fout:
+    :param pybinder.configure.Configurator config:
+
+    :return: None.
+    """
+    fout.write('bind_array({});\n'.format(klass.object_name))
+
+
 def bind_trampoline_class(tclass, fout):
     """
 
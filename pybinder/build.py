@@ -0,0 +1,275 @@
+import math
+import os
+import re
+from collections import Counter
+
+from pybinder.utilities import open_source_file
+
+__all__ = ['estimate_cost', 'shard_types', 'pack_sources', 'write_unity_source', 'read_includes',
+           'select_pch_headers', 'write_pch', 'write_source_list']
+
+_include_re = re.compile(r'^#include\s*([<"])([^>"]+)[>"]', re.MULTILINE)
+
+
+def estimate_cost(cursor, templates):
+    """
+    Estimate the compile cost of binding a cursor as the number of bound entities (constructors,
+    methods, fields, enum values, and functions). Typedefs of class templates are charged the cost
+    of the instantiated template.
+
+    :param pybinder.wrap.CursorWrapper cursor: The cursor.
+    :param dict templates: The registered class templates.
+
+    :return: The estimated cost.
+    :rtype: int
+    """
+    if cursor.is_excluded:
+        return 0
+
+    if cursor.is_enum_decl:
+        return 1 + len(cursor.constants)
+
+    if cursor.is_function_decl:
+        return 1
+
+    if cursor.is_typedef_decl:
+        if cursor.is_alias or not cursor.is_templated:
+            return 1
+        template = templates.get(cursor.underlying_template_name)
+        if template is None:
+            return 1
+        return 1 + estimate_cost(template.klass, templates)
+
+    cost = 1
+    for items in (cursor.constructors, cursor.methods, cursor.fields):
+        cost += len([c for c in items if not c.is_excluded])
+    for nenum in cursor.nested_enums:
+        cost += estimate_cost(nenum, templates)
+    for nklass in cursor.nested_classes:
+        cost += estimate_cost(nklass, templates)
+    return cost
+
+
+def shard_types(types, costs, target):
+    """
+    Split the types of a module into contiguous shards of roughly equal cost.
+
+    :param list(pybinder.wrap.CursorWrapper) types: The types in binding order.
+    :param list(int) costs: The cost of each type.
+    :param int target: The target cost per shard.
+
+    :return: The shards.
+    :rtype: list(list(pybinder.wrap.CursorWrapper))
+    """
+    total = sum(costs)
+    nshards = max(1, int(math.ceil(total / float(target))))
+    if nshards == 1:
+        return [list(types)]
+
+    # Cut whenever the running cost passes the next equal share of the total
+    shards = [[]]
+    running = 0
+    for type_, cost in zip(types, costs):
+        share = total * len(shards) / float(nshards)
+        if running >= share and shards[-1] and len(shards) < nshards:
+            shards.append([])
+        shards[-1].append(type_)
+        running += cost
+    return shards
+
+
+def pack_sources(sources, target):
+    """
+    Group consecutive small sources into batches whose total cost does not exceed the target.
+
+    :param list(tuple(str, int)) sources: The source file names and their costs.
+    :param int target: The target cost per batch.
+
+    :return: The batches of source file names.
+    :rtype: list(list(str))
+    """
+    batches = []
+    current = []
+    current_cost = 0
+    for fname, cost in sources:
+        if current and current_cost + cost > target:
+            batches.append(current)
+            current = []
+            current_cost = 0
+        current.append(fname)
+        current_cost += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def write_unity_source(output_dir, fname, sources, config):
+    """
+    Write a source file that compiles several generated sources as one translation unit.
+
+    :param str output_dir: The output directory.
+    :param str fname: The name of the unity source.
+    :param list(str) sources: The generated sources to include.
+    :param pybinder.configure.Configurator config:
+
+    :return: None.
+    """
+    fout = open_source_file(output_dir, fname)
+    fout.write(config.preamble)
+    fout.write('// Unity batch\n')
+    for src in sources:
+        fout.write('#include \"{}\"\n'.format(src))
+    fout.close()
+
+
+def read_includes(output_dir, fname):
+    """
+    Read the headers a generated source includes. Generated sources included by a unity source
+    are followed.
+
+    :param str output_dir: The output directory.
+    :param str fname: The source file name.
+
+    :return: The included headers in order.
+    :rtype: list(str)
+    """
+    with open(os.path.join(output_dir, fname)) as fin:
+        txt = fin.read()
+
+    headers = []
+    for delim, name in _include_re.findall(txt):
+        if delim == '"' and name.endswith('.cxx'):
+            names = read_includes(output_dir, name)
+        else:
+            names = [name]
+        for h in names:
+            if h not in headers:
+                headers.append(h)
+    return headers
+
+
+def select_pch_headers(includes, fraction, common_headers):
+    """
+    Select the headers for a precompiled header. These are the common headers followed by the
+    headers included by at least the given fraction of the sources.
+
+    :param dict includes: The included headers of each source.
+    :param float fraction: The fraction of sources that must include a header.
+    :param list(str) common_headers: The headers included by every source.
+
+    :return: The headers in include order.
+    :rtype: list(str)
+    """
+    counts = Counter()
+    order = []
+    for fname in sorted(includes):
+        for h in includes[fname]:
+            counts[h] += 1
+            if h not in order:
+                order.append(h)
+
+    threshold = fraction * len(includes)
+    headers = list(common_headers)
+    for h in order:
+        if h not in headers and counts[h] >= threshold:
+            headers.append(h)
+    return headers
+
+
+def write_pch(output_dir, headers, config):
+    """
+    Write the header to precompile.
+
+    :param str output_dir: The output directory.
+    :param list(str) headers: The headers to include.
+    :param pybinder.configure.Configurator config:
+
+    :return: None.
+    """
+    fout = open_source_file(output_dir, 'pch.hxx')
+    fout.write(config.preamble)
+    fout.write('#pragma once\n\n')
+    fout.write('// Headers included by most sources\n')
+    for h in headers:
+        fout.write('#include <{}>\n'.format(h))
+    fout.close()
+
+
+def write_source_list(output_dir, sources, heavy=None, heavy_jobs=0, pch=False, extensions=None,
+                      tiers=None, stable_abi='', no_pch=None, subinterpreters=False):
+    """
+    Write the list of sources to compile as a CMake file to include instead of globbing.
+
+    :param str output_dir: The output directory.
+    :param list(str) sources: The source file names.
+    :param list(str) heavy: The sources to compile in a job pool of limited size.
+    :param int heavy_jobs: The size of the job pool for the heavy sources.
+    :param bool pch: Whether the sources use the precompiled "pch.hxx".
+    :param collections.OrderedDict extensions: The sources of each extension module if the
+        bindings are split into several extensions. These lists include the heavy sources.
+    :param dict tiers: The sources of each optimization tier other than the default one.
+    :param str stable_abi: The Python version whose limited C API the sources target, if any.
+    :param list(str) no_pch: The sources to compile without the precompiled header.
+    :param bool subinterpreters: Whether the modules are declared usable in subinterpreters.
+
+    :return: None.
+    """
+    if heavy is None:
+        heavy = []
+
+    fout = open_source_file(output_dir, 'sources.cmake')
+    fout.write('# Generated by pybinder. Do not edit.\n')
+    fout.write('set(SRCS\n')
+    for src in sources:
+        if src in heavy:
+            continue
+        if extensions and any([src in srcs for srcs in extensions.values()]):
+            continue
+        fout.write('    ${{CMAKE_CURRENT_LIST_DIR}}/{}\n'.format(src))
+    fout.write(')\n')
+
+    if extensions:
+        fout.write('\n# Extension modules of the OCCT package and their sources\n')
+        fout.write('set(EXTENSIONS {})\n'.format(' '.join(extensions)))
+        for ext, srcs in extensions.items():
+            fout.write('set(SRCS{}\n'.format(ext))
+            for src in srcs:
+                fout.write('    ${{CMAKE_CURRENT_LIST_DIR}}/{}\n'.format(src))
+            fout.write(')\n')
+        fout.write('set(LOADER ${CMAKE_CURRENT_LIST_DIR}/__init__.py)\n')
+
+    if heavy:
+        fout.write('\n# Sources whose measured peak memory limits how many can compile at once\n')
+        fout.write('set(HEAVY_SRCS\n')
+        for src in heavy:
+            fout.write('    ${{CMAKE_CURRENT_LIST_DIR}}/{}\n'.format(src))
+        fout.write(')\n')
+        fout.write('set(HEAVY_JOBS {})\n'.format(heavy_jobs))
+
+    if tiers:
+        fout.write('\n# Sources compiled with the options of their optimization tier\n')
+        fout.write('set(TIERS {})\n'.format(' '.join(sorted(tiers))))
+        for tier in sorted(tiers):
+            fout.write('set(TIER_{}\n'.format(tier))
+            for src in tiers[tier]:
+                fout.write('    ${{CMAKE_CURRENT_LIST_DIR}}/{}\n'.format(src))
+            fout.write(')\n')
+
+    if stable_abi:
+        fout.write('\n# Python version whose limited C API the sources target\n')
+        fout.write('set(STABLE_ABI {})\n'.format(stable_abi))
+
+    if subinterpreters:
+        fout.write('\n# Modules declared usable in subinterpreters with their own GIL\n')
+        fout.write('set(MULTIPLE_INTERPRETERS ON)\n')
+
+    if pch:
+        fout.write('\n# Header to precompile for all sources\n')
+        fout.write('set(PCH_HEADER ${CMAKE_CURRENT_LIST_DIR}/pch.hxx)\n')
+        if no_pch:
+            fout.write('\n# Sources whose manually specified includes come before the others\n')
+            fout.write('set(NO_PCH_SRCS\n')
+            for src in no_pch:
+                fout.write('    ${{CMAKE_CURRENT_LIST_DIR}}/{}\n'.format(src))
+            fout.write(')\n')
+    fout.close()
@@ -0,0 +1,120 @@
+import os
+import re
+
+from pybinder.backend import get_backend
+
+__all__ = ['check_concurrency', 'find_shared_state', 'audit_sources']
+
+_string_re = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+_static_re = re.compile(r'^\s*static\s+(?!const\b|constexpr\b|inline\b)'
+                        r'[^(=;{]+?\s*(=|;|\{|\[)')
+_object_re = re.compile(r'^\s*(?:py::module_?|nb::module_|py::object|nb::object|py::handle|'
+                        r'nb::handle)\s+\w+\s*(=|;|\{)')
+
+# Holders whose reference count is atomic (the OCCT one for Standard_Transient types) or that
+# have no shared count at all
+_atomic_holders = ('opencascade::handle', 'shared_ptr', 'shared_ptr_nodelete', 'std::shared_ptr',
+                   'unique_ptr', 'std::unique_ptr')
+
+
+def check_concurrency(model, config, log):
+    """
+    Check that the modules can be declared usable without the GIL and in subinterpreters with
+    their own GIL. The holders of the bound classes must have atomic reference counts and the
+    generated code must not keep state shared by all threads and interpreters. The iterators
+    returned by "__iter__" keep their container alive through the keep alive list of the binding
+    library, which is per interpreter and locked on free-threaded builds, but an iterator itself
+    must not be advanced from several threads at once.
+
+    :param pybinder.generate.Model model:
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return: None.
+
+    :raise RuntimeError: If the backend or other options cannot be used with the requested mode.
+    """
+    backend = get_backend(config.backend)
+
+    reasons = []
+    if config.subinterpreters and backend.subinterpreter_option is None:
+        reasons.append('{} cannot be loaded in subinterpreters'.format(backend.name))
+    if config.free_threaded and config.stable_abi:
+        reasons.append('the limited C API is not available on free-threaded Python')
+    if config.lazy_types:
+        reasons.append('lazy types keep the state of the bound types in a static table')
+    if reasons:
+        reason = ', '.join(reasons)
+        log.emit('unsupported_concurrency', 'OCCT', reason=reason)
+        msg = 'Free-threaded or subinterpreter modules requested: {}'.format(reason)
+        raise RuntimeError(msg)
+
+    holders = {}
+    iterators = 0
+    klasses = list(model.ordered_classes)
+    for name in sorted(model.registered_templates):
+        klasses.append(model.registered_templates[name].klass)
+    for klass in klasses:
+        if klass.is_excluded:
+            continue
+        holders[klass.handle] = holders.get(klass.handle, 0) + 1
+        iterators += int(klass.is_iterator)
+        if klass.handle not in _atomic_holders:
+            log.emit('shared_state', klass.register_name, klass.module_name,
+                     '{} holder may not count references atomically'.format(klass.handle))
+
+    log.emit('concurrency', 'OCCT', reason='declared modes',
+             free_threaded=config.free_threaded, subinterpreters=config.subinterpreters,
+             holders=holders, iterators=iterators)
+
+
+def find_shared_state(txt):
+    """
+    Find the statements of a generated source that keep state shared by all threads and
+    interpreters: static variables that are not constant and module or object handles declared
+    outside of a function.
+
+    :param str txt: The source.
+
+    :return: The line number (starting at 1) and statement of each one found.
+    :rtype: list(tuple(int, str))
+    """
+    found = []
+    depth = 0
+    for i, line in enumerate(txt.splitlines()):
+        code = _string_re.sub('""', line).split('//')[0]
+        if _static_re.match(code) or (depth == 0 and _object_re.match(code)):
+            found.append((i + 1, line.strip()))
+        depth += code.count('{') - code.count('}')
+    return found
+
+
+def audit_sources(path, sources, config, log):
+    """
+    Audit the generated sources for state shared by all threads and interpreters before they are
+    declared usable without the GIL or in subinterpreters.
+
+    :param str path: The output directory.
+    :param list(str) sources: The source and template header file names.
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return: The source, line number, and statement of each one found.
+    :rtype: list(tuple(str, int, str))
+
+    :raise RuntimeError: If shared state is found in a module declared free-threaded or usable in
+        subinterpreters.
+    """
+    found = []
+    for src in sources:
+        with open(os.path.join(path, src)) as fin:
+            txt = fin.read()
+        for lineno, statement in find_shared_state(txt):
+            log.emit('shared_state', statement, src, 'static or global state', line=lineno)
+            found.append((src, lineno, statement))
+
+    if found and (config.free_threaded or config.subinterpreters):
+        msg = 'State shared by all threads and interpreters found in {} statement(s), ' \
+              'first in {} line {}: {}'.format(len(found), *found[0])
+        raise RuntimeError(msg)
+    return found
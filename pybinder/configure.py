@@ -30,7 +30,43 @@ class Configurator(object):
         self.excluded_headers = []
 
         # Bind
+        self.backend = 'pybind11'
+        self.stable_abi = ''
         self.common_headers = []
+        self.source_cost = 0
+        self.explicit_instantiation = True
+        self.minimal_includes = False
+        self.full_includes = []
+        self.method_tables = False
+        self.split_extensions = False
+        self.usage_profile = []
+        self.lazy_types = False
+        self.ordered_registration = False
+        self.import_profile = False
+        self.release_gil = []
+        self.async_methods = []
+        self.free_threaded = False
+        self.subinterpreters = False
+        self.array_templates = []
+
+        # Extensions
+        self.extensions = {}
+
+        # Build
+        self.compile_costs = []
+        self.cost_report = ''
+        self.report_classes = 20
+        self.memory_mb = 16384
+        self.heavy_rss_mb = 2048
+        self.pch_fraction = 0.5
+        self.tiers = {}
+        self.tier_profile = []
+        self.profile_tier = 'hot'
+        self.verify = False
+        self.verify_compiler = ''
+        self.verify_args = []
+        self.verify_include_paths = []
+        self.verify_jobs = 0
 
         # Exclude
         self.excluded_classes = []
@@ -76,7 +112,47 @@ class Configurator(object):
         config.excluded_headers = data['Parse']['excluded_headers']
 
         # Bind
+        config.backend = data['Bind'].get('backend', config.backend)
+        config.stable_abi = data['Bind'].get('stable_abi', config.stable_abi)
         config.common_headers = data['Bind']['common_headers']
+        config.source_cost = data['Bind'].get('source_cost', config.source_cost)
+        config.explicit_instantiation = data['Bind'].get('explicit_instantiation',
+                                                         config.explicit_instantiation)
+        config.minimal_includes = data['Bind'].get('minimal_includes', config.minimal_includes)
+        config.full_includes = data['Bind'].get('full_includes', config.full_includes)
+        config.method_tables = data['Bind'].get('method_tables', config.method_tables)
+        config.split_extensions = data['Bind'].get('split_extensions', config.split_extensions)
+        config.usage_profile = data['Bind'].get('usage_profile', config.usage_profile)
+        config.lazy_types = data['Bind'].get('lazy_types', config.lazy_types)
+        config.ordered_registration = data['Bind'].get('ordered_registration',
+                                                       config.ordered_registration)
+        config.import_profile = data['Bind'].get('import_profile', config.import_profile)
+        config.release_gil = data['Bind'].get('release_gil', config.release_gil)
+        config.async_methods = data['Bind'].get('async_methods', config.async_methods)
+        config.free_threaded = data['Bind'].get('free_threaded', config.free_threaded)
+        config.subinterpreters = data['Bind'].get('subinterpreters', config.subinterpreters)
+        config.array_templates = data['Bind'].get('array_templates', config.array_templates)
+
+        # Extensions
+        config.extensions = data.get('Extensions', config.extensions)
+
+        # Build
+        build = data.get('Build', {})
+        config.compile_costs = build.get('compile_costs', config.compile_costs)
+        config.cost_report = build.get('cost_report', config.cost_report)
+        config.report_classes = build.get('report_classes', config.report_classes)
+        config.memory_mb = build.get('memory_mb', config.memory_mb)
+        config.heavy_rss_mb = build.get('heavy_rss_mb', config.heavy_rss_mb)
+        config.pch_fraction = build.get('pch_fraction', config.pch_fraction)
+        config.tiers = build.get('tiers', config.tiers)
+        config.tier_profile = build.get('tier_profile', config.tier_profile)
+        config.profile_tier = build.get('profile_tier', config.profile_tier)
+        config.verify = build.get('verify', config.verify)
+        config.verify_compiler = build.get('verify_compiler', config.verify_compiler)
+        config.verify_args = build.get('verify_args', config.verify_args)
+        config.verify_include_paths = build.get('verify_include_paths',
+                                                config.verify_include_paths)
+        config.verify_jobs = build.get('verify_jobs', config.verify_jobs)
 
         # Exclude
         config.excluded_classes = data['Exclude']['classes']
@@ -90,8 +166,31 @@ class Configurator(object):
         # Class data
         config.classes = data['Classes']
 
+        # Exclusions kept in other files
+        for exclusions_fn in data['Exclude'].get('files', []):
+            exclusions_fn = os.path.join(os.path.dirname(fn), exclusions_fn)
+            if os.path.exists(exclusions_fn):
+                config.add_exclusions(exclusions_fn)
+
         return config
 
+    def add_exclusions(self, fn):
+        """
+        Add the exclusions of a toml file with [Modules] and [Classes] tables like the ones in the
+        configuration file (e.g., written by :func:`pybinder.exclude.write_exclusions`).
+
+        :param str fn: The file.
+
+        :return: None.
+        """
+        data = toml.load(fn)
+        for table, items in (('Modules', self.modules), ('Classes', self.classes)):
+            for name, lists in data.get(table, {}).items():
+                item = items.setdefault(name, {})
+                for key, values in lists.items():
+                    item[key] = item.get(key, []) + [v for v in values
+                                                     if v not in item.get(key, [])]
+
     def add_include_paths(self, *args):
         """
         Add include paths for parsing headers.
@@ -175,6 +274,22 @@ class Configurator(object):
         except KeyError:
             return False
 
+    def get_module_tier(self, mod):
+        """
+        Get the optimization tier of a module from the first tier (by name) with a matching
+        pattern.
+
+        :param str mod: The module.
+
+        :return: The tier or an empty string for the default tier.
+        :rtype: str
+        """
+        for tier in sorted(self.tiers):
+            for pattern in self.tiers[tier]:
+                if fnmatch.fnmatch(mod, pattern):
+                    return tier
+        return ''
+
     def is_excluded_method(self, klass, method):
         """
 
@@ -205,6 +320,62 @@ class Configurator(object):
         except KeyError:
             return False
 
+    def _matches(self, key, patterns, mod, klass, name):
+        """
+        Check a name against global patterns and the patterns of a key in the module and class
+        data. The global and module patterns match "<class>::<name>" (or only the name of a
+        function) and the class patterns match the name.
+        """
+        qname = '{}::{}'.format(klass, name) if klass else name
+
+        # Global check
+        for pattern in patterns:
+            if fnmatch.fnmatch(qname, pattern):
+                return True
+
+        # Module check
+        for pattern in self.modules.get(mod, {}).get(key, []):
+            if fnmatch.fnmatch(qname, pattern):
+                return True
+
+        # Class check
+        if not klass:
+            return False
+        for pattern in self.classes.get(klass, {}).get(key, []):
+            if fnmatch.fnmatch(name, pattern):
+                return True
+        return False
+
+    def is_gil_released(self, mod, klass, name):
+        """
+        Check if the GIL is released while a function, method, or constructor runs. The global
+        patterns and the patterns of the module match "<class>::<name>" (or only the name of a
+        function) and the patterns of the class match the name. A constructor is named like its
+        class.
+
+        :param str mod: The module.
+        :param str klass: The class or an empty string for a function.
+        :param str name: The function, method, or constructor name.
+
+        :return: True if the GIL is released.
+        :rtype: bool
+        """
+        return self._matches('release_gil', self.release_gil, mod, klass, name)
+
+    def is_async_method(self, mod, klass, name):
+        """
+        Check if a method gets an awaitable "<name>_async" companion. The patterns are matched
+        like the ones of :meth:`is_gil_released`.
+
+        :param str mod: The module.
+        :param str klass: The class.
+        :param str name: The method name.
+
+        :return: True if the method gets a companion.
+        :rtype: bool
+        """
+        return self._matches('async_methods', self.async_methods, mod, klass, name)
+
     def is_excluded_typedef(self, mod, typedef):
         """
 
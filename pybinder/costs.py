@@ -0,0 +1,346 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from pybinder.build import estimate_cost
+
+__all__ = ['CompileCosts', 'attribute_costs', 'plan_job_pools', 'record_compile']
+
+# Source extensions of generated translation units
+_source_ext = ('.cxx',)
+
+# Object file extensions that follow the source name (e.g., "Pkg.cxx.o")
+_object_ext = ('.o', '.obj', '.json')
+
+_bind_re = re.compile(r'\bbind_(\w+)')
+_token_re = re.compile(r'[A-Za-z_]\w*')
+
+# Time trace events that name the entity they are spent on
+_trace_events = {'Source', 'ParseClass', 'InstantiateClass', 'InstantiateFunction',
+                 'CodeGen Function', 'OptFunction', 'RunPass', 'DebugType'}
+
+
+def _source_name(path):
+    """
+    :param str path: A source, object, or time trace file path.
+
+    :return: The base name of the source it was compiled from.
+    :rtype: str
+    """
+    name = os.path.basename(path)
+    while name.endswith(_object_ext):
+        name = os.path.splitext(name)[0]
+    return name
+
+
+class CompileCosts(object):
+    """
+    Measured compile costs of the generated sources from a previous build.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.peak_rss = {}
+        self.traces = {}
+
+    @classmethod
+    def load(cls, *paths):
+        """
+        Load measurements from ".ninja_log" files, compile records written by
+        :func:`record_compile`, and clang "-ftime-trace" files. Directories are searched
+        recursively.
+
+        :param str paths: The files or directories.
+
+        :return: The measurements.
+        :rtype: pybinder.costs.CompileCosts
+        """
+        costs = cls()
+        for path in paths:
+            if os.path.isdir(path):
+                for root, _, files in os.walk(path):
+                    for fn in sorted(files):
+                        costs.read(os.path.join(root, fn))
+            else:
+                costs.read(path)
+        return costs
+
+    def read(self, fn):
+        """
+        Read a measurement file based on its name.
+
+        :param str fn: The file.
+
+        :return: None.
+        """
+        name = os.path.basename(fn)
+        if name == '.ninja_log':
+            self.read_ninja_log(fn)
+        elif name.endswith('.jsonl'):
+            self.read_records(fn)
+        elif name.endswith('.json') and _source_name(name).endswith(_source_ext):
+            self.read_time_trace(fn)
+
+    def read_ninja_log(self, fn):
+        """
+        Read the compile time of each object from a ninja log. Later entries replace earlier
+        ones.
+
+        :param str fn: The ".ninja_log" file.
+
+        :return: None.
+        """
+        with open(fn) as fin:
+            for line in fin:
+                if line.startswith('#'):
+                    continue
+                fields = line.rstrip('\n').split('\t')
+                if len(fields) < 4:
+                    continue
+                src = _source_name(fields[3])
+                if not src.endswith(_source_ext):
+                    continue
+                self.seconds[src] = (int(fields[1]) - int(fields[0])) / 1000.
+
+    def read_records(self, fn):
+        """
+        Read compile records written by :func:`record_compile`.
+
+        :param str fn: The JSON lines file.
+
+        :return: None.
+        """
+        with open(fn) as fin:
+            for line in fin:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                src = _source_name(record['source'])
+                self.seconds[src] = record['seconds']
+                if record.get('peak_rss'):
+                    self.peak_rss[src] = record['peak_rss']
+
+    def read_time_trace(self, fn):
+        """
+        Read the events of a clang "-ftime-trace" file.
+
+        :param str fn: The trace file.
+
+        :return: None.
+        """
+        with open(fn) as fin:
+            data = json.load(fin)
+
+        src = _source_name(fn)
+        events = []
+        for event in data.get('traceEvents', []):
+            if event.get('ph') != 'X':
+                continue
+            if event['name'] == 'Total ExecuteCompiler':
+                self.seconds.setdefault(src, event['dur'] / 1.e6)
+            if event['name'] not in _trace_events:
+                continue
+            detail = event.get('args', {}).get('detail', '')
+            if detail:
+                events.append((event.get('tid', 0), event['ts'], event['dur'], event['name'],
+                               detail))
+        events.sort()
+        self.traces[src] = events
+
+    def parse_seconds(self, headers):
+        """
+        Get the measured time spent parsing the given headers, summed over all sources. Headers
+        included by another header of the set are not counted twice.
+
+        :param list(str) headers: The header names.
+
+        :return: The time in seconds.
+        :rtype: float
+        """
+        headers = set(headers)
+        seconds = 0.
+        for events in self.traces.values():
+            end = (None, -1)
+            for tid, ts, dur, name, detail in events:
+                if name != 'Source' or (tid == end[0] and ts < end[1]):
+                    continue
+                if os.path.basename(detail) in headers:
+                    end = (tid, ts + dur)
+                    seconds += dur / 1.e6
+        return seconds
+
+
+def _trace_owner(name, detail, classes, templates):
+    """
+    Find the class or template a time trace event is spent on.
+
+    :return: The kind ("class" or "template") and name of the owner, or None.
+    :rtype: tuple(str, str) or None
+    """
+    if name == 'Source':
+        base = os.path.basename(detail)
+        if base.startswith('bind_') and base.endswith('.hxx'):
+            return 'template', base[:-len('.hxx')]
+        return None
+
+    for match in _bind_re.finditer(detail):
+        func = 'bind_' + match.group(1)
+        if func in classes:
+            return 'class', classes[func]
+        if func in templates:
+            return 'template', func
+
+    for token in _token_re.findall(detail):
+        if token in classes:
+            return 'class', classes[token]
+    return None
+
+
+def attribute_costs(costs, model):
+    """
+    Attribute the measured cost of each source back to its modules, classes, and template
+    headers. Time trace events are attributed to the class or template they name. The rest of a
+    source's time is split between its classes in proportion to their estimated cost.
+
+    :param pybinder.costs.CompileCosts costs: The measurements.
+    :param pybinder.generate.Model model: The model with the generated sources.
+
+    :return: The cost report.
+    :rtype: dict
+    """
+    templates = model.registered_templates
+    template_functions = set([t.function_name for t in templates.values()])
+
+    module_seconds = defaultdict(float)
+    class_seconds = defaultdict(float)
+    class_info = {}
+    template_seconds = defaultdict(float)
+    sources = []
+
+    for src in sorted(model.source_types):
+        if src not in costs.seconds:
+            continue
+        total = costs.seconds[src]
+        types = [t for t in model.source_types[src] if not t.is_excluded]
+        modules = model.source_modules[src]
+        sources.append({'source': src, 'seconds': total, 'peak_rss': costs.peak_rss.get(src),
+                        'modules': modules})
+
+        # Lookup of the names a type appears under in the trace
+        classes = {}
+        for type_ in types:
+            classes['bind_' + type_.python_name] = type_.register_name
+            classes[type_.register_name] = type_.register_name
+            class_info[type_.register_name] = (type_.module_name, src)
+
+        # Attribute the outermost events that name a class or template
+        attributed = 0.
+        end = (None, -1)
+        for tid, ts, dur, name, detail in costs.traces.get(src, []):
+            if tid == end[0] and ts < end[1]:
+                continue
+            owner = _trace_owner(name, detail, classes, template_functions)
+            if owner is None:
+                continue
+            end = (tid, ts + dur)
+            seconds = dur / 1.e6
+            attributed += seconds
+            if owner[0] == 'class':
+                class_seconds[owner[1]] += seconds
+                module_seconds[class_info[owner[1]][0]] += seconds
+            else:
+                template_seconds[owner[1]] += seconds
+                module_seconds[modules[0] if len(modules) == 1 else '(shared)'] += seconds
+
+        # Split the remainder by estimated cost
+        remainder = max(total - attributed, 0.)
+        estimates = [max(estimate_cost(t, templates), 1) for t in types]
+        if not estimates:
+            for mod in modules:
+                module_seconds[mod] += remainder / len(modules)
+            continue
+        for type_, estimate in zip(types, estimates):
+            seconds = remainder * estimate / float(sum(estimates))
+            class_seconds[type_.register_name] += seconds
+            module_seconds[type_.module_name] += seconds
+
+    classes = []
+    for name, seconds in class_seconds.items():
+        module, src = class_info[name]
+        classes.append({'name': name, 'module': module, 'source': src, 'seconds': seconds})
+
+    sources.sort(key=lambda s: (-s['seconds'], s['source']))
+    classes.sort(key=lambda c: (-c['seconds'], c['name']))
+    return {'sources': sources,
+            'modules': sorted([{'name': k, 'seconds': v} for k, v in module_seconds.items()],
+                              key=lambda m: (-m['seconds'], m['name'])),
+            'classes': classes,
+            'templates': sorted([{'name': k, 'seconds': v} for k, v in template_seconds.items()],
+                                key=lambda t: (-t['seconds'], t['name']))}
+
+
+def plan_job_pools(costs, sources, memory_mb, heavy_rss_mb):
+    """
+    Select the sources whose measured peak memory makes them heavy and the number of them that
+    fit in memory at once.
+
+    :param pybinder.costs.CompileCosts costs: The measurements.
+    :param list(str) sources: The sources to compile.
+    :param int memory_mb: The memory available for compiling in MB.
+    :param int heavy_rss_mb: Sources with a larger peak memory in MB are heavy.
+
+    :return: The heavy sources and the size of their job pool.
+    :rtype: tuple(list(str), int)
+    """
+    heavy = [s for s in sources if costs.peak_rss.get(s, 0) > heavy_rss_mb * 2 ** 20]
+    if not heavy:
+        return [], 0
+    largest = max([costs.peak_rss[s] for s in heavy]) / float(2 ** 20)
+    return heavy, max(1, int(memory_mb // largest))
+
+
+def record_compile(records, args):
+    """
+    Run a compiler command and append its wall time and peak memory to a JSON lines file. Meant
+    to be used as a compiler launcher.
+
+    :param str records: The JSON lines file.
+    :param list(str) args: The compiler command.
+
+    :return: The exit code of the compiler.
+    :rtype: int
+    """
+    start = time.time()
+    code = subprocess.call(args)
+    seconds = time.time() - start
+
+    src = ''
+    for arg in args:
+        if arg.endswith(_source_ext):
+            src = arg
+    if not src:
+        return code
+
+    peak_rss = None
+    if resource is not None:
+        peak_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        if sys.platform != 'darwin':
+            peak_rss *= 1024
+
+    record = {'source': os.path.basename(src), 'seconds': seconds, 'peak_rss': peak_rss}
+    with open(records, 'a') as fout:
+        fout.write(json.dumps(record, sort_keys=True) + '\n')
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(record_compile(sys.argv[1], sys.argv[2:]))
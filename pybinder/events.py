@@ -0,0 +1,121 @@
+import json
+import sys
+from collections import Counter
+
+__all__ = ['EventLog']
+
+
+class EventLog(object):
+    """
+    Structured log of generator events. Each event is written as a single JSON line to the sink
+    and the sink is only written to once the buffer is full (or the log is flushed).
+
+    :param sink: A writable text stream for the JSON lines. If None then events are only counted.
+    :param bool quiet: If True then nothing is printed to the terminal.
+    :param int buffer_size: Number of events to hold before writing to the sink.
+    """
+
+    def __init__(self, sink=None, quiet=False, buffer_size=1000):
+        self._sink = sink
+        self._owns_sink = False
+        self.quiet = quiet
+        self.buffer_size = buffer_size
+
+        self._buffer = []
+        self.counts = Counter()
+
+    @staticmethod
+    def open(fn, quiet=False, buffer_size=1000):
+        """
+        Create an event log writing to a file.
+
+        :param str fn: The output file name.
+        :param bool quiet: If True then nothing is printed to the terminal.
+        :param int buffer_size: Number of events to hold before writing to the file.
+
+        :return:
+        :rtype: pybinder.events.EventLog
+        """
+        log = EventLog(open(fn, 'w', newline='\n'), quiet, buffer_size)
+        log._owns_sink = True
+        return log
+
+    def emit(self, event, entity='', module='', reason='', **kwargs):
+        """
+        Record an event.
+
+        :param str event: The event type (e.g., "alias" or "exclude_typedef").
+        :param entity: The entity the event is about.
+        :param str module: The module of the entity.
+        :param str reason: The reason for the event.
+        :param kwargs: Additional fields.
+
+        :return: None.
+        """
+        self.counts[event] += 1
+        if self._sink is None:
+            return
+
+        record = {'event': event, 'entity': str(entity), 'module': module, 'reason': reason}
+        record.update(kwargs)
+        self._buffer.append(json.dumps(record, sort_keys=True))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def info(self, msg):
+        """
+        Print a progress message unless in quiet mode.
+
+        :param str msg: The message.
+
+        :return: None.
+        """
+        if not self.quiet:
+            print(msg)
+
+    def flush(self):
+        """
+        Write any buffered events to the sink.
+
+        :return: None.
+        """
+        if self._sink is None or not self._buffer:
+            return
+        self._sink.write('\n'.join(self._buffer))
+        self._sink.write('\n')
+        self._buffer = []
+
+    def summary(self):
+        """
+        Get the number of events per event type.
+
+        :return: Event counts sorted by event type.
+        :rtype: dict
+        """
+        return dict(sorted(self.counts.items()))
+
+    def print_summary(self, stream=None):
+        """
+        Print the number of events per event type unless in quiet mode.
+
+        :param stream: The output stream. Defaults to stdout.
+
+        :return: None.
+        """
+        if self.quiet:
+            return
+        stream = stream or sys.stdout
+        stream.write('Event summary:\n')
+        for event, count in self.summary().items():
+            stream.write('\t{}: {}\n'.format(event, count))
+
+    def close(self):
+        """
+        Flush the log and close the sink if it was opened by the log.
+
+        :return: None.
+        """
+        self.flush()
+        if self._owns_sink:
+            self._sink.close()
+        self._sink = None
@@ -0,0 +1,338 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from collections import OrderedDict
+
+import toml
+
+from pybinder.bind import write_class_template
+from pybinder.generate import generate_module
+from pybinder.utilities import open_source_file
+from pybinder.verify import get_verify_command
+from pybinder.wrap import ClassTemplateWrapper
+
+__all__ = ['ModuleBisector', 'bisect_failures', 'format_exclusions', 'write_exclusions']
+
+
+def _key(entity, mod):
+    """
+    :return: The configuration entry that excludes an entity as the table, name, list, and value.
+    :rtype: tuple(str, str, str, str)
+    """
+    if entity.is_function_decl:
+        return 'Modules', mod, 'excluded_functions', entity.register_name
+    if entity.is_typedef_decl:
+        return 'Modules', mod, 'excluded_typedefs', entity.register_name
+    if entity.is_constructor:
+        return ('Classes', entity.semantic_parent.qualified_displayname, 'excluded_constructors',
+                entity.register_name)
+    if entity.is_class_method:
+        return ('Classes', entity.semantic_parent.qualified_displayname, 'excluded_methods',
+                entity.python_name)
+    return 'Modules', mod, 'excluded_classes', entity.register_name
+
+
+def _group(entities, mod):
+    """
+    Group the entities by the configuration entry that excludes them (e.g., the overloads of a
+    method).
+
+    :return: The entities of each entry.
+    :rtype: collections.OrderedDict
+    """
+    groups = OrderedDict()
+    for entity in entities:
+        if not entity.is_excluded and not entity.is_enum_decl:
+            groups.setdefault(_key(entity, mod), []).append(entity)
+    return groups
+
+
+def _children(entity, templates):
+    """
+    :return: The members of an entity that can be excluded on their own and the template whose
+        header binds them, if any.
+    :rtype: tuple(list, pybinder.wrap.ClassTemplateWrapper or None)
+    """
+    template = None
+    if entity.is_typedef_decl:
+        template = templates.get(entity.underlying_template_name)
+        if not entity.is_templated or template is None or template.is_excluded:
+            return [], None
+        klass = template.klass
+        children = list(template.nested_class_templates)
+    elif isinstance(entity, ClassTemplateWrapper):
+        # Nested class template bound in the header of its parent
+        klass = entity.klass
+        children = list(entity.nested_class_templates)
+    elif entity.is_class_decl or entity.is_struct_decl:
+        klass = entity
+        children = []
+    else:
+        return [], None
+    return klass.constructors + klass.methods + klass.nested_classes + children, template
+
+
+class ModuleBisector(object):
+    """
+    Find the classes, typedefs, functions, and members to exclude so a module compiles. The
+    module is generated on its own into a temporary directory with its template instantiations
+    so it is checked in isolation. The entities of the module are bisected first and each one
+    found is then narrowed down to its members (including the members of the class templates a
+    typedef instantiates) if excluding those is enough.
+
+    :param pybinder.generate.Model model: The model.
+    :param str path: The directory of the generated sources.
+    :param pybinder.configure.Configurator config:
+    :param str mod: The module.
+    """
+
+    def __init__(self, model, path, config, mod):
+        self.model = model
+        self.config = config
+        self.mod = mod
+        self.compiles = 0
+        self.output = ''
+
+        self._dir = tempfile.mkdtemp(prefix='pybinder_')
+        self._cmd = get_verify_command(config, self._dir)
+        self._cmd.append('-I{}'.format(os.path.abspath(path)))
+
+        # Entities of each configuration entry and the templates to write with the module
+        self._entities = {}
+        self._templates = []
+
+    def close(self):
+        """
+        Remove the temporary directory.
+
+        :return: None.
+        """
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def compiles_without(self, excluded):
+        """
+        Check if the module compiles with some entries excluded.
+
+        :param collection excluded: The configuration entries to exclude.
+
+        :return: True if the module compiles.
+        :rtype: bool
+        """
+        model = self.model
+        mod = self.mod
+
+        changed = []
+        for key in excluded:
+            for entity in self._entities[key]:
+                if not entity.is_excluded:
+                    entity.is_excluded = True
+                    changed.append(entity)
+
+        # Instantiate the templates in the module source
+        explicit_instantiation = self.config.explicit_instantiation
+        self.config.explicit_instantiation = False
+        try:
+            fname = generate_module(self._dir, mod, model.module_enums[mod],
+                                    model.module_functions[mod], model.module_types[mod],
+                                    self.config, graph=model.include_graph)
+            for template in self._templates:
+                fout = open_source_file(self._dir, template.source_name)
+                write_class_template(template, fout, self.config)
+                fout.close()
+        finally:
+            self.config.explicit_instantiation = explicit_instantiation
+            for entity in changed:
+                entity.is_excluded = False
+
+        self.compiles += 1
+        proc = subprocess.run(self._cmd + [fname], cwd=self._dir, stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, universal_newlines=True)
+        self.output = proc.stdout
+        return proc.returncode == 0
+
+    def bisect(self, keys, excluded):
+        """
+        Find the entries among some keys that must be excluded, assuming excluding more never
+        breaks the build.
+
+        :param list keys: The configuration entries to search.
+        :param frozenset excluded: The configuration entries excluded in every check.
+
+        :return: The entries to exclude.
+        :rtype: list
+        """
+        if not keys or self.compiles_without(excluded):
+            return []
+        if len(keys) == 1:
+            return list(keys)
+        half = len(keys) // 2
+        first = self.bisect(keys[:half], excluded | frozenset(keys[half:]))
+        return first + self.bisect(keys[half:], excluded | frozenset(first))
+
+    def _add(self, groups):
+        self._entities.update(groups)
+        return list(groups)
+
+    def narrow(self, key, excluded):
+        """
+        Replace an entry by the entries of its members if excluding these is enough.
+
+        :param tuple key: The configuration entry.
+        :param frozenset excluded: The other entries to exclude.
+
+        :return: The entries to exclude.
+        :rtype: list
+        """
+        templates = self.model.registered_templates
+        members = []
+        for entity in self._entities[key]:
+            children, template = _children(entity, templates)
+            mod = key[1] if key[0] == 'Modules' else entity.module_name
+            if template is not None:
+                mod = template.module_name
+                if template not in self._templates:
+                    self._templates.append(template)
+            members += self._add(_group(children, mod))
+        if not members or not self.compiles_without(excluded | frozenset(members)):
+            return [key]
+
+        found = self.bisect(members, excluded)
+        narrowed = []
+        for i, member in enumerate(found):
+            others = excluded | frozenset(narrowed + found[i + 1:])
+            narrowed += self.narrow(member, others)
+        return narrowed
+
+    def run(self):
+        """
+        Find the entries to exclude.
+
+        :return: The entries to exclude and if the module then compiles.
+        :rtype: tuple(list(tuple(str, str, str, str)), bool)
+
+        :raise RuntimeError: If the module does not compile with all of its entities excluded,
+            since then the failure comes from the environment (e.g., the compiler or include
+            paths) and not from what the module binds.
+        """
+        model = self.model
+        mod = self.mod
+        if self.compiles_without(()):
+            return [], True
+
+        keys = self._add(_group(model.module_functions[mod] + model.module_types[mod], mod))
+        if not self.compiles_without(keys):
+            lines = self.output.strip().splitlines()
+            msg = 'Module {} does not compile with all of its entities excluded: {}'.format(
+                mod, lines[0] if lines else 'no compiler output')
+            raise RuntimeError(msg)
+
+        found = self.bisect(keys, frozenset())
+        narrowed = []
+        for i, key in enumerate(found):
+            others = frozenset(narrowed + found[i + 1:])
+            narrowed += self.narrow(key, others)
+
+        # Drop the entries not needed once the others are narrowed down (e.g., a class that
+        # only failed by including a template header whose member is now excluded)
+        for key in list(narrowed):
+            rest = [k for k in narrowed if k != key]
+            if self.compiles_without(rest):
+                narrowed = rest
+        return narrowed, self.compiles_without(narrowed)
+
+
+def bisect_failures(model, path, config, log, modules=None):
+    """
+    Find the exclusions that make the failing modules compile.
+
+    :param pybinder.generate.Model model: The model with the verified sources.
+    :param str path: The directory of the generated sources.
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+    :param list(str) modules: The modules to bisect. If None then the modules of the sources that
+        failed verification are used.
+
+    :return: The configuration entries to exclude. The entries found for a module that still
+        fails with them are left out.
+    :rtype: list(tuple(str, str, str, str))
+
+    :raise RuntimeError: If a module does not compile with all of its entities excluded.
+    """
+    if modules is None:
+        modules = set()
+        for error in model.verify_errors:
+            modules.update([m for m in error['module'].split(', ') if m in model.module_types])
+        modules = sorted(modules)
+
+    exclusions = []
+    for mod in modules:
+        log.info('Bisecting {}...'.format(mod))
+        bisector = ModuleBisector(model, path, config, mod)
+        try:
+            found, fixed = bisector.run()
+        finally:
+            bisector.close()
+        log.emit('bisect', mod, mod, reason='{} exclusions'.format(len(found)),
+                 compiles=bisector.compiles, fixed=fixed)
+        if not fixed:
+            log.emit('bisect_unresolved', mod, mod, 'still fails after the exclusions',
+                     exclusions=len(found))
+            continue
+        for table, name, key, value in found:
+            log.emit('bisect_exclusion', value, mod, '{}.{}'.format(name, key), table=table)
+        exclusions += [e for e in found if e not in exclusions]
+    return exclusions
+
+
+def _merge(data, exclusions):
+    """
+    :return: The configuration data with the exclusions added.
+    :rtype: dict
+    """
+    for table, name, key, value in exclusions:
+        values = data.setdefault(table, {}).setdefault(name, {}).setdefault(key, [])
+        if value not in values:
+            values.append(value)
+    return data
+
+
+def format_exclusions(exclusions, data=None):
+    """
+    Format exclusions as TOML tables of the configuration file.
+
+    :param list(tuple(str, str, str, str)) exclusions: The configuration entries to exclude.
+    :param dict data: Existing exclusions to merge with.
+
+    :return: The TOML text.
+    :rtype: str
+    """
+    data = _merge(data or {}, exclusions)
+    lines = []
+    for table in ('Modules', 'Classes'):
+        for name in sorted(data.get(table, {})):
+            if lines:
+                lines.append('')
+            lines.append('[{}.{}]'.format(table, toml.dumps({name: 0}).split(' = ')[0]))
+            for key in sorted(data[table][name]):
+                values = ', '.join([toml.dumps({'v': v})[4:-1]
+                                    for v in data[table][name][key]])
+                lines.append('    {} = [{}]'.format(key, values))
+    return '\n'.join(lines) + '\n'
+
+
+def write_exclusions(fn, exclusions):
+    """
+    Add exclusions to a TOML file listed in the "files" of the [Exclude] table. Existing entries
+    of the file are kept.
+
+    :param str fn: The file.
+    :param list(tuple(str, str, str, str)) exclusions: The configuration entries to exclude.
+
+    :return: None.
+    """
+    data = toml.load(fn) if os.path.exists(fn) else {}
+    txt = format_exclusions(exclusions, data)
+    with open(fn, 'w', newline='\n') as fout:
+        fout.write('# Exclusions found by bisecting failing modules\n\n')
+        fout.write(txt)
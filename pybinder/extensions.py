@@ -0,0 +1,322 @@
+from collections import OrderedDict, defaultdict
+
+from pybinder.includes import get_bound_cursors
+from pybinder.utilities import get_module_name, open_source_file
+
+__all__ = ['group_modules', 'get_module_dependencies', 'merge_cycles', 'order_extensions',
+           'get_load_order', 'write_loader']
+
+
+def group_modules(modules, groups):
+    """
+    Assign the modules to extension modules. Each configured group becomes one extension and the
+    modules not in any group get an extension of their own. Extension names are prefixed with an
+    underscore so they do not collide with the module names.
+
+    :param list(str) modules: The available modules.
+    :param dict groups: The module names of each group (e.g., per OCCT toolkit).
+
+    :return: The modules of each extension.
+    :rtype: collections.OrderedDict
+    """
+    extensions = OrderedDict()
+    grouped = {}
+    for name in sorted(groups):
+        for mod in groups[name]:
+            grouped.setdefault(mod, name)
+
+    for mod in modules:
+        name = '_' + grouped.get(mod, mod)
+        extensions.setdefault(name, []).append(mod)
+    return extensions
+
+
+def _referenced_modules(cursor, modules):
+    """
+    :param pybinder.wrap.CursorWrapper cursor: The cursor.
+    :param set(str) modules: The available modules.
+
+    :return: The modules of the types the cursor references.
+    :rtype: set(str)
+    """
+    found = set()
+    for c in cursor.walk_preorder():
+        if not c.is_type_ref:
+            continue
+        d = c.get_definition()
+        if not d.is_definition:
+            continue
+        mod = get_module_name(d.source_file)
+        if mod in modules:
+            found.add(mod)
+    return found
+
+
+def get_module_dependencies(model):
+    """
+    Find the modules each module needs from the types it binds. A module needs the modules of its
+    base classes, alias targets, and default argument types when it is imported. It needs the
+    modules of every other type in its signatures before these are called.
+
+    :param pybinder.generate.Model model: The processed model.
+
+    :return: The modules needed at import and the modules needed at call time.
+    :rtype: tuple(dict, dict)
+    """
+    modules = set(model.available_modules)
+    hard = defaultdict(set)
+    soft = defaultdict(set)
+
+    def visit(mod, klass):
+        for base in klass.bases:
+            if base.is_excluded or base.superclass is None:
+                continue
+            hard[mod].add(base.superclass.module_name)
+        for item in klass.constructors + klass.methods:
+            if item.is_excluded:
+                continue
+            for p in item.parameters:
+                if p.default_value:
+                    hard[mod].update(_referenced_modules(p, modules))
+        for nklass in klass.nested_classes:
+            if not nklass.is_excluded:
+                visit(mod, nklass)
+
+    for mod in model.submodules:
+        for type_ in model.module_types[mod]:
+            if type_.is_excluded:
+                continue
+            if type_.is_typedef_decl and type_.is_alias:
+                if not type_.alias.is_excluded:
+                    hard[mod].add(type_.alias.module_name)
+                continue
+            if not type_.is_typedef_decl:
+                visit(mod, type_)
+            for cursor in get_bound_cursors(type_):
+                soft[mod].update(_referenced_modules(cursor, modules))
+        for func in model.module_functions[mod]:
+            if not func.is_excluded:
+                soft[mod].update(_referenced_modules(func, modules))
+
+    for mod in modules:
+        hard[mod].discard(mod)
+        soft[mod].discard(mod)
+        soft[mod] -= hard[mod]
+    return hard, soft
+
+
+def _extension_needs(extensions, module_extensions, hard):
+    """
+    :return: The extensions each extension needs at import.
+    :rtype: collections.OrderedDict
+    """
+    needs = OrderedDict()
+    for ext, modules in extensions.items():
+        deps = set()
+        for mod in modules:
+            deps.update([module_extensions[m] for m in hard.get(mod, ())])
+        deps.discard(ext)
+        needs[ext] = sorted(deps)
+    return needs
+
+
+def merge_cycles(extensions, module_extensions, hard):
+    """
+    Merge the extensions that need each other at import, directly or indirectly, into one
+    extension so they can be imported in order. Each strongly connected component of the
+    dependencies becomes the first of its extensions.
+
+    :param collections.OrderedDict extensions: The modules of each extension.
+    :param dict module_extensions: The extension of each module. Updated in place.
+    :param dict hard: The modules each module needs at import.
+
+    :return: The modules of each extension and the extensions merged into each one.
+    :rtype: tuple(collections.OrderedDict, dict)
+    """
+    needs = _extension_needs(extensions, module_extensions, hard)
+
+    # Tarjan's algorithm
+    index = {}
+    low = {}
+    stack = []
+    on_stack = set()
+    components = []
+
+    def visit(ext):
+        index[ext] = low[ext] = len(index)
+        stack.append(ext)
+        on_stack.add(ext)
+        for dep in needs[ext]:
+            if dep not in index:
+                visit(dep)
+                low[ext] = min(low[ext], low[dep])
+            elif dep in on_stack:
+                low[ext] = min(low[ext], index[dep])
+        if low[ext] == index[ext]:
+            component = []
+            while True:
+                other = stack.pop()
+                on_stack.discard(other)
+                component.append(other)
+                if other == ext:
+                    break
+            components.append(component)
+
+    for ext in needs:
+        if ext not in index:
+            visit(ext)
+
+    target = {}
+    merged = {}
+    for component in components:
+        component.sort(key=list(extensions).index)
+        for ext in component:
+            target[ext] = component[0]
+        if len(component) > 1:
+            merged[component[0]] = component[1:]
+
+    result = OrderedDict()
+    for ext, modules in extensions.items():
+        result.setdefault(target[ext], []).extend(modules)
+        for mod in modules:
+            module_extensions[mod] = target[ext]
+    return result, merged
+
+
+def order_extensions(extensions, module_extensions, hard):
+    """
+    Order the extensions so the ones needed at import come first. An extension imports these
+    itself when it is loaded so the dependencies must not form a cycle (see
+    :func:`merge_cycles`).
+
+    :param collections.OrderedDict extensions: The modules of each extension.
+    :param dict module_extensions: The extension of each module.
+    :param dict hard: The modules each module needs at import.
+
+    :return: The extensions in load order and the extensions each one imports.
+    :rtype: tuple(list(str), dict)
+
+    :raise RuntimeError: If the dependencies form a cycle.
+    """
+    needs = _extension_needs(extensions, module_extensions, hard)
+
+    order = []
+    imports = {}
+    state = {}
+
+    def visit(ext):
+        state[ext] = 'visiting'
+        imports[ext] = []
+        for dep in needs[ext]:
+            if state.get(dep) == 'visiting':
+                msg = 'Extensions {} and {} need each other at import'.format(ext, dep)
+                raise RuntimeError(msg)
+            if dep not in state:
+                visit(dep)
+            imports[ext].append(dep)
+        state[ext] = 'done'
+        order.append(ext)
+
+    for ext in needs:
+        if ext not in state:
+            visit(ext)
+    return order, imports
+
+
+def get_load_order(ext, dependencies, order):
+    """
+    Get the extensions to load before an extension can be used.
+
+    :param str ext: The extension.
+    :param dict dependencies: The extensions each extension needs.
+    :param list(str) order: The extensions in load order.
+
+    :return: The extension and the ones it needs directly or indirectly in load order.
+    :rtype: list(str)
+    """
+    needed = {ext}
+    stack = [ext]
+    while stack:
+        for dep in dependencies.get(stack.pop(), ()):
+            if dep not in needed:
+                needed.add(dep)
+                stack.append(dep)
+    return [e for e in order if e in needed]
+
+
+def write_loader(output_dir, package, module_extensions, load_order):
+    """
+    Write the "__init__.py" of the package that loads the extension of a module the first time
+    the module is used. Both attribute access (e.g., "OCCT.gp") and imports (e.g.,
+    "from OCCT.gp import gp_Pnt") are supported.
+
+    :param str output_dir: The output directory.
+    :param str package: The package name.
+    :param dict module_extensions: The extension of each module.
+    :param dict load_order: The extensions to load for each extension in load order.
+
+    :return: None.
+    """
+    fout = open_source_file(output_dir, '__init__.py')
+    fout.write('# Generated by pybinder. Do not edit.\n')
+    fout.write('import importlib\n')
+    fout.write('import importlib.abc\n')
+    fout.write('import importlib.util\n')
+    fout.write('import sys\n\n')
+
+    fout.write('# Extension of each module\n')
+    fout.write('_modules = {\n')
+    for mod in sorted(module_extensions):
+        fout.write('    \'{}\': \'{}\',\n'.format(mod, module_extensions[mod]))
+    fout.write('}\n\n')
+
+    fout.write('# Extensions to load for each extension in load order\n')
+    fout.write('_load_order = {\n')
+    for ext in sorted(load_order):
+        fout.write('    \'{}\': {},\n'.format(ext, load_order[ext]))
+    fout.write('}\n\n')
+
+    fout.write(_loader.format(package=package))
+    fout.close()
+
+
+_loader = '''
+def _load(mod):
+    ext = None
+    for name in _load_order[_modules[mod]]:
+        ext = importlib.import_module(__name__ + '.' + name)
+    return getattr(ext, mod)
+
+
+def __getattr__(name):
+    if name not in _modules:
+        raise AttributeError('module {{!r}} has no attribute {{!r}}'.format(__name__, name))
+    value = _load(name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_modules))
+
+
+class _ModuleFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """
+    Import "{package}.<module>" from the extension of the module.
+    """
+
+    def find_spec(self, fullname, path, target=None):
+        package, _, name = fullname.rpartition('.')
+        if package != __name__ or name not in _modules:
+            return None
+        return importlib.util.spec_from_loader(fullname, self)
+
+    def create_module(self, spec):
+        return __getattr__(spec.name.rpartition('.')[2])
+
+    def exec_module(self, module):
+        pass
+
+
+sys.meta_path.append(_ModuleFinder())
+'''
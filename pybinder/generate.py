@@ -1,14 +1,32 @@
+import io
+import json
 import operator
 import os
+import re
 import shutil
-from collections import defaultdict
-
-from pybinder.bind import (bind_enum, bind_class, bind_class_template, bind_typedef, bind_function, bind_trampoline_class)
-from pybinder.utilities import get_includes_for_cursors
+from collections import OrderedDict, defaultdict
+
+from pybinder.backend import get_backend
+from pybinder.bind import (bind_enum, bind_class, bind_class_template, bind_typedef, bind_function, bind_trampoline_class,
+                           write_class_template)
+from pybinder.build import (estimate_cost, shard_types, pack_sources, write_unity_source,
+                            read_includes, select_pch_headers, write_pch, write_source_list)
+from pybinder.concurrency import audit_sources, check_concurrency
+from pybinder.costs import CompileCosts, attribute_costs, plan_job_pools
+from pybinder.events import EventLog
+from pybinder.extensions import (group_modules, get_module_dependencies, merge_cycles,
+                                 order_extensions, get_load_order, write_loader)
+from pybinder.includes import get_bound_cursors
+from pybinder.lazy import write_lazy_types
+from pybinder.registration import order_registration
+from pybinder.profile import Profiler
+from pybinder.usage import apply_usage_profile, read_usage_profile
+from pybinder.utilities import get_includes_for_cursors, get_module_name, open_source_file
+from pybinder.verify import verify_sources
 from pybinder.wrap import (wrap_class_cursor, wrap_enum_cursor, wrap_function_cursor,
                            wrap_typedef_cursor, wrap_class_template_cursor)
 
-__all__ = ['generate_bindings']
+__all__ = ['Model', 'generate_bindings']
 
 
 # TODO Multiple inheritance
@@ -19,36 +37,269 @@ __all__ = ['generate_bindings']
 # TODO Qualify "Standard_CString" with "const"?
 
 
-def generate_bindings(parser, config, path, remove=False):
+class Model(object):
+    """
+    The wrapped cursors collected from the parser along with the lookups used to process and
+    bind them.
+    """
+
+    def __init__(self):
+        self.available_modules = set()
+        self.module_enums = defaultdict(list)
+        self.module_functions = defaultdict(list)
+        self.module_types = defaultdict(list)
+
+        self.ordered_classes = list()
+        self.ordered_typedefs = list()
+        self.ordered_types = list()
+
+        self.registered_classes = dict()
+        self.registered_typedefs = dict()
+        self.registered_templates = dict()
+        self.canonical_types = dict()
+
+        # The compiled source files and the modules and types bound in each
+        self.source_modules = defaultdict(list)
+        self.source_types = defaultdict(list)
+
+        # The generated class template headers the sources include
+        self.template_headers = list()
+
+        # The include graph of the parsed headers if minimal include sets are used and the module,
+        # shard number, and types of each source written with a minimal include set
+        self.include_graph = None
+        self.minimal_sources = dict()
+
+        # The modules of each extension module if the bindings are split into several extensions,
+        # the extensions each one imports when loaded, and the extensions to load before using one
+        self.extensions = OrderedDict()
+        self.module_extensions = dict()
+        self.extension_imports = dict()
+        self.extension_load_order = dict()
+
+        # The optimization tier of each module not in the default tier
+        self.module_tiers = dict()
+
+        # The errors found by verifying the generated sources
+        self.verify_errors = []
+
+    @property
+    def submodules(self):
+        """
+        :return: The available modules sorted to make the process deterministic.
+        :rtype: list(str)
+        """
+        return sorted(self.available_modules)
+
+
+def generate_bindings(parser, config, path, remove=False, log=None, profiler=None):
     """
 
     :param pybinder.parse.Parser parser:
     :param pybinder.configure.Configurator config:
     :param path:
     :param remove:
-    :return:
+    :param pybinder.events.EventLog log: Log for generator events. If None then events are only
+        counted.
+    :param pybinder.profile.Profiler profiler: Profiler for the generator stages. If None then
+        nothing is profiled.
+    :return: The wrapped model.
+    :rtype: pybinder.generate.Model
     """
+    if log is None:
+        log = EventLog()
+    if profiler is None:
+        profiler = Profiler(enabled=False)
+
     # Remove source contents
     if remove and os.path.exists(path):
         shutil.rmtree(path)
         os.mkdir(path)
 
-    # ============================================================================================ #
-    # Wrap
-    # ============================================================================================ #
-    available_modules = set()
-    module_enums = defaultdict(list)
-    module_functions = defaultdict(list)
-    module_types = defaultdict(list)
+    with profiler.stage('wrap'):
+        model = wrap_model(parser, config, log)
+        if config.minimal_includes:
+            model.include_graph = parser.get_include_graph()
+
+    with profiler.stage('process'):
+        process_model(model, log)
+        if config.usage_profile:
+            apply_usage_profile(model, read_usage_profile(*config.usage_profile), log)
+        check_backend(model, config, log)
+        mark_async_methods(model, config, log)
+        mark_array_templates(model, config, log)
+        if config.split_extensions:
+            plan_extensions(model, config, log)
+        if config.tiers or config.tier_profile:
+            assign_tiers(model, config, log)
+        if config.ordered_registration:
+            order_registration(model, config, log)
+        if config.free_threaded or config.subinterpreters:
+            check_concurrency(model, config, log)
+
+    with profiler.stage('bind_templates'):
+        bind_templates(model, path, config, log)
+
+    with profiler.stage('bind_modules'):
+        sources = bind_modules(model, path, config, log)
+        if config.explicit_instantiation:
+            sources += bind_instantiations(model, path, config)
+
+    with profiler.stage('bind_main'):
+        sources = bind_main(model, path, config, log) + sources
+        if config.free_threaded or config.subinterpreters:
+            audit_sources(path, sources + model.template_headers, config, log)
+
+    with profiler.stage('build_plan'):
+        plan_build(model, path, sources, config, log)
+
+    if config.verify:
+        with profiler.stage('verify'):
+            verify_bindings(model, path, sources, config, log)
+
+    return model
+
+
+def plan_build(model, path, sources, config, log):
+    """
+    Write the build files for the generated sources: the precompiled header, the job pools from
+    measured compile costs, and the source list.
+
+    :param pybinder.generate.Model model:
+    :param str path:
+    :param list(str) sources: The sources to compile.
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return: None.
+    """
+    costs = None
+    if config.compile_costs:
+        costs = CompileCosts.load(*config.compile_costs)
+
+    # Precompiled header of the headers most sources include. It is included ahead of everything
+    # else, so the sources with manually specified includes, which may need to come first, are
+    # compiled without it.
+    pch = []
+    no_pch = []
+    if config.pch_fraction:
+        includes = dict([(src, read_includes(path, src)) for src in sources])
+        pch = select_pch_headers(includes, config.pch_fraction, config.common_headers)
+        write_pch(path, pch, config)
+        no_pch = [src for src in sources
+                  if any([config.get_extra_headers(m) for m in model.source_modules.get(src, ())])]
+        kwargs = {}
+        if costs is not None:
+            # Estimated from the time spent parsing these headers in the measured build (near
+            # zero if it used the precompiled header), not measured against a build without it
+            kwargs['estimated_seconds_saved'] = round(costs.parse_seconds(pch), 3)
+        log.emit('pch', 'pch.hxx', reason=', '.join(pch), headers=len(pch),
+                 skipped_sources=len(no_pch), **kwargs)
+
+    heavy, heavy_jobs = [], 0
+    if costs is not None:
+        report_costs(costs, model, config, log, pch)
+        heavy, heavy_jobs = plan_job_pools(costs, sources, config.memory_mb,
+                                           config.heavy_rss_mb)
+        for src in heavy:
+            log.emit('heavy_source', src, reason='peak memory {:.0f} MB'.format(
+                costs.peak_rss[src] / 2. ** 20), jobs=heavy_jobs)
+
+    # Sources of each extension module if the bindings are split
+    extensions = None
+    if model.extensions:
+        extensions = OrderedDict()
+        for ext, modules in model.extensions.items():
+            extensions[ext] = [s for s in sources
+                               if set(model.source_modules.get(s, ())) & set(modules)]
+
+    # Sources of each optimization tier. Sources with modules of different tiers, like the
+    # explicit instantiations, stay in the default tier.
+    tiers = OrderedDict()
+    for src in sources:
+        found = set([model.module_tiers.get(m, '') for m in model.source_modules.get(src, ())])
+        if len(found) == 1 and '' not in found:
+            tiers.setdefault(found.pop(), []).append(src)
+
+    write_source_list(path, sources, heavy, heavy_jobs, bool(pch), extensions, tiers,
+                      config.stable_abi, no_pch, config.subinterpreters)
+
+
+def verify_bindings(model, path, sources, config, log):
+    """
+    Check the syntax of the generated sources and log each error with the module, entity, and
+    member it comes from. Sources written with a minimal include set that fail are written again
+    with the full one and checked again.
+
+    :param pybinder.generate.Model model:
+    :param str path:
+    :param list(str) sources: The sources to compile.
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return: None.
+    """
+    log.info('Verifying {} sources...'.format(len(sources)))
+    failed, errors = verify_sources(path, sources, config, model.source_modules,
+                                    config.verify_jobs)
+
+    # Fall back to the full include set for the sources that fail with the minimal one
+    retry = [src for src in failed if src in model.minimal_sources]
+    if retry:
+        retry_modules = {}
+        for src in retry:
+            mod, shard, types = model.minimal_sources.pop(src)
+            retry_modules[src] = mod
+            if shard == 1:
+                generate_module(path, mod, model.module_enums[mod], model.module_functions[mod],
+                                types, config)
+            else:
+                generate_module(path, mod, [], [], types, config, shard)
+        retry_failed, retry_errors = verify_sources(path, retry, config, model.source_modules,
+                                                    config.verify_jobs)
+        for src in retry:
+            if src not in retry_failed:
+                log.emit('full_includes', src, retry_modules[src],
+                         'does not compile with the minimal include set')
+        failed = [src for src in failed if src not in retry or src in retry_failed]
+        errors = [e for e in errors if e['source'] not in retry] + retry_errors
+    for error in errors:
+        log.emit('verify_error', error['entity'] or error['source'], error['module'],
+                 error['message'], source=error['source'], line=error['line'],
+                 member=error['member'])
+    log.emit('verify', 'OCCT', reason=', '.join(failed), failed=len(failed), errors=len(errors))
+    if failed:
+        log.info('Verification failed for {} sources with {} errors.'.format(len(failed),
+                                                                              len(errors)))
+    model.verify_errors = errors
+
+
+def wrap_model(parser, config, log):
+    """
+    Wrap the cursors of the parsed translation unit.
+
+    :param pybinder.parse.Parser parser:
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return:
+    :rtype: pybinder.generate.Model
+    """
+    model = Model()
+
+    available_modules = model.available_modules
+    module_enums = model.module_enums
+    module_functions = model.module_functions
+    module_types = model.module_types
 
-    ordered_classes = list()
-    ordered_typedefs = list()
-    ordered_types = list()
+    ordered_classes = model.ordered_classes
+    ordered_typedefs = model.ordered_typedefs
+    ordered_types = model.ordered_types
 
-    registered_classes = dict()
-    registered_typedefs = dict()
-    registered_templates = dict()
-    canonical_types = dict()
+    registered_classes = model.registered_classes
+    registered_typedefs = model.registered_typedefs
+    registered_templates = model.registered_templates
+    canonical_types = model.canonical_types
 
     for cursor in parser.get_children():
         # Only enums, functions, classes, typedefs, or templates
@@ -66,7 +317,7 @@ def generate_bindings(parser, config, path, remove=False):
             continue
 
         # Assume the module is the first part of the source header
-        mod = header.replace('.', '_').split('_', maxsplit=1)[0]
+        mod = get_module_name(header)
         if config.is_excluded_module(mod):
             continue
 
@@ -84,6 +335,7 @@ def generate_bindings(parser, config, path, remove=False):
 
             if config.is_excluded_function(mod, func.register_name):
                 func.is_excluded = True
+                log.emit('exclude_function', func.register_name, mod, 'config')
 
             module_functions[mod].append(func)
             available_modules.add(mod)
@@ -95,6 +347,7 @@ def generate_bindings(parser, config, path, remove=False):
 
             if config.is_excluded_class(mod, klass.register_name):
                 klass.is_excluded = True
+                log.emit('exclude_class', klass.register_name, mod, 'config')
 
             module_types[mod].append(klass)
             available_modules.add(mod)
@@ -129,6 +382,7 @@ def generate_bindings(parser, config, path, remove=False):
 
             if config.is_excluded_typedef(mod, typedef.register_name):
                 typedef.is_excluded = True
+                log.emit('exclude_typedef', typedef.register_name, mod, 'config')
 
             module_types[mod].append(typedef)
             available_modules.add(mod)
@@ -156,17 +410,34 @@ def generate_bindings(parser, config, path, remove=False):
                 if config.is_excluded_class(mod, nklass.register_name):
                     nklass.is_excluded = True
 
-    # ============================================================================================ #
-    # Process
-    # ============================================================================================ #
+    return model
+
+
+def process_model(model, log):
+    """
+    Resolve aliases, template typedefs, base classes, and holder types.
+
+    :param pybinder.generate.Model model:
+    :param pybinder.events.EventLog log:
+
+    :return: None.
+    """
+    ordered_classes = model.ordered_classes
+    ordered_typedefs = model.ordered_typedefs
+
+    registered_classes = model.registered_classes
+    registered_typedefs = model.registered_typedefs
+    registered_templates = model.registered_templates
+    canonical_types = model.canonical_types
+
     # Go through the ordered types and find typedef aliases
     for typedef in ordered_typedefs:
         if typedef.canonical_type_name in canonical_types:
             typedef.is_alias = True
             other = canonical_types[typedef.canonical_type_name]
             typedef.alias = other
-            msg = 'Alias: {} --> {}'.format(typedef, other)
-            print(msg)
+            log.emit('alias', typedef.register_name, typedef.module_name,
+                     'same canonical type as {}'.format(other.register_name))
         else:
             typedef.is_alias = False
             canonical_types[typedef.canonical_type_name] = typedef
@@ -186,12 +457,10 @@ def generate_bindings(parser, config, path, remove=False):
         else:
             typedef.is_excluded = True
             if typedef.is_templated:
-                msg = 'Excluding typedef {} (unavailable template: {})'.format(
-                    typedef.register_name,
-                    typedef.underlying_template_name)
+                reason = 'unavailable template: {}'.format(typedef.underlying_template_name)
             else:
-                msg = 'Excluding typedef {} (unsupported type)'.format(typedef.register_name)
-            print(msg)
+                reason = 'unsupported type'
+            log.emit('exclude_typedef', typedef.register_name, typedef.module_name, reason)
 
     # Loop through all base classes and mark them if they are available. While doing this check
     # for base classes that could be registered via a template.
@@ -217,11 +486,11 @@ def generate_bindings(parser, config, path, remove=False):
                     klass.extra_bases.insert(0, base)
                     klass.extra_includes.append(superclass.source_name)
             else:
-                msg = 'Excluding base {} of {}'.format(base, klass)
-                print(msg)
+                log.emit('exclude_base', klass.register_name, klass.module_name,
+                         'unavailable base: {}'.format(base.referenced_name))
 
     # Loop through all template base classes and mark them if they are available
-    for name in registered_templates:
+    for name in sorted(registered_templates):
         template = registered_templates[name]
         if template.is_excluded:
             continue
@@ -247,8 +516,8 @@ def generate_bindings(parser, config, path, remove=False):
                     template.klass.extra_bases.insert(0, base)
                     template.extra_includes.append(superclass.source_name)
             else:
-                msg = 'Excluding template base {} in {}'.format(base, template)
-                print(msg)
+                log.emit('exclude_template_base', template.register_name, template.module_name,
+                         'unavailable base: {}'.format(base.referenced_name))
 
     # Set opencascade::handle holder types for classes that need it
     for klass in ordered_classes:
@@ -262,33 +531,647 @@ def generate_bindings(parser, config, path, remove=False):
             ntemplate.klass.holder_type = klass.holder_type
 
     # Set opencascade::handle holder types for templates that need it
-    for name in registered_templates:
+    for name in sorted(registered_templates):
         template = registered_templates[name]
         if template.klass.is_derived_from('Standard_Transient'):
             template.klass.holder_type = 'opencascade::handle'
         for nklass in template.klass.nested_classes:
             nklass.holder_type = template.klass.holder_type
 
-    # ============================================================================================ #
-    # Bind
-    # ============================================================================================ #
-    # Bind templates
-    for name in registered_templates:
-        template = registered_templates[name]
+
+def check_backend(model, config, log):
+    """
+    Report bound constructs the backend cannot express.
+
+    :param pybinder.generate.Model model:
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return: None.
+
+    :raise RuntimeError: If the stable ABI is requested but the backend cannot target it.
+    """
+    backend = get_backend(config.backend)
+
+    if config.stable_abi:
+        check_stable_abi(backend, config, log)
+
+    if backend.max_bases is None:
+        return
+
+    klasses = list(model.ordered_classes)
+    for name in sorted(model.registered_templates):
+        klasses.append(model.registered_templates[name].klass)
+
+    for klass in klasses:
+        if klass.is_excluded:
+            continue
+        bases = [b for b in klass.bases if not b.is_excluded]
+        for base in bases[backend.max_bases:]:
+            log.emit('unsupported_base', klass.register_name, klass.module_name,
+                     '{} supports {} base class(es), dropping {}'.format(
+                         backend.name, backend.max_bases, base.base_name))
+
+
+def mark_async_methods(model, config, log):
+    """
+    Mark the methods that get an awaitable companion and include the helpers where they are
+    bound.
+
+    :param pybinder.generate.Model model:
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return: None.
+    """
+    backend = get_backend(config.backend)
+
+    def mark(klass):
+        found = False
+        for method in klass.methods:
+            if method.is_excluded:
+                continue
+            if config.is_async_method(klass.module_name,
+                                      method.semantic_parent.qualified_displayname,
+                                      method.spelling):
+                method.is_async = True
+                found = True
+                log.emit('async_method', method.register_name, klass.module_name,
+                         'awaitable {}_async'.format(method.python_name))
+        for nklass in klass.nested_classes:
+            if not nklass.is_excluded:
+                found = mark(nklass) or found
+        return found
+
+    for klass in model.ordered_classes:
+        if not klass.is_excluded and mark(klass):
+            klass.extra_includes.append(backend.async_header)
+    for name in sorted(model.registered_templates):
+        template = model.registered_templates[name]
+        if not template.is_excluded and mark(template.klass):
+            template.extra_includes.append(backend.async_header)
+
+
+def mark_array_templates(model, config, log):
+    """
+    Mark the class templates of contiguous arrays whose instantiations expose their items through
+    the buffer protocol and include the helpers where they are bound.
+
+    :param pybinder.generate.Model model:
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return: None.
+    """
+    backend = get_backend(config.backend)
+
+    for name in sorted(model.registered_templates):
+        template = model.registered_templates[name]
+        if template.is_excluded or template.spelling not in config.array_templates:
+            continue
+        template.klass.is_array = True
+        template.extra_includes.append(backend.array_header)
+        log.emit('array_buffer', template.klass.register_name, template.module_name,
+                 'buffer protocol and bulk constructor')
+
+
+_stable_abi_re = re.compile(r'^3\.\d+$')
+
+
+def check_stable_abi(backend, config, log):
+    """
+    Check that the backend can target the limited C API of the requested Python version.
+
+    :param pybinder.backend.Backend backend:
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return: None.
+
+    :raise RuntimeError: If the version is not given as "<major>.<minor>" or the stable ABI cannot
+        be targeted.
+    """
+    if not _stable_abi_re.match(config.stable_abi):
+        log.emit('unsupported_stable_abi', 'OCCT', reason='invalid version')
+        msg = 'Stable ABI {!r} requested: expected a Python version like \'3.12\''.format(
+            config.stable_abi)
+        raise RuntimeError(msg)
+    version = tuple(int(v) for v in config.stable_abi.split('.'))
+
+    if backend.stable_abi is None:
+        reason = '{} cannot target the limited C API'.format(backend.name)
+    elif version < backend.stable_abi:
+        reason = '{} needs Python {} or newer to target the limited C API'.format(
+            backend.name, '.'.join([str(v) for v in backend.stable_abi]))
+    else:
+        return
+
+    log.emit('unsupported_stable_abi', 'OCCT', reason=reason)
+    msg = 'Stable ABI {} requested: {}'.format(config.stable_abi, reason)
+    raise RuntimeError(msg)
+
+
+def plan_extensions(model, config, log):
+    """
+    Split the modules into several extension modules and find the extensions each one needs from
+    the types it binds.
+
+    :param pybinder.generate.Model model:
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return: None.
+    """
+    model.extensions = group_modules(model.submodules, config.extensions)
+    for ext, modules in model.extensions.items():
+        for mod in modules:
+            model.module_extensions[mod] = ext
+
+    hard, soft = get_module_dependencies(model)
+    model.extensions, merged = merge_cycles(model.extensions, model.module_extensions, hard)
+    for ext in sorted(merged):
+        log.emit('extension_cycle', ext, reason='merged {} since they need each other at '
+                                                'import'.format(', '.join(merged[ext])),
+                 merged=merged[ext])
+    order, model.extension_imports = order_extensions(model.extensions, model.module_extensions,
+                                                      hard)
+
+    # Extensions needed by the signatures only are loaded before use but not imported
+    dependencies = {}
+    for ext, modules in model.extensions.items():
+        deps = set(model.extension_imports[ext])
+        for mod in modules:
+            deps.update([model.module_extensions[m] for m in soft[mod]])
+        deps.discard(ext)
+        dependencies[ext] = deps
+
+    for ext in order:
+        model.extension_load_order[ext] = get_load_order(ext, dependencies, order)
+        log.emit('extension', ext, reason=', '.join(model.extensions[ext]),
+                 modules=len(model.extensions[ext]), imports=model.extension_imports[ext],
+                 loads=len(model.extension_load_order[ext]) - 1)
+
+
+def assign_tiers(model, config, log):
+    """
+    Assign the optimization tier of each module from the configured patterns, or from the usage
+    profiles for modules not matching any pattern.
+
+    :param pybinder.generate.Model model:
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return: None.
+    """
+    names = set()
+    if config.tier_profile:
+        names = read_usage_profile(*config.tier_profile)
+
+    tiers = defaultdict(list)
+    for mod in model.submodules:
+        tier = config.get_module_tier(mod)
+        if not tier and names:
+            if mod + '.*' in names:
+                tier = config.profile_tier
+            for entity in (model.module_enums[mod] + model.module_functions[mod] +
+                           model.module_types[mod]):
+                if not entity.is_excluded and entity.python_name in names:
+                    tier = config.profile_tier
+                    break
+        if tier:
+            model.module_tiers[mod] = tier
+            tiers[tier].append(mod)
+
+    for tier in sorted(tiers):
+        log.emit('tier', tier, reason=', '.join(tiers[tier]), modules=len(tiers[tier]))
+
+
+def report_costs(costs, model, config, log, pch=None):
+    """
+    Attribute measured compile costs to the model, log the most expensive classes, and write the
+    full report.
+
+    :param pybinder.costs.CompileCosts costs:
+    :param pybinder.generate.Model model:
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+    :param list(str) pch: The precompiled headers.
+
+    :return: The cost report.
+    :rtype: dict
+    """
+    report = attribute_costs(costs, model)
+    if pch:
+        report['pch'] = {'headers': pch,
+                         'estimated_seconds_saved': costs.parse_seconds(pch)}
+
+    for klass in report['classes'][:config.report_classes]:
+        log.emit('expensive_class', klass['name'], klass['module'], klass['source'],
+                 seconds=round(klass['seconds'], 3))
+
+    if config.cost_report:
+        with open(config.cost_report, 'w', newline='\n') as fout:
+            json.dump(report, fout, indent=2, sort_keys=True)
+            fout.write('\n')
+
+    return report
+
+
+def get_reachable_templates(model):
+    """
+    Find the class templates reachable from the bound classes and typedefs through template base
+    classes, typedefs of template instantiations, and nested templates.
+
+    :param pybinder.generate.Model model:
+
+    :return: The names of the reachable templates.
+    :rtype: set(str)
+    """
+    templates = model.registered_templates
+    by_function = dict([(t.function_name, t) for t in templates.values()])
+
+    stack = []
+
+    def visit(klass):
+        if klass.is_excluded:
+            return
+        for base in klass.extra_bases:
+            if base.template is not None:
+                stack.append(base.template)
+        for nklass in klass.nested_classes:
+            visit(nklass)
+
+    for mod in model.submodules:
+        for type_ in model.module_types[mod]:
+            if type_.is_excluded:
+                continue
+            if type_.is_typedef_decl:
+                if not type_.is_alias and type_.function_name in by_function:
+                    stack.append(by_function[type_.function_name])
+            else:
+                visit(type_)
+
+    reached = set()
+    while stack:
+        template = stack.pop()
+        if template.register_name in reached or template.is_excluded:
+            continue
+        reached.add(template.register_name)
+        visit(template.klass)
+        stack += template.nested_class_templates
+
+        # Templates nested in a template are written in the source of the outer one
+        if template.is_nested and template.source_name == getattr(template.parent, 'source_name',
+                                                                  None):
+            stack.append(template.parent)
+    return reached
+
+
+def bind_templates(model, path, config, log):
+    """
+    Generate the source files for the class templates. Templates that no bound class or typedef
+    reaches are not generated.
+
+    :param pybinder.generate.Model model:
+    :param str path:
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return: None.
+    """
+    reached = get_reachable_templates(model)
+
+    pruned = set()
+    lines = 0
+    for name in sorted(model.registered_templates):
+        template = model.registered_templates[name]
+        if template.is_excluded or name in reached:
+            continue
+        log.emit('prune_template', name, template.module_name, 'not reachable from a bound type')
+
+        # Count what would have been written
+        if template.source_name not in pruned and not (template.is_nested and
+                                                       not template.is_class_template_decl):
+            pruned.add(template.source_name)
+            buffer = io.StringIO()
+            write_class_template(template, buffer, config)
+            lines += buffer.getvalue().count('\n')
+        template.is_excluded = True
+
+    # Remove the includes of the pruned templates
+    if pruned:
+        for klass in model.ordered_classes:
+            klass.extra_includes = [h for h in klass.extra_includes if h not in pruned]
+            for nklass in klass.nested_classes:
+                nklass.extra_includes = [h for h in nklass.extra_includes if h not in pruned]
+        for typedef in model.ordered_typedefs:
+            typedef.extra_includes = [h for h in typedef.extra_includes if h not in pruned]
+        for template in model.registered_templates.values():
+            template.extra_includes = [h for h in template.extra_includes if h not in pruned]
+        log.emit('prune_templates', 'templates', reason='class template sources not generated',
+                 files=len(pruned), lines=lines)
+
+    for name in sorted(model.registered_templates):
+        template = model.registered_templates[name]
+        if template.is_excluded:
+            continue
         # Skip nested classes in templates but bind templates defined in a class
         if template.is_nested and not template.is_class_template_decl:
             continue
         bind_class_template(path, template, config)
+        if template.source_name not in model.template_headers:
+            model.template_headers.append(template.source_name)
+
+        # Generated headers are not seen by the parser
+        if model.include_graph is not None:
+            includes = [template.header_file] + template.extra_includes
+            size = os.path.getsize(os.path.join(path, template.source_name))
+            model.include_graph.add(template.source_name, includes, size)
+
+
+def bind_modules(model, path, config, log):
+    """
+    Generate the source files for the modules. If a target source cost is configured then modules
+    above it are split into shards by class and small modules are batched into unity sources.
+
+    :param pybinder.generate.Model model:
+    :param str path:
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return: The source files to compile.
+    :rtype: list(str)
+    """
+    target = config.source_cost
+    templates = model.registered_templates
+    graph = model.include_graph
+
+    sources = []
+    for mod in model.submodules:
+        enums = model.module_enums[mod]
+        funcs = model.module_functions[mod]
+        types = model.module_types[mod]
+
+        if not target:
+            fname = generate_module(path, mod, enums, funcs, types, config, graph=graph)
+            sources.append((fname, 0, mod, types))
+            if graph is not None and mod not in config.full_includes:
+                model.minimal_sources[fname] = (mod, 1, types)
+            continue
+
+        costs = [estimate_cost(t, templates) for t in types]
+        base_cost = sum([estimate_cost(c, templates) for c in enums + funcs])
+        shards = shard_types(types, costs, target)
+        if len(shards) > 1:
+            log.emit('shard', mod, mod, 'estimated cost {}'.format(base_cost + sum(costs)),
+                     shards=len(shards))
+        for i, shard in enumerate(shards):
+            cost = sum([estimate_cost(t, templates) for t in shard])
+            if i == 0:
+                fname = generate_module(path, mod, enums, funcs, shard, config, graph=graph)
+                cost += base_cost
+            else:
+                fname = generate_module(path, mod, [], [], shard, config, i + 1, graph)
+            sources.append((fname, cost, mod, shard))
+            if graph is not None and mod not in config.full_includes:
+                model.minimal_sources[fname] = (mod, i + 1, shard)
+
+    # Batch the small sources into unity sources
+    unity = {}
+    if target:
+        # Only batch sources of the same extension and optimization tier
+        small = OrderedDict()
+        for fname, cost, mod, _ in sources:
+            if cost < target:
+                key = (model.module_extensions.get(mod), model.module_tiers.get(mod, ''))
+                small.setdefault(key, []).append((fname, cost))
+        nbatches = 0
+        for key in small:
+            for batch in pack_sources(small[key], target):
+                if len(batch) < 2:
+                    continue
+                nbatches += 1
+                fname = 'OCCT_unity_{}.cxx'.format(nbatches)
+                write_unity_source(path, fname, batch, config)
+                log.emit('unity', fname, reason=', '.join(batch), sources=len(batch))
+                for src in batch:
+                    unity[src] = fname
+
+    if graph is not None and graph.stats:
+        log.emit('include_bytes', 'modules', reason='estimated bytes of the module sources with '
+                 'the full and the minimal include sets, summed over the sources: the headers '
+                 'preprocessed (which only differ if unbound members drop headers) and the '
+                 'headers scanned if every include directive opens its header, from the file '
+                 'sizes and not measured',
+                 before=graph.stats['before'], after=graph.stats['after'],
+                 estimated_scanned_before=graph.stats['scanned_before'],
+                 estimated_scanned_after=graph.stats['scanned_after'],
+                 includes_before=graph.stats['includes_before'],
+                 includes_after=graph.stats['includes_after'])
+
+    compiled = []
+    for fname, _, mod, types in sources:
+        fname = unity.get(fname, fname)
+        if fname not in compiled:
+            compiled.append(fname)
+        if mod not in model.source_modules[fname]:
+            model.source_modules[fname].append(mod)
+        model.source_types[fname].extend(types)
+
+    return compiled
+
+
+def get_instantiations(types):
+    """
+    Get the concrete class template instantiations bound by typedefs and template base classes.
+    Instantiations are identified by their canonical type, so two spellings of the same type
+    (e.g., a typedef and its underlying type) give one instantiation.
+
+    :param list(pybinder.wrap.CursorWrapper) types: The types.
+
+    :return: The template binding function, its template arguments as first spelled, and the
+        canonical type of each instantiation in order of first use.
+    :rtype: list(tuple(str, str, str))
+    """
+    instances = []
+    seen = set()
+
+    def add(func, parameters, canonical):
+        if (func, canonical) not in seen:
+            seen.add((func, canonical))
+            instances.append((func, parameters, canonical))
+
+    def visit(klass):
+        if klass.is_excluded:
+            return
+        for base in klass.extra_bases:
+            if base.is_templated and not base.is_template:
+                add(base.template.function_name, base.parameters, base.canonical_type_name)
+        for nklass in klass.nested_classes:
+            visit(nklass)
+
+    for type_ in types:
+        if type_.is_excluded:
+            continue
+        if type_.is_typedef_decl:
+            if type_.is_templated and not type_.is_alias:
+                add(type_.function_name, type_.parameters, type_.canonical_type_name)
+        elif type_.is_class_decl or type_.is_struct_decl:
+            visit(type_)
+
+    return instances
+
 
-    # Bind modules
-    for mod in available_modules:
-        enums = module_enums[mod]
-        funcs = module_functions[mod]
-        types = module_types[mod]
-        generate_module('./src', mod, enums, funcs, types, config)
+def instantiation(func, parameters, backend):
+    """
+    :param str func: The template binding function.
+    :param str parameters: The template arguments.
+    :param pybinder.backend.Backend backend:
+
+    :return: The explicit instantiation definition of the binding function.
+    :rtype: str
+    """
+    return 'template void {}{}({} &, std::string const &, bool const);'.format(
+        func, parameters, backend.module_type)
+
+
+def bind_instantiations(model, path, config):
+    """
+    Generate one source per class template header that explicitly instantiates every concrete use
+    of the template. Module sources declare these instantiations extern so each is compiled once.
+
+    :param pybinder.generate.Model model:
+    :param str path:
+    :param pybinder.configure.Configurator config:
+
+    :return: The source files to compile.
+    :rtype: list(str)
+    """
+    backend = get_backend(config.backend)
+    templates = dict([(t.function_name, t) for t in model.registered_templates.values()])
+
+    # Group the instantiations and the types using them by template header. Each extension module
+    # needs its own instantiations when the bindings are split.
+    instances = defaultdict(list)
+    canonical_types = defaultdict(set)
+    users = defaultdict(list)
+    for mod in model.submodules:
+        ext = model.module_extensions.get(mod, '')
+        for type_ in model.module_types[mod]:
+            for func, parameters, canonical in get_instantiations([type_]):
+                key = (templates[func].source_name, ext)
+                if (func, canonical) not in canonical_types[key]:
+                    canonical_types[key].add((func, canonical))
+                    instances[key].append((func, parameters))
+                if type_ not in users[key]:
+                    users[key].append(type_)
+
+    sources = []
+    for key in sorted(instances):
+        header, ext = key
+        fname = header.replace('.hxx', '{}.cxx'.format(ext))
+        for type_ in users[key]:
+            if type_.module_name not in model.source_modules[fname]:
+                model.source_modules[fname].append(type_.module_name)
+        fout = open_source_file(path, fname)
+        fout.write(config.preamble)
+
+        if config.common_headers:
+            fout.write('// Common includes\n')
+            for h in config.common_headers:
+                fout.write('#include <{}>\n'.format(h))
+            fout.write('\n')
+
+        # Manually specified includes of the modules using the template
+        extra_includes = []
+        for type_ in users[key]:
+            for h in config.get_extra_headers(type_.module_name):
+                if h not in extra_includes:
+                    extra_includes.append(h)
+        if extra_includes:
+            fout.write('// Manually specified includes\n')
+            for h in extra_includes:
+                fout.write('#include <{}>\n'.format(h))
+            fout.write('\n')
+
+        # Headers of the template arguments
+        module_includes, fwd_includes = get_includes_for_cursors(users[key])
+        includes = [h for h in fwd_includes + module_includes if config.is_available_header(h)]
+        if includes:
+            fout.write('// Includes for template arguments\n')
+            for h in includes:
+                fout.write('#include <{}>\n'.format(h))
+            fout.write('\n')
+
+        fout.write('// Template\n')
+        fout.write('#include <{}>\n\n'.format(header))
+
+        fout.write('// Explicit instantiations\n')
+        for func, parameters in instances[key]:
+            fout.write('{}\n'.format(instantiation(func, parameters, backend)))
+
+        fout.close()
+        sources.append(fname)
+
+    return sources
+
+
+def bind_main(model, path, config, log=None):
+    """
+    Generate the main source of each extension module and the package that loads them if the
+    bindings are split into several extensions.
+
+    :param pybinder.generate.Model model:
+    :param str path:
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return: The source files to compile.
+    :rtype: list(str)
+    """
+    if not model.extensions:
+        return [generate_main(model, path, config, log=log)]
+
+    sources = []
+    for ext, modules in model.extensions.items():
+        fname = generate_main(model, path, config, ext, modules, model.extension_imports[ext],
+                              log)
+        model.source_modules[fname] = list(modules)
+        sources.append(fname)
+    write_loader(path, 'OCCT', model.module_extensions, model.extension_load_order)
+    return sources
+
+
+def generate_main(model, path, config, name='OCCT', modules=None, imports=None, log=None):
+    """
+    Generate the main source file that defines the extension module.
+
+    :param pybinder.generate.Model model:
+    :param str path:
+    :param pybinder.configure.Configurator config:
+    :param str name: The extension module name.
+    :param list(str) modules: The modules of the extension. If None then all modules are bound.
+    :param list(str) imports: The extension modules of the "OCCT" package to import first.
+    :param pybinder.events.EventLog log:
+
+    :return: The source file name.
+    :rtype: str
+    """
+    if log is None:
+        log = EventLog()
+    backend = get_backend(config.backend)
+    if modules is None:
+        modules = model.submodules
+    if imports is None:
+        imports = []
+    submodules = sorted(modules)
+    modules = set(modules)
+    ordered_types = [t for t in model.ordered_types if t.module_name in modules]
+    ordered_typedefs = [t for t in model.ordered_typedefs if t.module_name in modules]
 
     # Open the main file
-    main_fout = open('./src/{}.cxx'.format('OCCT'), 'w')
+    fname = '{}.cxx'.format(name)
+    main_fout = open_source_file(path, fname)
 
     # Write preamble content
     main_fout.write(config.preamble)
@@ -300,58 +1183,102 @@ def generate_bindings(parser, config, path, remove=False):
             main_fout.write('#include <{}>\n'.format(h))
         main_fout.write('\n')
 
-    # Sort the available modules to make process deterministic
-    submodules = sorted(list(available_modules))
+    # Guard against building sources generated for the stable ABI with the full C API
+    if config.stable_abi:
+        version = [int(v) for v in config.stable_abi.split('.')]
+        hex_version = '0x{:02X}{:02X}0000'.format(*version)
+        main_fout.write('#if !defined(Py_LIMITED_API) || Py_LIMITED_API < {}\n'.format(hex_version))
+        main_fout.write('#error "Generated for the stable ABI of Python {}"\n'.format(
+            config.stable_abi))
+        main_fout.write('#endif\n\n')
 
     # Bind interface for enums
     main_fout.write('// Enums\n')
     for mod in submodules:
-        main_fout.write('void bind_{}_enums(py::module&);\n'.format(mod))
+        main_fout.write('void bind_{}_enums({}&);\n'.format(mod, backend.module_type))
 
     # Bind interface for functions
     main_fout.write('// Functions\n')
     for mod in submodules:
-        main_fout.write('void bind_{}_functions(py::module&);\n'.format(mod))
+        main_fout.write('void bind_{}_functions({}&);\n'.format(mod, backend.module_type))
 
     # Bind interface for types
     main_fout.write('// Types\n')
     for type_ in ordered_types:
         if type_.is_excluded or type_.is_nested or type_.is_alias:
             continue
-        main_fout.write('void bind_{}(py::module&);\n'.format(type_.python_name))
-
-    # Module definition
-    main_fout.write('\nPYBIND11_MODULE({}, main) {{\n\n'.format('OCCT'))
+        main_fout.write('void bind_{}({}&);\n'.format(type_.python_name, backend.module_type))
+
+    # Guard against building sources declared free-threaded without the library option
+    if config.free_threaded and backend.free_threaded_macro:
+        main_fout.write('#if defined(Py_GIL_DISABLED) && !defined({})\n'.format(
+            backend.free_threaded_macro))
+        main_fout.write('#error "Generated for free-threaded Python: build with '
+                        'pyOCCT_FREE_THREADED=ON"\n')
+        main_fout.write('#endif\n')
+
+    # Module definition (declaring if it needs the GIL and can be loaded in subinterpreters)
+    options = ''
+    if config.free_threaded and backend.free_threaded_option:
+        options += ', ' + backend.free_threaded_option
+    if config.subinterpreters:
+        options += ', ' + backend.subinterpreter_option
+    main_fout.write('\n{}({}, main{}) {{\n\n'.format(backend.module_macro, name, options))
+
+    # Time the binding functions
+    if config.import_profile:
+        main_fout.write('ImportProfile profile;\n\n')
+
+    # Import the extensions with base classes and alias targets first
+    others = {}
+    if imports:
+        main_fout.write('// Imports\n')
+        for ext in imports:
+            others[ext] = 'ext{}'.format(ext)
+            main_fout.write(backend.import_module(others[ext], 'OCCT.' + ext))
+            main_fout.write('\n')
+        main_fout.write('\n')
 
-    # Register the submodules
+    # Register the submodules (kept to pass them to the binding functions if registered in
+    # order)
+    ordered = config.ordered_registration
+    variables = dict([(smod, 'mod_' + smod if ordered else 'main') for smod in submodules])
     main_fout.write('// Submodules\n')
     for smod in submodules:
         doc = 'The {} module.'.format(smod)
         txt = 'main.def_submodule(\"{}\", \"{}\");\n'.format(smod, doc)
+        if ordered:
+            txt = '{} {} = {}'.format(backend.module_type, variables[smod], txt)
         main_fout.write(txt)
     main_fout.write('\n')
 
+    def write_call(kind, mod, name, txt):
+        if config.import_profile:
+            if ordered:
+                obj = variables[mod]
+            else:
+                obj = 'main.attr(\"{}\")'.format(mod)
+            txt = 'profile.run(\"{}\", \"{}\", \"{}\", {}, [&]() {{ {} }});'.format(
+                kind, mod, name, obj, txt)
+        main_fout.write(txt)
+        main_fout.write('\n')
+
     # Bind enums
     main_fout.write('// Enums\n')
     for mod in submodules:
-        main_fout.write('bind_{}_enums(main);\n'.format(mod))
+        write_call('enums', mod, mod, 'bind_{}_enums({});'.format(mod, variables[mod]))
 
     # Bind functions
     main_fout.write('// Functions\n')
     for mod in submodules:
-        main_fout.write('bind_{}_functions(main);\n'.format(mod))
+        write_call('functions', mod, mod, 'bind_{}_functions({});'.format(mod, variables[mod]))
 
-    # Bind types
-    main_fout.write('// Types\n')
-    for type_ in ordered_types:
-        if type_.is_excluded or type_.is_nested or type_.is_alias:
-            continue
-        main_fout.write('bind_{}(main);\n'.format(type_.python_name))
-
-    # Aliases
-    main_fout.write('// Aliases\n')
-    for typedef in ordered_typedefs:
-        if typedef.is_excluded or not typedef.is_alias:
+    # Aliases (sorted by module and name so the output is independent of parse order)
+    aliases = [t for t in ordered_typedefs if t.is_alias]
+    aliases.sort(key=lambda t: (t.module_name, t.python_name))
+    alias_statements = OrderedDict()
+    for typedef in aliases:
+        if typedef.is_excluded:
             continue
         other = typedef.alias
         if other.is_excluded:
@@ -359,18 +1286,88 @@ def generate_bindings(parser, config, path, remove=False):
         # Hack until OCCT fixes missing include guard...
         if typedef.python_name == 'BRepExtrema_MapOfIntegerPackedMapOfInteger':
             continue
-        txt = 'main.attr(\"{}\").attr(\"{}\") = main.attr(\"{}\").attr(\"{}\");\n'.format(
-            typedef.module_name,
-            typedef.python_name,
-            other.module_name,
-            other.python_name)
-        main_fout.write(txt)
+        other_var = None
+        if other.module_name not in modules:
+            # Skip if the other extension is not imported by this one
+            other_ext = model.module_extensions.get(other.module_name)
+            other_var = others.get(other_ext)
+            if other_var is None:
+                log.emit('skip_alias', typedef.register_name, typedef.module_name,
+                         'extension {} of {} is not imported by {}'.format(
+                             other_ext, other.register_name, name))
+                continue
+        if ordered and other_var is None:
+            value = '{}.attr(\"{}\")'.format(variables[other.module_name], other.python_name)
+            txt = backend.set_attr(variables[typedef.module_name], typedef.python_name, value)
+        elif ordered:
+            value = '{}.attr(\"{}\").attr(\"{}\")'.format(other_var, other.module_name,
+                                                           other.python_name)
+            txt = backend.set_attr(variables[typedef.module_name], typedef.python_name, value)
+        else:
+            txt = backend.alias(typedef.module_name, typedef.python_name, other.module_name,
+                                other.python_name, other_var=other_var)
+        if other_var is not None and config.lazy_types:
+            # Bound later so import the other extension where it is used
+            txt = backend.import_module(other_var, 'OCCT.' + other_ext) + ' ' + txt
+        alias_statements[typedef] = txt
+
+    # Bind types on first access
+    if config.lazy_types:
+        write_lazy_types(main_fout, model, submodules, alias_statements, backend)
+        if config.import_profile:
+            main_fout.write('profile.finish(main);\n')
+        main_fout.write('}\n')
+        main_fout.close()
+        return fname
+
+    # Bind types
+    main_fout.write('// Types\n')
+    for type_ in ordered_types:
+        if type_.is_excluded or type_.is_nested or type_.is_alias:
+            continue
+        write_call('type', type_.module_name, type_.python_name,
+                   'bind_{}({});'.format(type_.python_name, variables[type_.module_name]))
 
+    main_fout.write('// Aliases\n')
+    for typedef, txt in alias_statements.items():
+        write_call('alias', typedef.module_name, typedef.python_name, txt)
+
+    if config.import_profile:
+        main_fout.write('\nprofile.finish(main);\n')
     main_fout.write('\n}\n')
     main_fout.close()
+    return fname
+
+
+def get_minimal_includes(cursors, module_includes, extra_includes, config, graph):
+    """
+    Get the headers a module source needs. Types are only looked up in the members that are
+    bound and headers already included by another header of the source are removed.
 
+    :param list(pybinder.wrap.CursorWrapper) cursors: The cursors bound in the source.
+    :param list(str) module_includes: The headers of the cursors.
+    :param list(str) extra_includes: The extra headers of the cursors.
+    :param pybinder.configure.Configurator config:
+    :param pybinder.includes.IncludeGraph graph: The include graph.
 
-def generate_module(output_dir, name, enums, functions, types, config):
+    :return: The forward declared type, module, and extra includes.
+    :rtype: tuple(list(str), list(str), list(str))
+    """
+    bound = []
+    for cursor in cursors:
+        bound += get_bound_cursors(cursor)
+    _, fwd_includes = get_includes_for_cursors(bound)
+    fwd_includes = [h for h in fwd_includes if h not in module_includes and
+                    config.is_available_header(h)]
+
+    # Keep the order so the groups can be written as before
+    kept = set(graph.minimal(fwd_includes + module_includes + extra_includes))
+    return ([h for h in fwd_includes if h in kept],
+            [h for h in module_includes if h in kept],
+            [h for h in extra_includes if h in kept])
+
+
+def generate_module(output_dir, name, enums, functions, types, config, shard=1, graph=None):
     """
 
     :param output_dir:
@@ -379,13 +1376,19 @@ def generate_module(output_dir, name, enums, functions, types, config):
     :param list(pybinder.wrap.FunctionWrapper) functions:
     :param list(pybinder.wrap.ClassWrapper) types:
     :param config:
+    :param int shard: The shard number of the module. Only the first shard binds the enums and
+        functions of the module.
+    :param pybinder.includes.IncludeGraph graph: If provided, only the headers for the bound
+        members are included and headers already included by another one are removed.
 
-    :return:
+    :return: The source file name.
+    :rtype: str
     """
-    fname = '.'.join([name, 'cxx'])
-    fdir = '/'.join([output_dir, fname])
-
-    fout = open(fdir, 'w')
+    if shard == 1:
+        fname = '.'.join([name, 'cxx'])
+    else:
+        fname = '{}_{}.cxx'.format(name, shard)
+    fout = open_source_file(output_dir, fname)
 
     # Preamble
     fout.write(config.preamble)
@@ -413,6 +1416,30 @@ def generate_module(output_dir, name, enums, functions, types, config):
     module_includes = [h for h in module_includes if config.is_available_header(h)]
     fwd_includes = [h for h in fwd_includes if config.is_available_header(h)]
 
+    # Extra includes
+    extra_includes = set()
+    for cursor in types:
+        for h in cursor.extra_includes:
+            extra_includes.add(h)
+        if not cursor.is_typedef_decl:
+            for nklass in cursor.nested_classes:
+                for h in nklass.extra_includes:
+                    extra_includes.add(h)
+    extra_includes = sorted(extra_includes)
+
+    # Minimal include sets
+    if graph is not None and name not in config.full_includes:
+        full = fwd_includes + module_includes + extra_includes
+        fwd_includes, module_includes, extra_includes = get_minimal_includes(
+            cursors, module_includes, extra_includes, config, graph)
+        minimal = fwd_includes + module_includes + extra_includes
+        graph.stats['before'] += graph.preprocessed_bytes(full)
+        graph.stats['after'] += graph.preprocessed_bytes(minimal)
+        graph.stats['scanned_before'] += graph.scanned_bytes(full)
+        graph.stats['scanned_after'] += graph.scanned_bytes(minimal)
+        graph.stats['includes_before'] += len(full)
+        graph.stats['includes_after'] += len(minimal)
+
     # Forward declared type includes
     if fwd_includes:
         fout.write('// Includes for needed types\n')
@@ -427,38 +1454,50 @@ def generate_module(output_dir, name, enums, functions, types, config):
     fout.write('\n')
 
     # Extra includes
-    extra_includes = set()
-    for cursor in types:
-        for h in cursor.extra_includes:
-            extra_includes.add(h)
-        if not cursor.is_typedef_decl:
-            for nklass in cursor.nested_classes:
-                for h in nklass.extra_includes:
-                    extra_includes.add(h)
     if extra_includes:
         fout.write('// Extra includes\n')
         for h in extra_includes:
             fout.write('#include <{}>\n'.format(h))
         fout.write('\n')
 
+    # Template instantiations compiled once in their own source
+    backend = get_backend(config.backend)
+    if config.explicit_instantiation:
+        instances = get_instantiations(types)
+        if instances:
+            fout.write('// Explicit instantiations\n')
+            for func, parameters, _canonical in instances:
+                fout.write('extern {}\n'.format(instantiation(func, parameters, backend)))
+            fout.write('\n')
+    if shard != 1:
+        bind_types(types, fout, config)
+        fout.close()
+        return fname
+
     # Bind enums
-    txt = 'void bind_{}_enums(py::module &main){{\n\n'.format(name)
-    fout.write(txt)
-    txt = 'py::module mod = main.attr(\"{}\");\n\n'.format(name)
-    fout.write(txt)
+    if config.ordered_registration:
+        fout.write('void bind_{}_enums({} &mod){{\n\n'.format(name, backend.module_type))
+    else:
+        txt = 'void bind_{}_enums({} &main){{\n\n'.format(name, backend.module_type)
+        fout.write(txt)
+        fout.write(backend.get_module(name))
+        fout.write('\n\n')
     for enum in enums:
-        bind_enum(enum, fout)
+        bind_enum(enum, fout, config)
     fout.write('}\n\n')
 
     # Bind functions
-    txt = 'void bind_{}_functions(py::module &main){{\n\n'.format(name)
-    fout.write(txt)
-    txt = 'py::module mod = main.attr(\"{}\");\n\n'.format(name)
-    fout.write(txt)
+    if config.ordered_registration:
+        fout.write('void bind_{}_functions({} &mod){{\n\n'.format(name, backend.module_type))
+    else:
+        txt = 'void bind_{}_functions({} &main){{\n\n'.format(name, backend.module_type)
+        fout.write(txt)
+        fout.write(backend.get_module(name))
+        fout.write('\n\n')
     functions = [(f.register_name, f) for f in functions]
     functions.sort(key=operator.itemgetter(0))
     for _, func in functions:
-        bind_function(func, fout)
+        bind_function(func, fout, config)
     fout.write('}\n\n')
 
     # TODO Bind trampoline classes
@@ -466,12 +1505,26 @@ def generate_module(output_dir, name, enums, functions, types, config):
     #     for tclass in type_.get_trampolines():
     #         bind_trampoline_class(tclass, fout)
 
-    # Bind types
+    bind_types(types, fout, config)
+
+    # Close module file
+    fout.close()
+
+    return fname
+
+
+def bind_types(types, fout, config):
+    """
+    Bind the classes and typedefs of a module.
+
+    :param list(pybinder.wrap.CursorWrapper) types:
+    :param fout:
+    :param pybinder.configure.Configurator config:
+
+    :return: None.
+    """
     for type_ in types:
         if type_.is_class_decl or type_.is_struct_decl:
             bind_class(type_, fout, config)
         elif type_.is_typedef_decl:
-            bind_typedef(type_, fout)
-
-    # Close module file
-    fout.close()
+            bind_typedef(type_, fout, config)
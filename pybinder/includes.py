@@ -0,0 +1,282 @@
+import os
+import re
+from collections import Counter, defaultdict
+
+__all__ = ['IncludeGraph', 'get_bound_cursors']
+
+_directive_re = re.compile(r'^[ \t]*#[ \t]*(\w+)[ \t]*(.*)$', re.MULTILINE)
+_header_re = re.compile(r'[<"]([^>"]+)[>"]')
+
+
+def _is_guarded(directives):
+    """
+    :param list(tuple(str, str)) directives: The directives of a file.
+
+    :return: True if the file is wrapped in an include guard: an "#ifndef X" and "#define X"
+        first and the matching "#endif" last.
+    :rtype: bool
+    """
+    if len(directives) < 3 or directives[0][0] != 'ifndef' or directives[1][0] != 'define':
+        return False
+    macro = directives[0][1].split()
+    if not macro or directives[1][1].split()[:1] != macro[:1]:
+        return False
+    depth = 0
+    for i, (directive, _) in enumerate(directives):
+        if directive in ('if', 'ifdef', 'ifndef'):
+            depth += 1
+        elif directive == 'endif':
+            depth -= 1
+            if depth == 0:
+                return i == len(directives) - 1
+    return False
+
+
+def _guard_bytes(txt, directives):
+    """
+    :param str txt: The text of a file.
+    :param list(tuple(str, str)) directives: The directives of the file.
+
+    :return: The bytes up to the end of the "#pragma once" or the "#define" of the include guard
+        of the file, or None if it has neither.
+    :rtype: int or None
+    """
+    if directives and directives[0][0] == 'pragma' and directives[0][1].split()[:1] == ['once']:
+        index = 0
+    elif _is_guarded(directives):
+        index = 1
+    else:
+        return None
+    for i, match in enumerate(_directive_re.finditer(txt)):
+        if i == index:
+            return len(txt[:match.end()].encode('utf-8', 'replace'))
+    return None
+
+
+def scan_header(fn):
+    """
+    Find the headers a file always includes and the size of its guard. Includes inside
+    conditional blocks are skipped except for the block of an include guard.
+
+    :param str fn: The file.
+
+    :return: The included header names and the bytes read down to the guard (None if the file
+        has no guard).
+    :rtype: tuple(list(str), int or None)
+    """
+    try:
+        with open(fn, errors='replace') as fin:
+            txt = fin.read()
+    except (IOError, OSError):
+        return [], None
+
+    directives = _directive_re.findall(txt)
+    guarded = _is_guarded(directives)
+
+    includes = []
+    depth = 0
+    for i, (directive, rest) in enumerate(directives):
+        if directive in ('if', 'ifdef', 'ifndef'):
+            if i == 0 and guarded:
+                continue
+            depth += 1
+        elif directive == 'endif':
+            if depth:
+                depth -= 1
+        elif directive == 'include' and depth == 0:
+            match = _header_re.search(rest)
+            if match:
+                includes.append(os.path.basename(match.group(1)))
+    return includes, _guard_bytes(txt, directives)
+
+
+def scan_includes(fn):
+    """
+    Find the headers a file always includes. Includes inside conditional blocks are skipped
+    except for the block of an include guard.
+
+    :param str fn: The file.
+
+    :return: The included header names.
+    :rtype: list(str)
+    """
+    return scan_header(fn)[0]
+
+
+class IncludeGraph(object):
+    """
+    The headers each header includes as seen by the parser, keyed by file name.
+    """
+
+    def __init__(self):
+        self.edges = defaultdict(set)
+        self.sizes = {}
+        self.guard_sizes = {}
+        self._closures = {}
+
+        # Preprocessed and scanned bytes and include directives of the generated sources with the
+        # full and the minimal include sets, summed over the sources
+        self.stats = Counter()
+
+    @classmethod
+    def from_translation_unit(cls, tu):
+        """
+        Build the graph from the inclusions of a parsed translation unit.
+
+        :param clang.cindex.TranslationUnit tu: The translation unit.
+
+        :return: The graph.
+        :rtype: pybinder.includes.IncludeGraph
+        """
+        graph = cls()
+        paths = {}
+        for inc in tu.get_includes():
+            name = os.path.basename(inc.include.name)
+            paths.setdefault(name, inc.include.name)
+            if inc.depth > 1 and inc.source is not None:
+                graph.edges[os.path.basename(inc.source.name)].add(name)
+
+        # The parser reports each header only where it was first included so add the
+        # unconditional includes of each header that the parser also saw
+        for name, path in paths.items():
+            try:
+                graph.sizes[name] = os.path.getsize(path)
+            except OSError:
+                graph.sizes[name] = 0
+            includes, guard_size = scan_header(path)
+            if guard_size is not None:
+                graph.guard_sizes[name] = guard_size
+            for h in includes:
+                if h in paths:
+                    graph.edges[name].add(h)
+        return graph
+
+    def add(self, name, includes, size=0):
+        """
+        Add a header that is not seen by the parser, like a generated header.
+
+        :param str name: The header.
+        :param list(str) includes: The headers it includes.
+        :param int size: The size of the header in bytes.
+
+        :return: None.
+        """
+        self.edges[name].update(includes)
+        self.sizes[name] = size
+        self._closures.clear()
+
+    def __contains__(self, name):
+        return name in self.sizes
+
+    def closure(self, name):
+        """
+        :param str name: The header.
+
+        :return: The headers included directly or indirectly by the header, including itself.
+        :rtype: frozenset(str)
+        """
+        if name in self._closures:
+            return self._closures[name]
+
+        seen = {name}
+        stack = [name]
+        while stack:
+            for h in self.edges.get(stack.pop(), ()):
+                if h not in seen:
+                    seen.add(h)
+                    stack.append(h)
+        self._closures[name] = frozenset(seen)
+        return self._closures[name]
+
+    def minimal(self, headers):
+        """
+        Remove the headers that another header of the list already includes. Headers unknown to
+        the graph are always kept.
+
+        :param list(str) headers: The headers in include order.
+
+        :return: The remaining headers in include order.
+        :rtype: list(str)
+        """
+        kept = []
+        for h in headers:
+            if h not in self:
+                kept.append(h)
+                continue
+            covered = False
+            for other in headers:
+                if other == h or other not in self:
+                    continue
+                if h in self.closure(other):
+                    # Headers including each other keep the first one
+                    if other in self.closure(h) and headers.index(h) < headers.index(other):
+                        continue
+                    covered = True
+                    break
+            if not covered:
+                kept.append(h)
+        return kept
+
+    def preprocessed_bytes(self, headers):
+        """
+        Estimate the bytes the preprocessor reads for a list of headers. Each header is counted
+        once since they all have include guards.
+
+        :param list(str) headers: The headers.
+
+        :return: The size in bytes.
+        :rtype: int
+        """
+        files = set()
+        for h in headers:
+            files.update(self.closure(h))
+        return sum([self.sizes.get(h, 0) for h in files])
+
+    def scanned_bytes(self, headers):
+        """
+        Estimate the bytes the preprocessor scans for a list of headers if every include
+        directive opens its header, as without the optimization that skips the files with an
+        include guard already seen. Each header is read in full once and down to the end of its
+        guard ("#pragma once" or the "#define" of an include guard) for every other directive
+        naming it. Headers without a guard are read in full every time. The sizes come from the
+        files, not from a measurement of the preprocessor.
+
+        :param list(str) headers: The headers.
+
+        :return: The size in bytes.
+        :rtype: int
+        """
+        files = set()
+        for h in headers:
+            files.update(self.closure(h))
+        directives = Counter(headers)
+        for f in files:
+            directives.update(self.edges.get(f, ()))
+        size = 0
+        for h, n in directives.items():
+            full = self.sizes.get(h, 0)
+            size += full + (n - 1) * self.guard_sizes.get(h, full)
+        return size
+
+
+def get_bound_cursors(cursor):
+    """
+    Get the cursors whose types a binding of the cursor uses. Members that are excluded are not
+    bound so the types they reference do not need to be included.
+
+    :param pybinder.wrap.CursorWrapper cursor: The cursor.
+
+    :return: The cursors.
+    :rtype: list(pybinder.wrap.CursorWrapper)
+    """
+    if cursor.is_excluded:
+        return []
+    if not (cursor.is_class_decl or cursor.is_struct_decl):
+        return [cursor]
+
+    cursors = [b for b in cursor.bases if not b.is_excluded]
+    for items in (cursor.constructors, cursor.methods, cursor.fields, cursor.nested_enums):
+        cursors += [c for c in items if not c.is_excluded]
+    for nklass in cursor.nested_classes:
+        cursors += get_bound_cursors(nklass)
+    return cursors
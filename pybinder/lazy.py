@@ -0,0 +1,144 @@
+from pybinder.usage import _owner
+
+__all__ = ['get_type_dependencies', 'write_lazy_types']
+
+
+def _references(cursor, lookup, found):
+    """
+    Add the bound types a cursor references to a set.
+
+    :param pybinder.wrap.CursorWrapper cursor: The cursor.
+    :param dict lookup: The bound types by cursor.
+    :param set found: The found types.
+
+    :return: None.
+    """
+    for c in cursor.walk_preorder():
+        if not c.is_type_ref:
+            continue
+        d = c.get_definition()
+        if not d.is_definition:
+            continue
+        owner = _owner(d, lookup)
+        if owner is not None:
+            found.add(owner)
+
+
+def _result_references(item, lookup, found):
+    """
+    Add the bound types in the result type of a method to a set. Parameters and bodies are
+    skipped.
+    """
+    for c in item.get_children():
+        if c.is_type_ref:
+            _references(c, lookup, found)
+
+
+def _class_dependencies(klass, lookup, before, after):
+    for base in klass.bases:
+        if base.is_excluded or base.superclass is None:
+            continue
+        owner = _owner(base.superclass, lookup)
+        if owner is not None:
+            before.add(owner)
+    for item in klass.constructors + klass.methods:
+        if item.is_excluded:
+            continue
+        for p in item.parameters:
+            if p.default_value:
+                _references(p, lookup, before)
+        _result_references(item, lookup, after)
+    for field in klass.fields:
+        if not field.is_excluded:
+            _references(field, lookup, after)
+    for nklass in klass.nested_classes:
+        if not nklass.is_excluded:
+            _class_dependencies(nklass, lookup, before, after)
+
+
+def get_type_dependencies(model):
+    """
+    Find the types each type needs when it is bound on first access. The base classes and default
+    argument types must be bound before it. The result and field types must be bound before any
+    of its methods returns one so they are bound right after it. Parameter types are not needed
+    since an argument can only be passed once its type is bound.
+
+    :param pybinder.generate.Model model: The processed model.
+
+    :return: The types to bind before and after each type.
+    :rtype: dict
+    """
+    templates = model.registered_templates
+
+    lookup = {}
+    for mod in model.submodules:
+        for type_ in model.module_types[mod]:
+            if not type_.is_excluded and not type_.is_nested:
+                lookup[type_] = type_
+
+    dependencies = {}
+    for type_ in lookup:
+        before = set()
+        after = set()
+        if type_.is_typedef_decl and type_.is_alias:
+            pass
+        elif type_.is_typedef_decl:
+            # Template arguments and the bases of the template
+            _references(type_, lookup, after)
+            template = templates.get(type_.underlying_template_name)
+            if template is not None:
+                _class_dependencies(template.klass, lookup, before, after)
+        else:
+            _class_dependencies(type_, lookup, before, after)
+        before.discard(type_)
+        after -= before
+        after.discard(type_)
+        dependencies[type_] = (before, after)
+    return dependencies
+
+
+def _names(types):
+    pairs = sorted([(t.module_name, t.python_name) for t in types])
+    return '{' + ', '.join(['{{\"{}\", \"{}\"}}'.format(*p) for p in pairs]) + '}'
+
+
+def write_lazy_types(fout, model, modules, aliases, backend, package='OCCT'):
+    """
+    Write the registration of the types that are bound on first access. Each submodule gets a
+    module "__getattr__" that binds a type with the types it needs the first time it is used,
+    a "__bind__" that does the same and returns if the type is bound, and a "__dir__" and
+    "__all__" that list all of them. Subclasses are not bound with their bases, so polymorphic
+    results are returned as their most derived type that has been bound.
+
+    :param fout: The main source file.
+    :param pybinder.generate.Model model: The processed model.
+    :param list(str) modules: The modules of the extension.
+    :param dict aliases: The alias statement of each alias typedef to bind.
+    :param pybinder.backend.Backend backend: The backend.
+    :param str package: The package the modules are imported from.
+
+    :return: None.
+    """
+    dependencies = get_type_dependencies(model)
+    fout.write('// Types bound on first access\n')
+    for mod in modules:
+        entries = []
+        for type_ in model.module_types[mod]:
+            if type_.is_excluded or type_.is_nested:
+                continue
+            if type_.is_alias:
+                if type_ not in aliases:
+                    continue
+                bind = '[]({} &main) {{ {} }}'.format(backend.module_type, aliases[type_])
+            else:
+                bind = 'bind_{}'.format(type_.python_name)
+            before, after = dependencies.get(type_, ((), ()))
+            entries.append('\t{{\"{}\", {}, {}, {}}},\n'.format(
+                type_.python_name, bind, _names(before), _names(after)))
+        if not entries:
+            continue
+        fout.write('static std::vector<LazyType> types_{} = {{\n'.format(mod))
+        fout.write(''.join(entries))
+        fout.write('};\n')
+        fout.write('bind_lazy_types(main, \"{}\", \"{}\", types_{});\n\n'.format(package, mod,
+                                                                                mod))
@@ -2,6 +2,8 @@ import os
 
 from clang.cindex import Index, TranslationUnit
 
+from pybinder.includes import IncludeGraph
+from pybinder.profile import counters
 from pybinder.wrap import CursorWrapper
 
 
@@ -37,9 +39,10 @@ class Parser(object):
             include_file = self.config.header_file
             potential_includes = os.listdir(path)
 
-        potential_includes.sort(key=str.lower)
+        # Break ties on case so the order does not depend on the file system listing
+        potential_includes.sort(key=lambda h: (h.lower(), h))
 
-        fout = open(include_file, 'w')
+        fout = open(include_file, 'w', newline='\n')
         if self.config.platform == 'win32':
             fout.write('#include <windows.h>\n')
         for h in potential_includes:
@@ -68,6 +71,15 @@ class Parser(object):
         tu = indx.parse(header_file, args, options=TranslationUnit.PARSE_INCOMPLETE)
         self._tu = tu
 
+    def get_include_graph(self):
+        """
+        Get the include graph of the parsed headers.
+
+        :return: The include graph.
+        :rtype: pybinder.includes.IncludeGraph
+        """
+        return IncludeGraph.from_translation_unit(self._tu)
+
     def save(self, filename):
         """
 
@@ -85,12 +97,28 @@ class Parser(object):
         indx = Index.create()
         self._tu = TranslationUnit.from_ast_file(filename, indx)
 
-    def dump_diagnostics(self, severity=4):
+    def dump_diagnostics(self, severity=4, log=None):
         """
 
         :param severity:
+        :param pybinder.events.EventLog log: If provided, diagnostics are recorded as events
+            rather than printed.
         :return:
         """
+        if log is not None:
+            other_issues = 0
+            for diag in self._tu.diagnostics:
+                if diag.severity < severity:
+                    other_issues += 1
+                    continue
+                file = diag.location.file
+                log.emit('diagnostic', file.name if file else '', reason=diag.spelling,
+                         severity=diag.severity, line=diag.location.line)
+            msg = 'Parsed with {} issues with lower than {} severity not recorded.'.format(
+                other_issues, severity)
+            log.info(msg)
+            return
+
         print('----------------------')
         print('DIAGNOSTIC INFORMATION')
         print('----------------------')
@@ -117,6 +145,8 @@ class Parser(object):
         :return:
         """
         for c in self._tu.cursor.get_children():
+            if counters.enabled:
+                counters['cursors_visited'] += 1
             yield CursorWrapper(c)
 
     def walk_preorder(self):
@@ -126,4 +156,6 @@ class Parser(object):
         :return:
         """
         for c in self._tu.cursor.walk_preorder():
+            if counters.enabled:
+                counters['cursors_visited'] += 1
             yield CursorWrapper(c)
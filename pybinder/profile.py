@@ -0,0 +1,170 @@
+import json
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+__all__ = ['Profiler', 'counters']
+
+
+class _Counters(Counter):
+    """
+    Counters that are only updated while a profiler is running. Callers on hot paths check
+    "enabled" first so nothing is counted otherwise.
+    """
+
+    enabled = False
+
+
+# Counters updated by the parser and the cursor wrappers
+counters = _Counters()
+
+
+class _CountingLibrary(object):
+    """
+    Proxy for the libclang library that counts function calls.
+
+    :param lib: The loaded libclang library.
+    """
+
+    def __init__(self, lib):
+        self._lib = lib
+
+    def __getattr__(self, name):
+        func = getattr(self._lib, name)
+        if not callable(func):
+            return func
+
+        def call(*args):
+            if counters.enabled:
+                counters['libclang_calls'] += 1
+            return func(*args)
+
+        # Cache so the lookup only happens once per function
+        setattr(self, name, call)
+        return call
+
+
+def _peak_rss():
+    """
+    :return: The peak resident set size of the process so far in bytes, or None if not
+        available.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes while macOS reports bytes
+    if sys.platform != 'darwin':
+        rss *= 1024
+    return rss
+
+
+class Profiler(object):
+    """
+    Collect time, memory, and counters for the stages of the generator pipeline.
+
+    :param bool enabled: If False then stages are not profiled.
+    :param bool trace_memory: If True then use tracemalloc to record the peak Python memory of each
+        stage. This slows down the pipeline.
+    """
+
+    def __init__(self, enabled=True, trace_memory=True):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    def start(self):
+        """
+        Reset the counters and start tracing memory if requested.
+
+        :return: None.
+        """
+        counters.clear()
+        counters.enabled = self.enabled
+        if self.enabled and self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self):
+        """
+        Stop counting and tracing memory.
+
+        :return: None.
+        """
+        counters.enabled = False
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @staticmethod
+    def instrument_libclang():
+        """
+        Count calls into libclang. This must be called before parsing and adds some overhead to
+        every call.
+
+        :return: None.
+        """
+        from clang.cindex import conf
+
+        lib = conf.lib
+        if not isinstance(lib, _CountingLibrary):
+            conf.lib = _CountingLibrary(lib)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Profile a stage of the pipeline.
+
+        :param str name: The stage name.
+
+        :return: None.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        before = Counter(counters)
+        rss = _peak_rss()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            # The peak of the whole process so far and how much the stage raised it (zero if the
+            # stage stayed below the peak of an earlier one)
+            data = {'name': name, 'seconds': elapsed, 'process_peak_rss': _peak_rss()}
+            if rss is not None:
+                data['peak_rss_increase'] = data['process_peak_rss'] - rss
+            if tracemalloc.is_tracing():
+                data['peak_python_memory'] = tracemalloc.get_traced_memory()[1]
+            delta = Counter(counters)
+            delta.subtract(before)
+            data['counters'] = dict(sorted((k, v) for k, v in delta.items() if v))
+            self.stages.append(data)
+
+    def report(self):
+        """
+        :return: The profile of all stages and the total counters.
+        :rtype: dict
+        """
+        return {'stages': self.stages,
+                'total_seconds': sum(s['seconds'] for s in self.stages),
+                'counters': dict(sorted(counters.items()))}
+
+    def write(self, fn):
+        """
+        Write the report to a JSON file.
+
+        :param str fn: The output file name.
+
+        :return: None.
+        """
+        with open(fn, 'w', newline='\n') as fout:
+            json.dump(self.report(), fout, indent=2, sort_keys=True)
+            fout.write('\n')
@@ -0,0 +1,183 @@
+from pybinder.usage import _owner
+
+__all__ = ['get_registration_dependencies', 'order_registration']
+
+
+def _template_dependencies(template, lookup, found, visited):
+    """
+    Add the bound types the bases of a class template instantiation need to a set. Template
+    instantiations registered as bases of the template are followed.
+    """
+    if template is None or id(template) in visited:
+        return
+    visited.add(id(template))
+    _base_dependencies(template.klass, lookup, found, visited)
+
+
+def _base_dependencies(klass, lookup, found, visited, instances=None):
+    for base in klass.bases:
+        if base.is_excluded:
+            continue
+        if base.superclass is not None:
+            owner = _owner(base.superclass, lookup)
+            if owner is not None:
+                found.add(owner)
+    for base in klass.extra_bases:
+        if instances is not None and base.is_templated:
+            # The typedef binding the same instantiation registers it first
+            typedef = instances.get(base.type_canonical_spelling)
+            if typedef is not None:
+                found.add(typedef)
+        _template_dependencies(base.template, lookup, found, visited)
+    for nklass in klass.nested_classes:
+        if not nklass.is_excluded:
+            _base_dependencies(nklass, lookup, found, visited, instances)
+
+
+def get_registration_dependencies(model):
+    """
+    Find the types that must be registered before each type. These are the types of its base
+    classes (including the bases of the class templates it instantiates) and the typedef of any
+    template instantiation it uses as a base so the instantiation is registered by its typedef.
+
+    :param pybinder.generate.Model model: The processed model.
+
+    :return: The types to register before each type.
+    :rtype: dict
+    """
+    templates = model.registered_templates
+
+    lookup = {}
+    instances = {}
+    for type_ in model.ordered_types:
+        if type_.is_excluded or type_.is_nested or type_.is_alias:
+            continue
+        lookup[type_] = type_
+        if type_.is_typedef_decl:
+            instances[type_.canonical_type_name] = type_
+
+    dependencies = {}
+    for type_ in lookup:
+        found = set()
+        if type_.is_typedef_decl:
+            _template_dependencies(templates.get(type_.underlying_template_name), lookup, found,
+                                   set())
+        else:
+            _base_dependencies(type_, lookup, found, set(), instances)
+        found.discard(type_)
+        dependencies[type_] = found
+    return dependencies
+
+
+def _extension(model, mod):
+    return model.module_extensions.get(mod, '')
+
+
+def _mark_bases(klass, registered, shared, ext, counts):
+    for base in klass.extra_bases:
+        if not base.is_templated:
+            continue
+        key = base.type_canonical_spelling
+        if key in registered[ext]:
+            base.is_registered = True
+            counts['removed'] += 1
+        else:
+            registered[ext].add(key)
+            base.is_shared = len(shared.get(key, ())) > 1
+            counts['shared'] += int(base.is_shared)
+    for nklass in klass.nested_classes:
+        if not nklass.is_excluded:
+            _mark_bases(nklass, registered, shared, ext, counts)
+
+
+def _instances(klass, ext, shared):
+    for base in klass.extra_bases:
+        if base.is_templated:
+            shared.setdefault(base.type_canonical_spelling, set()).add(ext)
+    for nklass in klass.nested_classes:
+        if not nklass.is_excluded:
+            _instances(nklass, ext, shared)
+
+
+def order_registration(model, config, log):
+    """
+    Order the types so every type is registered after the types it needs and decide at
+    generation time which template instantiations a class registers as a base. The types are
+    sorted topologically over the base classes, the bases of the instantiated class templates,
+    and the typedefs of the instantiations used as bases, keeping the parse order otherwise. The
+    first class of an extension using an instantiation as a base registers it and the others
+    leave it out. An instantiation also registered by another extension is still checked when
+    the module is imported.
+
+    :param pybinder.generate.Model model: The processed model.
+    :param pybinder.configure.Configurator config:
+    :param pybinder.events.EventLog log:
+
+    :return: None.
+
+    :raise RuntimeError: If the types are also bound on first access.
+    """
+    if config.lazy_types:
+        raise RuntimeError('Ordered registration cannot be used with lazy types since these are '
+                           'registered on first access.')
+
+    dependencies = get_registration_dependencies(model)
+    index = {}
+    for i, type_ in enumerate(model.ordered_types):
+        index.setdefault(type_, i)
+
+    # Depth first search in parse order
+    ordered = []
+    done = set()
+    active = set()
+    cycles = []
+
+    def visit(type_):
+        if type_ in done:
+            return
+        if type_ in active:
+            cycles.append(type_)
+            return
+        active.add(type_)
+        for dep in sorted(dependencies.get(type_, ()), key=index.get):
+            visit(dep)
+        active.discard(type_)
+        done.add(type_)
+        ordered.append(type_)
+
+    for type_ in model.ordered_types:
+        visit(type_)
+
+    for type_ in cycles:
+        log.emit('registration_cycle', type_.register_name, type_.module_name,
+                 'registered before one of its bases')
+
+    moved = len([t for t, u in zip(ordered, model.ordered_types) if t is not u])
+    model.ordered_types = ordered
+
+    # Instantiations registered by the typedefs and by the bases of each extension
+    shared = {}
+    for type_ in ordered:
+        if type_.is_excluded or type_.is_nested or type_.is_alias:
+            continue
+        ext = _extension(model, type_.module_name)
+        if type_.is_typedef_decl:
+            shared.setdefault(type_.canonical_type_name, set()).add(ext)
+        else:
+            _instances(type_, ext, shared)
+
+    counts = {'removed': 0, 'shared': 0}
+    registered = {}
+    for type_ in ordered:
+        if type_.is_excluded or type_.is_nested or type_.is_alias:
+            continue
+        ext = _extension(model, type_.module_name)
+        registered.setdefault(ext, set())
+        if type_.is_typedef_decl:
+            registered[ext].add(type_.canonical_type_name)
+        else:
+            _mark_bases(type_, registered, shared, ext, counts)
+
+    log.emit('registration_order', 'OCCT', reason='types registered after their bases',
+             moved=moved, cycles=len(cycles), removed_bases=counts['removed'],
+             checked_bases=counts['shared'])
@@ -0,0 +1,402 @@
+import os
+
+__all__ = ['write_corpus']
+
+# Stand-ins for the OCCT foundation headers so a corpus can be parsed without an OCCT install
+_foundation = {
+    'Standard_Transient.hxx': """#pragma once
+
+class Standard_Transient
+{
+public:
+  Standard_Transient() : myRefCount(0) {}
+  virtual ~Standard_Transient() {}
+  void IncrementRefCounter() { ++myRefCount; }
+  int DecrementRefCounter() { return --myRefCount; }
+  int GetRefCount() const { return myRefCount; }
+
+private:
+  int myRefCount;
+};
+""",
+    'Standard_Handle.hxx': """#pragma once
+
+#include <Standard_Transient.hxx>
+
+namespace opencascade
+{
+  template <class T>
+  class handle
+  {
+  public:
+    handle() : myEntity(0) {}
+    handle(const T* theObject) : myEntity(const_cast<T*>(theObject)) {}
+    T* get() const { return myEntity; }
+    T* operator->() const { return myEntity; }
+
+  private:
+    T* myEntity;
+  };
+}
+""",
+    'NCollection_BaseSequence.hxx': """#pragma once
+
+class NCollection_BaseSequence
+{
+public:
+  NCollection_BaseSequence() : mySize(0) {}
+  int Size() const { return mySize; }
+  bool IsEmpty() const { return mySize == 0; }
+
+protected:
+  int mySize;
+};
+""",
+    'Standard_TypeDef.hxx': """#pragma once
+
+typedef int Standard_Integer;
+typedef double Standard_Real;
+typedef bool Standard_Boolean;
+""",
+    'NCollection_Array1.hxx': """#pragma once
+
+#include <Standard_TypeDef.hxx>
+
+template <class TheItemType>
+class NCollection_Array1
+{
+public:
+  NCollection_Array1() : myLowerBound(1), myUpperBound(0), myData(0) {}
+  NCollection_Array1(const Standard_Integer theLower, const Standard_Integer theUpper)
+  : myLowerBound(theLower), myUpperBound(theUpper), myData(new TheItemType[theUpper - theLower + 1]) {}
+  NCollection_Array1(const NCollection_Array1& theOther)
+  : myLowerBound(theOther.myLowerBound), myUpperBound(theOther.myUpperBound), myData(0)
+  {
+    if (theOther.Length() > 0)
+    {
+      myData = new TheItemType[theOther.Length()];
+      for (Standard_Integer i = 0; i < theOther.Length(); ++i)
+        myData[i] = theOther.myData[i];
+    }
+  }
+  ~NCollection_Array1() { delete[] myData; }
+  Standard_Integer Length() const { return myUpperBound - myLowerBound + 1; }
+  Standard_Boolean IsEmpty() const { return Length() == 0; }
+  Standard_Integer Lower() const { return myLowerBound; }
+  Standard_Integer Upper() const { return myUpperBound; }
+  const TheItemType& Value(const Standard_Integer theIndex) const { return myData[theIndex - myLowerBound]; }
+  TheItemType& ChangeValue(const Standard_Integer theIndex) { return myData[theIndex - myLowerBound]; }
+  void SetValue(const Standard_Integer theIndex, const TheItemType& theItem) { myData[theIndex - myLowerBound] = theItem; }
+  void Resize(const Standard_Integer theLower, const Standard_Integer theUpper, const Standard_Boolean theToCopyData)
+  {
+    TheItemType* aData = theUpper < theLower ? 0 : new TheItemType[theUpper - theLower + 1];
+    for (Standard_Integer i = 0; theToCopyData && i < Length() && i <= theUpper - theLower; ++i)
+      aData[i] = myData[i];
+    delete[] myData;
+    myData = aData;
+    myLowerBound = theLower;
+    myUpperBound = theUpper;
+  }
+
+private:
+  NCollection_Array1& operator=(const NCollection_Array1& theOther);
+
+  Standard_Integer myLowerBound;
+  Standard_Integer myUpperBound;
+  TheItemType* myData;
+};
+""",
+    'NCollection_Array2.hxx': """#pragma once
+
+#include <Standard_TypeDef.hxx>
+
+template <class TheItemType>
+class NCollection_Array2
+{
+public:
+  NCollection_Array2() : myLowerRow(1), myUpperRow(0), myLowerCol(1), myUpperCol(0), myData(0) {}
+  NCollection_Array2(const Standard_Integer theRowLower, const Standard_Integer theRowUpper,
+                     const Standard_Integer theColLower, const Standard_Integer theColUpper)
+  : myLowerRow(theRowLower), myUpperRow(theRowUpper), myLowerCol(theColLower), myUpperCol(theColUpper),
+    myData(new TheItemType[(theRowUpper - theRowLower + 1) * (theColUpper - theColLower + 1)]) {}
+  ~NCollection_Array2() { delete[] myData; }
+  Standard_Integer Length() const { return ColLength() * RowLength(); }
+  Standard_Integer ColLength() const { return myUpperRow - myLowerRow + 1; }
+  Standard_Integer RowLength() const { return myUpperCol - myLowerCol + 1; }
+  Standard_Integer LowerRow() const { return myLowerRow; }
+  Standard_Integer UpperRow() const { return myUpperRow; }
+  Standard_Integer LowerCol() const { return myLowerCol; }
+  Standard_Integer UpperCol() const { return myUpperCol; }
+  const TheItemType& Value(const Standard_Integer theRow, const Standard_Integer theCol) const { return myData[Index(theRow, theCol)]; }
+  TheItemType& ChangeValue(const Standard_Integer theRow, const Standard_Integer theCol) { return myData[Index(theRow, theCol)]; }
+  void SetValue(const Standard_Integer theRow, const Standard_Integer theCol, const TheItemType& theItem) { myData[Index(theRow, theCol)] = theItem; }
+
+private:
+  NCollection_Array2(const NCollection_Array2& theOther);
+  NCollection_Array2& operator=(const NCollection_Array2& theOther);
+  Standard_Integer Index(const Standard_Integer theRow, const Standard_Integer theCol) const
+  {
+    return (theRow - myLowerRow) * RowLength() + theCol - myLowerCol;
+  }
+
+  Standard_Integer myLowerRow;
+  Standard_Integer myUpperRow;
+  Standard_Integer myLowerCol;
+  Standard_Integer myUpperCol;
+  TheItemType* myData;
+};
+""",
+    'NCollection_Sequence.hxx': """#pragma once
+
+#include <NCollection_BaseSequence.hxx>
+
+template <class TheItemType>
+class NCollection_Sequence : public NCollection_BaseSequence
+{
+public:
+  class Iterator
+  {
+  public:
+    Iterator() : myIndex(0) {}
+    bool More() const { return myIndex > 0; }
+    void Next() { ++myIndex; }
+
+  private:
+    int myIndex;
+  };
+
+  NCollection_Sequence() {}
+  int Length() const { return mySize; }
+  void Append(const TheItemType& theItem) { (void)theItem; ++mySize; }
+  const TheItemType& First() const { return *myFirst; }
+
+private:
+  TheItemType* myFirst;
+};
+""",
+    'gp_XYZ.hxx': """#pragma once
+
+#include <Standard_TypeDef.hxx>
+
+class gp_XYZ
+{
+public:
+  gp_XYZ() : x(0.0), y(0.0), z(0.0) {}
+  gp_XYZ(const Standard_Real theX, const Standard_Real theY, const Standard_Real theZ)
+  : x(theX), y(theY), z(theZ) {}
+  Standard_Real X() const { return x; }
+  Standard_Real Y() const { return y; }
+  Standard_Real Z() const { return z; }
+  void SetCoord(const Standard_Real theX, const Standard_Real theY, const Standard_Real theZ) { x = theX; y = theY; z = theZ; }
+
+private:
+  Standard_Real x;
+  Standard_Real y;
+  Standard_Real z;
+};
+""",
+    'gp_Pnt.hxx': """#pragma once
+
+#include <gp_XYZ.hxx>
+
+class gp_Pnt
+{
+public:
+  gp_Pnt() {}
+  gp_Pnt(const gp_XYZ& theCoord) : coord(theCoord) {}
+  gp_Pnt(const Standard_Real theX, const Standard_Real theY, const Standard_Real theZ)
+  : coord(theX, theY, theZ) {}
+  Standard_Real X() const { return coord.X(); }
+  Standard_Real Y() const { return coord.Y(); }
+  Standard_Real Z() const { return coord.Z(); }
+  const gp_XYZ& XYZ() const { return coord; }
+  void SetXYZ(const gp_XYZ& theCoord) { coord = theCoord; }
+
+private:
+  gp_XYZ coord;
+};
+""",
+    'TColStd_Array1OfReal.hxx': """#pragma once
+
+#include <NCollection_Array1.hxx>
+
+typedef NCollection_Array1<Standard_Real> TColStd_Array1OfReal;
+""",
+    'TColStd_Array2OfReal.hxx': """#pragma once
+
+#include <NCollection_Array2.hxx>
+
+typedef NCollection_Array2<Standard_Real> TColStd_Array2OfReal;
+""",
+    'TColgp_Array1OfPnt.hxx': """#pragma once
+
+#include <NCollection_Array1.hxx>
+#include <gp_Pnt.hxx>
+
+typedef NCollection_Array1<gp_Pnt> TColgp_Array1OfPnt;
+""",
+}
+
+_enum = """#pragma once
+
+enum {pkg}_Orientation
+{{
+  {pkg}_FORWARD,
+  {pkg}_REVERSED,
+  {pkg}_INTERNAL,
+  {pkg}_EXTERNAL
+}};
+"""
+
+_point = """#pragma once
+
+#include <{pkg}_Orientation.hxx>
+
+class {pkg}_Point
+{{
+public:
+  {pkg}_Point() : myX(0.0), myY(0.0), myZ(0.0) {{}}
+  {pkg}_Point(const double theX, const double theY, const double theZ)
+  : myX(theX), myY(theY), myZ(theZ) {{}}
+  double X() const {{ return myX; }}
+  double Y() const {{ return myY; }}
+  double Z() const {{ return myZ; }}
+  void SetCoord(const double theX, const double theY, const double theZ) {{ myX = theX; myY = theY; myZ = theZ; }}
+  double Distance(const {pkg}_Point& theOther) const {{ return theOther.myX - myX; }}
+  {pkg}_Orientation Orientation() const {{ return {pkg}_FORWARD; }}
+
+  enum Mode
+  {{
+    Mode_Absolute,
+    Mode_Relative
+  }};
+
+  class Cell
+  {{
+  public:
+    Cell() : myIndex(0) {{}}
+    int Index() const {{ return myIndex; }}
+
+  private:
+    int myIndex;
+  }};
+
+private:
+  double myX;
+  double myY;
+  double myZ;
+}};
+"""
+
+_object = """#pragma once
+
+#include <Standard_Handle.hxx>
+#include <{base_header}>
+#include <{pkg}_Point.hxx>
+
+class {pkg}_Object : public {base}
+{{
+public:
+  {pkg}_Object() {{}}
+  {pkg}_Object(const {pkg}_Point& thePoint) : myPoint(thePoint) {{}}
+{methods}
+  const {pkg}_Point& Point() const {{ return myPoint; }}
+  void SetPoint(const {pkg}_Point& thePoint) {{ myPoint = thePoint; }}
+
+private:
+  {pkg}_Point myPoint;
+}};
+"""
+
+_method = """  double Compute{index}(const double theValue, const int theCount = 1) const {{ return theValue * theCount; }}
+"""
+
+_array = """#pragma once
+
+#include <NCollection_Array1.hxx>
+#include <{pkg}_Point.hxx>
+
+typedef NCollection_Array1<{pkg}_Point> {pkg}_Array1OfPoint;
+"""
+
+_sequence = """#pragma once
+
+#include <NCollection_Sequence.hxx>
+#include <{pkg}_Object.hxx>
+
+typedef NCollection_Sequence<opencascade::handle<{pkg}_Object> > {pkg}_SequenceOfObject;
+"""
+
+_tool = """#pragma once
+
+#include <{pkg}_Array1OfPoint.hxx>
+#include <{pkg}_SequenceOfObject.hxx>
+{other_include}
+class {pkg}_Tool
+{{
+public:
+  static int NbPoints(const {pkg}_Array1OfPoint& thePoints) {{ return thePoints.Length(); }}
+  static bool IsEmpty(const {pkg}_SequenceOfObject& theObjects) {{ return theObjects.IsEmpty(); }}
+{other_method}}};
+"""
+
+
+def package_name(index):
+    """
+    :param int index: The package index.
+
+    :return: The name of the package.
+    :rtype: str
+    """
+    return 'Pkg{}'.format(index)
+
+
+def write_corpus(path, npackages, nmethods=10):
+    """
+    Write a synthetic header tree in the style of OCCT. Each package has an enum, a value class with
+    a nested class and enum, a Standard_Transient derived class inheriting from the previous
+    package, NCollection typedef instantiations, and a class of static functions. The foundation
+    packages add gp points and arrays of numbers and points.
+
+    :param str path: The output directory.
+    :param int npackages: The number of packages.
+    :param int nmethods: Number of extra methods per transient class.
+
+    :return: The header file names.
+    :rtype: list(str)
+    """
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    files = dict(_foundation)
+    methods = ''.join([_method.format(index=i) for i in range(nmethods)])
+    for i in range(npackages):
+        pkg = package_name(i)
+        if i == 0:
+            base, base_header = 'Standard_Transient', 'Standard_Transient.hxx'
+        else:
+            base = package_name(i - 1) + '_Object'
+            base_header = base + '.hxx'
+
+        if i == 0:
+            other_include, other_method = '', ''
+        else:
+            other = package_name(i - 1)
+            other_include = '#include <{}_Point.hxx>\n'.format(other)
+            other_method = '  static double Distance(const {}_Point& theP1, const {}_Point& theP2) ' \
+                           '{{ return theP1.Distance(theP2); }}\n'.format(other, other)
+
+        files[pkg + '_Orientation.hxx'] = _enum.format(pkg=pkg)
+        files[pkg + '_Point.hxx'] = _point.format(pkg=pkg)
+        files[pkg + '_Object.hxx'] = _object.format(pkg=pkg, base=base, base_header=base_header,
+                                                    methods=methods)
+        files[pkg + '_Array1OfPoint.hxx'] = _array.format(pkg=pkg)
+        files[pkg + '_SequenceOfObject.hxx'] = _sequence.format(pkg=pkg)
+        files[pkg + '_Tool.hxx'] = _tool.format(pkg=pkg, other_include=other_include,
+                                                other_method=other_method)
+
+    for name in sorted(files):
+        with open(os.path.join(path, name), 'w', newline='\n') as fout:
+            fout.write(files[name])
+
+    return sorted(files)
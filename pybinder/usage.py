@@ -0,0 +1,253 @@
+import re
+import runpy
+import sys
+import threading
+
+from pybinder.build import estimate_cost
+from pybinder.includes import get_bound_cursors
+
+__all__ = ['read_usage_profile', 'apply_usage_profile', 'UsageTracer']
+
+_name_re = re.compile(r'[A-Za-z_]\w*(?:\.\*)?')
+
+
+def read_usage_profile(*paths):
+    """
+    Read the names used by a client from usage profiles. A profile is any text containing the
+    Python names of the used types and functions, like a list of names with one per line, a
+    trace written by :class:`UsageTracer`, or the client source itself. A module name followed by
+    ".*" uses the whole module. Lines starting with "#" are ignored.
+
+    :param str paths: The profile files.
+
+    :return: The names.
+    :rtype: set(str)
+    """
+    names = set()
+    for path in paths:
+        with open(path) as fin:
+            for line in fin:
+                if line.lstrip().startswith('#'):
+                    continue
+                names.update(_name_re.findall(line))
+    return names
+
+
+def _owner(cursor, lookup):
+    """
+    :return: The bound entity declaring a cursor or containing its declaration, or None.
+    """
+    while not cursor.is_null:
+        if cursor in lookup:
+            return lookup[cursor]
+        cursor = cursor.semantic_parent
+    return None
+
+
+def _referenced(entity, lookup):
+    """
+    :return: The bound entities whose types a binding of the entity uses.
+    :rtype: list
+    """
+    found = []
+    for cursor in get_bound_cursors(entity):
+        for c in cursor.walk_preorder():
+            if not c.is_type_ref:
+                continue
+            d = c.get_definition()
+            if not d.is_definition:
+                continue
+            owner = _owner(d, lookup)
+            if owner is not None and owner is not entity:
+                found.append(owner)
+    return found
+
+
+def apply_usage_profile(model, names, log):
+    """
+    Exclude the types, functions, and enums a client does not need. The needed ones are the
+    used names and everything they reach through base classes, parameter, return, and field
+    types, template instantiations, and aliases.
+
+    :param pybinder.generate.Model model: The processed model.
+    :param set(str) names: The used names from :func:`read_usage_profile`.
+    :param pybinder.events.EventLog log:
+
+    :return: None.
+    """
+    templates = model.registered_templates
+
+    # Bound entities by their cursor and by their Python name
+    lookup = {}
+    by_name = {}
+    for mod in model.submodules:
+        for entity in (model.module_enums[mod] + model.module_functions[mod] +
+                       model.module_types[mod]):
+            lookup[entity] = entity
+            by_name.setdefault(entity.python_name, []).append(entity)
+    for klass in model.registered_classes.values():
+        lookup.setdefault(klass, klass)
+
+    # Seeds
+    stack = []
+    for name in names:
+        if name.endswith('.*'):
+            mod = name[:-2]
+            if mod not in model.available_modules:
+                log.emit('usage_unknown', name, mod, 'no such module')
+                continue
+            stack += model.module_enums[mod] + model.module_functions[mod]
+            stack += model.module_types[mod]
+        else:
+            stack += by_name.get(name, [])
+    nseeds = len(stack)
+
+    # Closure over the model
+    needed = set()
+    visited = set()
+    while stack:
+        entity = stack.pop()
+        if id(entity) in visited or entity.is_excluded:
+            continue
+        visited.add(id(entity))
+        needed.add(id(entity))
+
+        if entity.is_typedef_decl:
+            if entity.is_alias:
+                stack.append(entity.alias)
+                continue
+            template = templates.get(entity.underlying_template_name)
+            if entity.is_templated and template is not None and id(template) not in visited:
+                visited.add(id(template))
+                stack += _referenced(template.klass, lookup)
+        elif entity.is_class_decl or entity.is_struct_decl:
+            for base in entity.extra_bases:
+                if base.template is not None and id(base.template) not in visited:
+                    visited.add(id(base.template))
+                    stack += _referenced(base.template.klass, lookup)
+        stack += _referenced(entity, lookup)
+
+    # Exclude the rest
+    before = {'cost': 0, 'types': 0}
+    after = {'cost': 0, 'types': 0}
+    for mod in model.submodules:
+        used = False
+        for entity in (model.module_enums[mod] + model.module_functions[mod] +
+                       model.module_types[mod]):
+            if entity.is_excluded:
+                continue
+            is_type = not (entity.is_enum_decl or entity.is_function_decl or entity.is_alias)
+            cost = estimate_cost(entity, templates)
+            before['cost'] += cost
+            before['types'] += int(is_type)
+            if id(entity) in needed:
+                after['cost'] += cost
+                after['types'] += int(is_type)
+                used = True
+                continue
+            entity.is_excluded = True
+            log.emit('exclude_unused', entity.register_name, mod, 'not used by the usage profile')
+        if not used:
+            model.available_modules.discard(mod)
+            log.emit('exclude_unused_module', mod, mod, 'not used by the usage profile')
+
+    # The cost is an estimate from the bound entities, not a measured build or import time
+    log.emit('usage_profile', 'OCCT', reason='estimated cost (bound entities compiled and '
+                                             'registered at import) and bound types',
+             seeds=nseeds, estimated_cost_before=before['cost'],
+             estimated_cost_after=after['cost'],
+             types_before=before['types'], types_after=after['types'])
+
+
+class UsageTracer(object):
+    """
+    Record the types and functions of a package a Python program uses. Calls into the package are
+    traced and the globals of the other modules are scanned for names imported from it when
+    tracing stops.
+
+    :param str package: The package of the bindings.
+    """
+
+    def __init__(self, package='OCCT'):
+        self.package = package
+        self.names = set()
+
+    def _record(self, obj):
+        # Types and functions of the package or the type of the instance a method is bound to
+        candidates = [obj]
+        self_ = getattr(obj, '__self__', None)
+        if self_ is not None and not isinstance(obj, type):
+            candidates.append(type(self_))
+        for candidate in candidates:
+            module = getattr(candidate, '__module__', None)
+            name = getattr(candidate, '__name__', None)
+            if not isinstance(module, str) or not isinstance(name, str):
+                continue
+            if module == self.package or module.startswith(self.package + '.'):
+                self.names.add('{}.{}'.format(module.rpartition('.')[2], name))
+                return
+
+    def _profile(self, frame, event, arg):
+        if event == 'c_call':
+            self._record(arg)
+
+    def start(self):
+        """
+        Start tracing calls in all threads.
+
+        :return: None.
+        """
+        threading.setprofile(self._profile)
+        sys.setprofile(self._profile)
+
+    def stop(self):
+        """
+        Stop tracing and scan the loaded modules for names imported from the package.
+
+        :return: None.
+        """
+        sys.setprofile(None)
+        threading.setprofile(None)
+        for name, module in list(sys.modules.items()):
+            if name == self.package or name.startswith(self.package + '.'):
+                continue
+            self.scan(getattr(module, '__dict__', {}))
+
+    def scan(self, namespace):
+        """
+        Record the names in a namespace that were imported from the package.
+
+        :param dict namespace: The namespace (e.g., the globals of a script).
+
+        :return: None.
+        """
+        for value in list(namespace.values()):
+            self._record(value)
+
+    def write(self, fn):
+        """
+        Write the used names with one per line.
+
+        :param str fn: The output file.
+
+        :return: None.
+        """
+        with open(fn, 'w', newline='\n') as fout:
+            fout.write('# Usage profile of {}\n'.format(self.package))
+            for name in sorted(self.names):
+                fout.write(name + '\n')
+
+
+if __name__ == '__main__':
+    # Usage: python -m pybinder.usage <profile> <script> [args...]
+    tracer = UsageTracer()
+    profile_, script_ = sys.argv[1:3]
+    sys.argv = sys.argv[2:]
+    globals_ = {}
+    tracer.start()
+    try:
+        globals_ = runpy.run_path(script_, run_name='__main__')
+    finally:
+        tracer.stop()
+        tracer.scan(globals_)
+        tracer.write(profile_)
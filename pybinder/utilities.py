@@ -15,6 +15,20 @@ def find_include_path(name, path):
             return root
 
 
+def open_source_file(output_dir, name):
+    """
+    Open a generated source file for writing. Line endings are always written as "\\n" so the
+    generated sources are byte-for-byte identical across platforms.
+
+    :param str output_dir: The output directory.
+    :param str name: The file name.
+
+    :return: The open file.
+    """
+    fdir = '/'.join([output_dir, name])
+    return open(fdir, 'w', newline='\n')
+
+
 def get_includes_for_cursors(cursors):
     """
     Gather all the include files for a list of cursors.
@@ -50,3 +64,15 @@ def get_includes_for_cursors(cursors):
             fwd_includes.append(header)
 
     return module_includes, fwd_includes
+
+
+def get_module_name(header):
+    """
+    Get the module of a header. The module is assumed to be the first part of the header name.
+
+    :param str header: The header file name.
+
+    :return: The module name.
+    :rtype: str
+    """
+    return header.replace('.', '_').split('_', maxsplit=1)[0]
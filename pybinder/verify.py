@@ -0,0 +1,236 @@
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import sysconfig
+from concurrent.futures import ThreadPoolExecutor
+
+from pybinder.utilities import get_module_name
+
+__all__ = ['get_verify_command', 'expand_sources', 'parse_diagnostics', 'locate',
+           'verify_sources']
+
+# Parse arguments only understood by clang
+_clang_only = ('-ferror-limit', '-fms-', '-fdelayed-template-parsing')
+
+_diagnostic_re = re.compile(r'^(.+?):(\d+):(?:\d+:)?\s*(fatal error|error|warning|note):\s*(.*)$')
+_unity_re = re.compile(r'^#include\s*"([^"]+\.cxx)"', re.MULTILINE)
+_label_re = re.compile(r'^\s*//\s*(Class|Nested class|Template|Typedef|Function|Enum|Nested enum):\s*(.+?)\s*$')
+_def_re = re.compile(r'\.def(?:_static|_readwrite|_readonly)?\("(\w+)"')
+_entry_re = re.compile(r'^\t\{"(\w+)", &')
+_bind_re = re.compile(r'^void (bind_\w+)\(')
+
+
+def _backend_includes(backend):
+    """
+    :param str backend: The backend name.
+
+    :return: The include paths of the binding library and Python.
+    :rtype: list(str)
+    """
+    paths = []
+    try:
+        if backend == 'nanobind':
+            import nanobind
+            paths.append(nanobind.include_dir())
+        else:
+            import pybind11
+            paths.append(pybind11.get_include())
+    except ImportError:
+        pass
+    paths.append(sysconfig.get_paths()['include'])
+    return paths
+
+
+def get_verify_command(config, output_dir):
+    """
+    Get the compiler command that checks the syntax of a generated source. It reuses the parse
+    arguments and include paths of the configuration. The compiler runs in the output directory,
+    so relative include paths are resolved against the current directory first.
+
+    :param pybinder.configure.Configurator config:
+    :param str output_dir: The directory of the generated sources.
+
+    :return: The command without the source file.
+    :rtype: list(str)
+    """
+    compiler = config.verify_compiler or shutil.which('clang++') or 'c++'
+    is_clang = 'clang' in os.path.basename(compiler)
+
+    cmd = [compiler, '-fsyntax-only']
+    for arg in config.args:
+        if not is_clang and arg.startswith(_clang_only):
+            continue
+        cmd.append(arg)
+    if config.backend == 'nanobind':
+        cmd.append('-std=c++17')
+    cmd += config.verify_args
+
+    for path in [output_dir] + config.verify_include_paths + config.include_paths:
+        cmd.append('-I{}'.format(os.path.abspath(path)))
+    for path in _backend_includes(config.backend):
+        cmd.append('-I{}'.format(path))
+    return cmd
+
+
+def expand_sources(output_dir, sources):
+    """
+    Replace the unity sources by the sources they include so errors point at the original ones.
+
+    :param str output_dir: The output directory.
+    :param list(str) sources: The source file names.
+
+    :return: The source file names.
+    :rtype: list(str)
+    """
+    expanded = []
+    for src in sources:
+        with open(os.path.join(output_dir, src)) as fin:
+            txt = fin.read()
+        included = _unity_re.findall(txt) if '// Unity batch' in txt else []
+        for name in included or [src]:
+            if name not in expanded:
+                expanded.append(name)
+    return expanded
+
+
+def parse_diagnostics(output):
+    """
+    Parse the diagnostics of a compiler.
+
+    :param str output: The compiler output.
+
+    :return: The file, line, severity, and message of each diagnostic.
+    :rtype: list(tuple(str, int, str, str))
+    """
+    diagnostics = []
+    for line in output.splitlines():
+        match = _diagnostic_re.match(line)
+        if match:
+            fn, lineno, severity, msg = match.groups()
+            diagnostics.append((fn, int(lineno), severity.replace('fatal ', ''), msg))
+        elif 'required from' in line or 'requested here' in line:
+            # Instantiation context (e.g., "file:10:5:   required from here")
+            parts = line.split(':')
+            if len(parts) > 2 and parts[1].isdigit():
+                diagnostics.append((parts[0], int(parts[1]), 'note', line))
+    return diagnostics
+
+
+def locate(output_dir, fname, lineno, cache=None):
+    """
+    Find the entity a line of a generated source binds from the labels and ".def" calls written
+    by the generator.
+
+    :param str output_dir: The output directory.
+    :param str fname: The generated file name.
+    :param int lineno: The line number (starting at 1).
+    :param dict cache: Lines of the files already read.
+
+    :return: The bound entity (class, template, function, or enum) and member (e.g., method)
+        names. Either is empty if not found.
+    :rtype: tuple(str, str)
+    """
+    if cache is None:
+        cache = {}
+    if fname not in cache:
+        with open(os.path.join(output_dir, fname)) as fin:
+            cache[fname] = fin.read().splitlines()
+    lines = cache[fname]
+    index = min(lineno, len(lines)) - 1
+
+    # Member bound on this line or by a statement spanning the previous lines
+    member = ''
+    for i in range(index, max(index - 5, -1), -1):
+        if i < index and lines[i].rstrip().endswith((';', '{', '}')):
+            break
+        match = _def_re.search(lines[i]) or _entry_re.match(lines[i])
+        if match:
+            member = match.group(1)
+            break
+
+    # Nearest label or binding function above the line
+    entity = ''
+    for i in range(index, -1, -1):
+        match = _label_re.match(lines[i])
+        if match:
+            entity = match.group(2)
+            break
+        match = _bind_re.match(lines[i])
+        if match:
+            entity = match.group(1)[len('bind_'):]
+            break
+    return entity, member
+
+
+def _check(cmd, output_dir, src):
+    proc = subprocess.run(cmd + [src], cwd=output_dir, stdout=subprocess.PIPE,
+                          stderr=subprocess.STDOUT, universal_newlines=True)
+    return src, proc.returncode, proc.stdout
+
+
+def verify_sources(output_dir, sources, config, source_modules=None, jobs=0):
+    """
+    Check the syntax of the generated sources in parallel and map each error back to the module,
+    entity, and member that produced it. Errors in headers are mapped through the instantiation
+    context to the generated line that needs them.
+
+    :param str output_dir: The output directory.
+    :param list(str) sources: The source file names.
+    :param pybinder.configure.Configurator config:
+    :param dict source_modules: The modules bound in each source.
+    :param int jobs: The number of compilers to run at once. Uses the number of CPUs if 0.
+
+    :return: The failed sources and the errors. Each error is a dict with the source, line,
+        module, entity, member, and message.
+    :rtype: tuple(list(str), list(dict))
+    """
+    if source_modules is None:
+        source_modules = {}
+    jobs = jobs or multiprocessing.cpu_count()
+    output_dir = os.path.abspath(output_dir)
+    cmd = get_verify_command(config, output_dir)
+
+    sources = expand_sources(output_dir, sources)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(lambda s: _check(cmd, output_dir, s), sources))
+
+    failed = []
+    errors = []
+    cache = {}
+    for src, code, output in results:
+        if code == 0:
+            continue
+        failed.append(src)
+        diagnostics = parse_diagnostics(output)
+        generated = [i for i, d in enumerate(diagnostics) if
+                     os.path.dirname(os.path.abspath(os.path.join(output_dir, d[0]))) ==
+                     output_dir]
+
+        for i, (fn, lineno, severity, msg) in enumerate(diagnostics):
+            if severity != 'error':
+                continue
+
+            # The error itself, then the context after it (clang), then before it (gcc)
+            after = [j for j in generated if j > i and (j == i + 1 or diagnostics[j - 1][2] !=
+                                                        'error')]
+            before = [j for j in generated if j < i]
+            where = i if i in generated else (after or before[-1:] or [None])[0]
+
+            module = ', '.join(source_modules.get(src) or [get_module_name(src)])
+            entity, member = '', ''
+            line = lineno
+            if where is not None:
+                fname, line = os.path.basename(diagnostics[where][0]), diagnostics[where][1]
+                entity, member = locate(output_dir, fname, line, cache)
+            errors.append({'source': src, 'line': line, 'module': module, 'entity': entity,
+                           'member': member, 'message': msg})
+
+        if not any([e['source'] == src for e in errors]):
+            errors.append({'source': src, 'line': 0, 'module': ', '.join(
+                source_modules.get(src) or [get_module_name(src)]), 'entity': '', 'member': '',
+                'message': output.strip().splitlines()[-1] if output.strip() else
+                'exit code {}'.format(code)})
+
+    return failed, errors
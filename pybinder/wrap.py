@@ -5,6 +5,8 @@ import re
 from clang.cindex import AccessSpecifier, CursorKind, Type, Cursor, c_uint, TypeKind
 from cymbal import clangext
 
+from pybinder.profile import counters
+
 # Patches for libclang
 clangext.monkeypatch_cursor('get_specialization',
                             'clang_getSpecializedCursorTemplate',
@@ -36,6 +38,8 @@ class CursorWrapper(object):
 
     def __init__(self, cursor):
         self._cursor = cursor
+        if counters.enabled and type(self) is not CursorWrapper:
+            counters['wrappers_created'] += 1
 
         self.module_name = ''
         self.header_file = ''
@@ -221,10 +225,14 @@ class CursorWrapper(object):
 
     def get_children(self):
         for c in self.clang_cursor.get_children():
+            if counters.enabled:
+                counters['cursors_visited'] += 1
             yield CursorWrapper(c)
 
     def walk_preorder(self):
         for c in self.clang_cursor.walk_preorder():
+            if counters.enabled:
+                counters['cursors_visited'] += 1
             yield CursorWrapper(c)
 
     def get_method_parameters(self):
@@ -569,12 +577,27 @@ class ClassWrapper(CursorWrapper):
         self.fields = []
 
         self.is_iterator = False
-        self.keep_alive = 'py::keep_alive<0, 1>'
+        self.keep_alive = (0, 1)
+
+        self.is_array = False
 
     @property
     def is_abstract(self):
         return self.clang_cursor.is_abstract_record()
 
+    @property
+    def type_name(self):
+        """
+        :return: The C++ type for use as a type in generated code. A class nested in a class
+            template depends on the template parameters and needs "typename".
+        :rtype: str
+        """
+        parent = self.semantic_parent
+        if self.is_template and not parent.is_translation_unit and \
+                parent.is_contained_in_class_template:
+            return 'typename ' + self.register_name
+        return self.register_name
+
     def is_derived_from(self, name):
         """
 
@@ -657,6 +680,10 @@ class BaseClassWrapper(CursorWrapper):
         self.is_typedef = False
         self.is_template_param_base = False
 
+        # Registration of a template instantiation base decided at generation time
+        self.is_registered = False
+        self.is_shared = False
+
     def __repr__(self):
         return '{}: {}'.format(type(self).__name__, self.referenced.qualified_displayname)
 
@@ -733,6 +760,9 @@ class MethodWrapper(CursorWrapper):
         self.result_name = ''
         self.parameters = []
 
+        # Bind an awaitable companion
+        self.is_async = False
+
     @property
     def is_static(self):
         return self.clang_cursor.is_static_method()
@@ -1113,6 +1143,7 @@ def wrap_base_cursor(cursor):
     # Get parameters
     if '<' in base.base_name:
         base.parameters = parse_template_parameters(base.base_name)
+    base.canonical_type_name = base.type.canonical_spelling
 
     return base
 
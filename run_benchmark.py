@@ -0,0 +1,151 @@
+import argparse
+import json
+import tempfile
+
+from pybinder.benchmark import (run_benchmark, measure_import, measure_threads,
+                                measure_interpreters, read_import_profile, compare_backends)
+
+
+def run_imports(paths, names, repeat):
+    print('Path\tImport (s)\tWith names (s)\tPeak RSS (MB)')
+    for path in paths:
+        r = measure_import(path, repeat=repeat, names=names)
+        print('{}\t{:.4f}\t{:.4f}\t{:.1f}'.format(path, r['seconds'], r['total_seconds'],
+                                                r['peak_rss'] / 2 ** 20))
+
+
+def run_import_profile(path, names, top):
+    profile = read_import_profile(path, names=names)
+    entries = profile['entries']
+    if not entries:
+        print('No import profile found. Generate the bindings with import_profile enabled.')
+        return
+
+    modules = {}
+    for e in entries:
+        seconds, types, calls = modules.get(e['module'], (0., 0, 0))
+        modules[e['module']] = (seconds + e['seconds'], types + e['types'], calls + 1)
+    total = sum([e['seconds'] for e in entries])
+    print('Import: {:.4f} s ({:.4f} s in {} binding functions)'.format(profile['seconds'], total,
+                                                                         len(entries)))
+
+    print('Module\tSeconds\tShare\tTypes\tCalls')
+    for mod, (seconds, types, calls) in sorted(modules.items(), key=lambda m: -m[1][0])[:top]:
+        print('{}\t{:.4f}\t{:.1%}\t{}\t{}'.format(mod, seconds, seconds / (total or 1.), types,
+                                                calls))
+
+    print('Kind\tModule\tName\tSeconds\tTypes')
+    for e in sorted(entries, key=lambda e: -e['seconds'])[:top]:
+        print('{}\t{}\t{}\t{:.6f}\t{}'.format(e['kind'], e['module'], e['name'], e['seconds'],
+                                              e['types']))
+
+
+def run_threads(path, setup, call, workers, calls, python, interpreters):
+    if interpreters:
+        results = measure_interpreters(path, setup, call, workers, calls, python)
+        print('Interpreters\tSeconds\tCalls/s\tSpeedup')
+    else:
+        results = measure_threads(path, setup, call, workers, calls, python)
+        print('GIL enabled: {}'.format(results[0]['gil_enabled']))
+        print('Threads\tSeconds\tCalls/s\tSpeedup')
+    for r in results:
+        print('{}\t{:.3f}\t{:.1f}\t{:.2f}'.format(r['workers'], r['seconds'], r['throughput'],
+                                                r['speedup']))
+
+
+def run_backends(backends, packages, methods, opt):
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = compare_backends(work_dir, packages, methods, backends, opt)
+
+    print('Backend\tSources\tCompile (s)\tLibrary (s)\tLink (s)\tSize (kB)')
+    for backend, r in results.items():
+        print('{}\t{}\t{:.2f}\t{:.2f}\t{:.2f}\t{:.0f}'.format(
+            backend, r['sources'], r['compile_seconds'], r['library_seconds'], r['link_seconds'],
+            r['size'] / 2 ** 10))
+
+    print('Call\t' + '\t'.join(['{} (ns)'.format(b) for b in results]))
+    for call in results[backends[0]]['calls']:
+        times = ['{:.1f}'.format(r['calls'][call] * 1e9) for r in results.values()]
+        print('{}\t{}'.format(call, '\t'.join(times)))
+
+
+def run(scales, packages, methods, output):
+    report = run_benchmark(scales, packages, methods)
+
+    print('Scale\tPackages\tSeconds\tPeak RSS (MB)')
+    for r in report['results']:
+        rss = r['stages'][-1]['process_peak_rss'] or 0
+        print('{}\t{}\t{:.2f}\t{:.1f}'.format(r['scale'], r['packages'], r['total_seconds'],
+                                              rss / 2 ** 20))
+
+    print('Scaling exponents (cost ~ size^k):')
+    for name, exponents in report['scaling'].items():
+        txt = ', '.join(['-' if k is None else '{:.2f}'.format(k) for k in exponents])
+        print('\t{}: {}'.format(name, txt))
+
+    if output:
+        with open(output, 'w', newline='\n') as fout:
+            json.dump(report, fout, indent=2, sort_keys=True)
+            fout.write('\n')
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(
+        description='Benchmark the generator on synthetic OCCT-like header trees.')
+    arg_parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                            help='Size multipliers of the corpus.')
+    arg_parser.add_argument('--packages', type=int, default=5,
+                            help='Number of packages at a scale of one.')
+    arg_parser.add_argument('--methods', type=int, default=10,
+                            help='Number of extra methods per transient class.')
+    arg_parser.add_argument('--output', help='Write the full report to this JSON file.')
+    arg_parser.add_argument('--imports', nargs='+', metavar='PATH',
+                            help='Instead, measure the cold import of the OCCT package built in '
+                                 'each directory (e.g., with and without lazy_types).')
+    arg_parser.add_argument('--names', nargs='*', default=[],
+                            help='Attributes to use after the import (e.g., "gp.gp_Pnt").')
+    arg_parser.add_argument('--repeat', type=int, default=5,
+                            help='Number of imports to take the fastest of.')
+    arg_parser.add_argument('--import-profile', metavar='PATH',
+                            help='Instead, print the slowest modules and binding functions of '
+                                 'the OCCT package built with import_profile in this directory.')
+    arg_parser.add_argument('--top', type=int, default=20,
+                            help='Number of modules and binding functions to print.')
+    arg_parser.add_argument('--threads', metavar='PATH',
+                            help='Instead, measure the throughput of --call from a pool of '
+                                 'threads with the OCCT package built in this directory.')
+    arg_parser.add_argument('--setup', default='',
+                            help='Statements run once before the calls (e.g., "from OCCT.BRepMesh '
+                                 'import BRepMesh_IncrementalMesh; shape = ...").')
+    arg_parser.add_argument('--call',
+                            help='Expression each thread evaluates (e.g., '
+                                 '"BRepMesh_IncrementalMesh(shape, 0.01)").')
+    arg_parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                            help='Numbers of threads.')
+    arg_parser.add_argument('--calls', type=int, default=64,
+                            help='Number of calls for each number of threads.')
+    arg_parser.add_argument('--interpreters', action='store_true',
+                            help='Make the calls from subinterpreters with their own GIL instead '
+                                 'of threads (Python 3.13 or newer and subinterpreters in the '
+                                 'configuration).')
+    arg_parser.add_argument('--python',
+                            help='Python executable for the calls (e.g., a free-threaded one).')
+    arg_parser.add_argument('--backends', nargs='+', metavar='BACKEND',
+                            help='Instead, build the bindings of a corpus of --packages packages '
+                                 'with each backend (e.g., pybind11 nanobind) and compare the '
+                                 'build times and the call overhead.')
+    arg_parser.add_argument('--opt', default='-O2',
+                            help='Optimization option for --backends (e.g., --opt=-O0).')
+    cli_args = arg_parser.parse_args()
+
+    if cli_args.threads:
+        run_threads(cli_args.threads, cli_args.setup, cli_args.call, cli_args.workers,
+                    cli_args.calls, cli_args.python, cli_args.interpreters)
+    elif cli_args.backends:
+        run_backends(cli_args.backends, cli_args.packages, cli_args.methods, cli_args.opt)
+    elif cli_args.import_profile:
+        run_import_profile(cli_args.import_profile, cli_args.names, cli_args.top)
+    elif cli_args.imports:
+        run_imports(cli_args.imports, cli_args.names, cli_args.repeat)
+    else:
+        run(cli_args.scales, cli_args.packages, cli_args.methods, cli_args.output)
@@ -0,0 +1,75 @@
+import argparse
+import os
+
+from pybinder.configure import Configurator
+from pybinder.events import EventLog
+from pybinder.exclude import bisect_failures, format_exclusions, write_exclusions
+from pybinder.generate import generate_bindings
+from pybinder.parse import Parser
+from pybinder.utilities import find_include_path
+
+
+def run(modules=None, write=False, log_file=None, quiet=False):
+    # Event log
+    if log_file:
+        log = EventLog.open(log_file, quiet)
+    else:
+        log = EventLog(quiet=quiet)
+
+    # Generate configuration from file and verify the sources
+    config = Configurator.from_toml('occt_clang.toml')
+    config.verify = modules is None
+
+    # Get the root directory of the conda environment
+    conda_prefix = os.environ.get('CONDA_PREFIX')
+
+    # Find include paths
+    clang_include_path = find_include_path('__stddef_max_align_t.h', conda_prefix)
+    occt_include_path = find_include_path('Standard.hxx', conda_prefix)
+    vtk_include_path = find_include_path('vtk_doubleconversion.h', conda_prefix)
+    rapidjson_include_path = find_include_path('rapidjson.h', conda_prefix)
+    rapidjson_include_path = os.path.split(rapidjson_include_path)[0]
+
+    config.add_include_paths(clang_include_path, occt_include_path, vtk_include_path,
+                             rapidjson_include_path)
+
+    # Parse
+    log.info('Parsing headers...')
+    parser = Parser(config)
+    parser.generate_header_file(occt_include_path)
+    parser.parse()
+
+    # Generate
+    log.info('Generating bindings...')
+    model = generate_bindings(parser, config, './src', True, log)
+
+    # Bisect
+    exclusions = bisect_failures(model, './src', config, log, modules)
+    if not exclusions:
+        log.info('No exclusions found.')
+    elif write:
+        fn = 'occt_exclusions.toml'
+        write_exclusions(fn, exclusions)
+        log.info('{} exclusions written to {}'.format(len(exclusions), fn))
+    else:
+        print(format_exclusions(exclusions))
+
+    log.print_summary()
+    log.close()
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(
+        description='Find the classes and methods to exclude so the failing modules compile.')
+    arg_parser.add_argument('modules', nargs='*',
+                            help='Modules to bisect. If none then the modules that fail '
+                                 'verification are bisected.')
+    arg_parser.add_argument('--write', action='store_true',
+                            help='Add the exclusions to occt_exclusions.toml instead of '
+                                 'printing them.')
+    arg_parser.add_argument('--log', help='Write generator events to this JSON lines file.')
+    arg_parser.add_argument('--quiet', action='store_true',
+                            help='Do not print progress or the event summary.')
+    cli_args = arg_parser.parse_args()
+
+    run(cli_args.modules or None, cli_args.write, cli_args.log, cli_args.quiet)
@@ -1,12 +1,27 @@
+import argparse
 import os
 
 from pybinder.configure import Configurator
+from pybinder.events import EventLog
 from pybinder.generate import generate_bindings
 from pybinder.parse import Parser
+from pybinder.profile import Profiler
 from pybinder.utilities import find_include_path
 
 
-def run():
+def run(log_file=None, quiet=False, profile_file=None):
+    # Event log
+    if log_file:
+        log = EventLog.open(log_file, quiet)
+    else:
+        log = EventLog(quiet=quiet)
+
+    # Profiler
+    profiler = Profiler(enabled=profile_file is not None)
+    if profiler.enabled:
+        profiler.start()
+        profiler.instrument_libclang()
+
     # Generate configuration from file
     config = Configurator.from_toml('occt_clang.toml')
 
@@ -20,26 +35,44 @@ def run():
     rapidjson_include_path = find_include_path('rapidjson.h', conda_prefix)
     rapidjson_include_path = os.path.split(rapidjson_include_path)[0]
 
-    print('Include directories:')
-    print('\tClang: {}'.format(clang_include_path))
-    print('\tOpenCASCADE: {}'.format(occt_include_path))
-    print('\tVTK: {}'.format(vtk_include_path))
-    print('\tRapidjson: {}'.format(rapidjson_include_path))
+    log.emit('include_path', 'Clang', reason=clang_include_path)
+    log.emit('include_path', 'OpenCASCADE', reason=occt_include_path)
+    log.emit('include_path', 'VTK', reason=vtk_include_path)
+    log.emit('include_path', 'Rapidjson', reason=rapidjson_include_path)
 
     config.add_include_paths(clang_include_path, occt_include_path, vtk_include_path,
                              rapidjson_include_path)
 
     # Parse
-    print('Parsing headers...')
+    log.info('Parsing headers...')
     parser = Parser(config)
-    parser.generate_header_file(occt_include_path)
-    parser.parse()
-    parser.dump_diagnostics(0)
+    with profiler.stage('header_file'):
+        parser.generate_header_file(occt_include_path)
+    with profiler.stage('parse'):
+        parser.parse()
+    parser.dump_diagnostics(0, log)
 
     # Generate
-    print('Generating bindings...')
-    generate_bindings(parser, config, './src', True)
+    log.info('Generating bindings...')
+    generate_bindings(parser, config, './src', True, log, profiler)
+
+    if profiler.enabled:
+        profiler.stop()
+        profiler.write(profile_file)
+        log.info('Profile written to {}'.format(profile_file))
+
+    log.print_summary()
+    log.close()
 
 
 if __name__ == '__main__':
-    run()
+    arg_parser = argparse.ArgumentParser(description='Generate the pyOCCT binding sources.')
+    arg_parser.add_argument('--log', help='Write generator events to this JSON lines file.')
+    arg_parser.add_argument('--quiet', action='store_true',
+                            help='Do not print progress or the event summary.')
+    arg_parser.add_argument('--profile', metavar='FILE',
+                            help='Write the time, memory, and counters of each stage to this '
+                                 'JSON file.')
+    cli_args = arg_parser.parse_args()
+
+    run(cli_args.log, cli_args.quiet, cli_args.profile)
@@ -0,0 +1,54 @@
+import os
+
+from pybinder.benchmark import build_extension, make_config
+from pybinder.events import EventLog
+from pybinder.generate import generate_bindings
+from pybinder.parse import Parser
+
+
+def _config(corpus_dir, work_dir, options):
+    config = make_config(corpus_dir, work_dir)
+    for key, value in options.items():
+        setattr(config, key, value)
+    return config
+
+
+def generate(corpus_dir, work_dir, out_dir, log=None, **options):
+    """
+    Parse a synthetic corpus and generate its bindings.
+
+    :param str corpus_dir: The directory of the corpus headers.
+    :param str work_dir: The directory for the generated include file.
+    :param str out_dir: The output directory.
+    :param pybinder.events.EventLog log: The event log. If None then events are only counted.
+    :param options: Configuration attributes to override.
+
+    :return: The model.
+    :rtype: pybinder.generate.Model
+    """
+    config = _config(corpus_dir, work_dir, options)
+    os.makedirs(out_dir)
+    parser = Parser(config)
+    parser.generate_header_file(corpus_dir)
+    parser.parse()
+    if log is None:
+        log = EventLog(quiet=True)
+    return generate_bindings(parser, config, out_dir, True, log)
+
+
+def build(corpus_dir, work_dir, out_dir, build_dir, **options):
+    """
+    Compile the bindings generated with the same options into the OCCT extension module without
+    optimizations.
+
+    :param str corpus_dir: The directory of the corpus headers.
+    :param str work_dir: The directory for the generated include file.
+    :param str out_dir: The directory of the generated sources.
+    :param str build_dir: The directory for the objects and the extension module.
+    :param options: Configuration attributes to override.
+
+    :return: The build times and extension size (see pybinder.benchmark.build_extension).
+    :rtype: dict
+    """
+    config = _config(corpus_dir, work_dir, options)
+    return build_extension(config, out_dir, build_dir, '-O0')
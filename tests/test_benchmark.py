@@ -0,0 +1,16 @@
+import pytest
+
+from pybinder.benchmark import compare_backends
+
+
+def test_compare_backends(tmp_path):
+    pytest.importorskip('pybind11')
+    pytest.importorskip('nanobind')
+    results = compare_backends(str(tmp_path), npackages=1, nmethods=1, opt='-O0')
+
+    # Each backend builds an importable package whose calls are timed
+    assert sorted(results) == ['nanobind', 'pybind11']
+    for result in results.values():
+        assert sorted(result['calls']) == ['Pkg0_Object()', 'Pkg0_Tool.NbPoints_s(a)',
+                                           'p.Distance(p)', 'p.SetCoord(1., 2., 3.)', 'p.X()']
+        assert all([t > 0 for t in result['calls'].values()])
@@ -0,0 +1,90 @@
+import os
+import re
+
+from pybinder.build import pack_sources, shard_types
+from pybinder.synthetic import write_corpus
+from conftest import generate
+
+
+def test_shard_types():
+    # Contiguous shards cut when the running cost passes the next equal share of the total
+    types = ['A', 'B', 'C', 'D', 'E']
+    assert shard_types(types, [5, 1, 1, 1, 2], 10) == [types]
+    assert shard_types(types, [5, 1, 1, 1, 2], 5) == [['A'], ['B', 'C', 'D', 'E']]
+    assert shard_types(types, [2, 2, 2, 2, 2], 4) == [['A', 'B'], ['C', 'D'], ['E']]
+
+
+def test_pack_sources():
+    sources = [('A.cxx', 3), ('B.cxx', 4), ('C.cxx', 5), ('D.cxx', 1), ('E.cxx', 9)]
+    assert pack_sources(sources, 8) == [['A.cxx', 'B.cxx'], ['C.cxx', 'D.cxx'], ['E.cxx']]
+
+
+def test_source_cost(tmp_path):
+    corpus_dir = str(tmp_path / 'inc')
+    out_dir = str(tmp_path / 'out')
+    write_corpus(corpus_dir, 3)
+    generate(corpus_dir, str(tmp_path), out_dir, source_cost=30)
+
+    # Large modules are sharded
+    names = os.listdir(out_dir)
+    for i in range(3):
+        assert 'Pkg{}_2.cxx'.format(i) in names
+
+    # Small sources are compiled through the unity sources that include them
+    with open(os.path.join(out_dir, 'sources.cmake')) as fin:
+        listed = re.findall(r'/(\w+\.cxx)', fin.read())
+    unity = [name for name in names if name.startswith('OCCT_unity_')]
+    assert unity
+    batched = []
+    for name in unity:
+        assert name in listed
+        with open(os.path.join(out_dir, name)) as fin:
+            batched += re.findall(r'#include "(\w+\.cxx)"', fin.read())
+    assert len(batched) >= 2 * len(unity)
+    for name in batched:
+        assert name in names and name not in listed
+    assert sorted(listed + batched) == sorted([n for n in names if n.endswith('.cxx')])
+
+
+def _cmake_lists(txt):
+    """
+    :param str txt: The text of "sources.cmake".
+
+    :return: The file names in each list set by the file.
+    :rtype: dict(str, list(str))
+    """
+    lists = {}
+    for name, body in re.findall(r'set\((\w+)\n(.*?)\)', txt, re.S):
+        lists[name] = re.findall(r'/(\w+\.cxx)', body)
+    return lists
+
+
+def test_tiers(tmp_path):
+    corpus_dir = str(tmp_path / 'inc')
+    out_dir = str(tmp_path / 'out')
+    write_corpus(corpus_dir, 3)
+    profile = str(tmp_path / 'profile.txt')
+    with open(profile, 'w') as fout:
+        fout.write('Pkg2_Point\n')
+    model = generate(corpus_dir, str(tmp_path), out_dir, source_cost=30,
+                     tiers={'size': ['Pkg1', 'Pkg2']}, tier_profile=[profile])
+
+    # Patterns come before the usage profiles
+    assert model.module_tiers == {'Pkg1': 'size', 'Pkg2': 'size'}
+
+    model = generate(corpus_dir, str(tmp_path), out_dir + '2', source_cost=30,
+                     tiers={'size': ['Pkg1']}, tier_profile=[profile])
+    assert model.module_tiers == {'Pkg1': 'size', 'Pkg2': 'hot'}
+
+    # Each tier lists the sources of its modules, and the small shards of different tiers are not
+    # batched into one unity source. Sources of several tiers stay in the default one.
+    with open(os.path.join(out_dir + '2', 'sources.cmake')) as fin:
+        txt = fin.read()
+    assert 'set(TIERS hot size)' in txt
+    lists = _cmake_lists(txt)
+    assert lists['TIER_hot'] == ['Pkg2.cxx', 'Pkg2_2.cxx']
+    assert lists['TIER_size'] == ['Pkg1.cxx', 'Pkg1_2.cxx']
+    for src in lists['TIER_hot'] + lists['TIER_size']:
+        assert src in lists['SRCS']
+    assert 'Pkg0.cxx' in lists['SRCS']
+    assert 'bind_NCollection_Sequence.cxx' in lists['SRCS']
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+import pybinder.generate
+from pybinder.synthetic import write_corpus
+from conftest import generate
+
+
+def test_audit_template_headers(tmp_path, monkeypatch):
+    bind_class_template = pybinder.generate.bind_class_template
+
+    def bind_with_state(path, template, config):
+        bind_class_template(path, template, config)
+        with open(os.path.join(path, template.source_name), 'a') as fout:
+            fout.write('static int calls = 0;\n')
+
+    monkeypatch.setattr(pybinder.generate, 'bind_class_template', bind_with_state)
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 1)
+
+    # State in a template header is shared by every source including it
+    with pytest.raises(RuntimeError, match=r'bind_NCollection_\w+\.hxx'):
+        generate(corpus_dir, str(tmp_path), str(tmp_path / 'out'), subinterpreters=True)
+
+
+@pytest.mark.parametrize('subinterpreters', [False, True])
+def test_multiple_interpreters_flag(tmp_path, subinterpreters):
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 1)
+    out_dir = str(tmp_path / 'out')
+    generate(corpus_dir, str(tmp_path), out_dir, subinterpreters=subinterpreters)
+
+    # Only these bindings need pybind11 3.0 for py::multiple_interpreters
+    with open(os.path.join(out_dir, 'sources.cmake')) as fin:
+        assert ('set(MULTIPLE_INTERPRETERS ON)' in fin.read()) == subinterpreters
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from pybinder.costs import CompileCosts, attribute_costs, plan_job_pools
+from pybinder.synthetic import write_corpus
+from conftest import generate
+
+_ninja_log = """# ninja log v5
+0\t1000\t0\tCMakeFiles/OCCT.dir/src/Pkg0.cxx.o\t0
+0\t3000\t0\tCMakeFiles/OCCT.dir/src/Pkg1.cxx.o\t0
+0\t500\t0\tCMakeFiles/OCCT.dir/src/Standard.cxx.o\t0
+0\t100\t0\tOCCT.so\t0
+0\t2000\t0\tCMakeFiles/OCCT.dir/src/Pkg0.cxx.o\t0
+"""
+
+
+def test_attribute_costs(tmp_path):
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 2)
+    model = generate(corpus_dir, str(tmp_path), str(tmp_path / 'out'))
+
+    # A later entry replaces an earlier one and only generated sources are kept
+    build_dir = tmp_path / 'build'
+    build_dir.mkdir()
+    (build_dir / '.ninja_log').write_text(_ninja_log)
+    trace = {'traceEvents': [
+        {'ph': 'X', 'name': 'InstantiateFunction', 'ts': 0, 'dur': 500000, 'tid': 0,
+         'args': {'detail': 'bind_Pkg0_Tool'}}]}
+    (build_dir / 'Pkg0.cxx.json').write_text(json.dumps(trace))
+    costs = CompileCosts.load(str(build_dir))
+    assert costs.seconds == {'Pkg0.cxx': 2., 'Pkg1.cxx': 3., 'Standard.cxx': .5}
+
+    report = attribute_costs(costs, model)
+    assert [s['source'] for s in report['sources']] == ['Pkg1.cxx', 'Pkg0.cxx', 'Standard.cxx']
+    modules = dict([(m['name'], m['seconds']) for m in report['modules']])
+    assert modules['Pkg0'] == pytest.approx(2.)
+    assert modules['Pkg1'] == pytest.approx(3.)
+
+    # The traced event goes to its class and the rest is split by estimated cost
+    classes = dict([(c['name'], c['seconds']) for c in report['classes']])
+    assert classes['Pkg0_Tool'] > .5
+    assert sum([v for k, v in classes.items() if k.startswith('Pkg0_')]) == pytest.approx(2.)
+
+
+def test_plan_job_pools():
+    costs = CompileCosts()
+    costs.peak_rss = {'Pkg0.cxx': 3 * 2 ** 30, 'Pkg1.cxx': 2 ** 30, 'Pkg2.cxx': 2 * 2 ** 30}
+
+    # Sources above the threshold share a pool sized by the largest of them
+    sources = ['Pkg0.cxx', 'Pkg1.cxx', 'Pkg2.cxx', 'Pkg3.cxx']
+    assert plan_job_pools(costs, sources, 8192, 1500) == (['Pkg0.cxx', 'Pkg2.cxx'], 2)
+    assert plan_job_pools(costs, sources, 1024, 1500) == (['Pkg0.cxx', 'Pkg2.cxx'], 1)
+    assert plan_job_pools(costs, sources, 8192, 4096) == ([], 0)
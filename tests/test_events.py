@@ -0,0 +1,39 @@
+import io
+import json
+
+from pybinder.events import EventLog
+
+
+def test_event_log(capsys):
+    sink = io.StringIO()
+    log = EventLog(sink, buffer_size=2)
+    log.emit('alias', 'Pkg0_Alias', 'Pkg0', 'typedef of a bound type', target='Pkg0_Point')
+    assert sink.getvalue() == ''
+
+    # The sink is written once the buffer is full
+    log.emit('exclude_typedef', 'Pkg0_Other', 'Pkg0')
+    lines = sink.getvalue().splitlines()
+    assert [json.loads(line)['event'] for line in lines] == ['alias', 'exclude_typedef']
+    assert json.loads(lines[0]) == {'entity': 'Pkg0_Alias', 'event': 'alias', 'module': 'Pkg0',
+                                    'reason': 'typedef of a bound type', 'target': 'Pkg0_Point'}
+
+    log.emit('alias', 'Pkg1_Alias', 'Pkg1')
+    log.close()
+    assert len(sink.getvalue().splitlines()) == 3
+    assert log.summary() == {'alias': 2, 'exclude_typedef': 1}
+
+    log.info('Parsing...')
+    log.print_summary()
+    assert capsys.readouterr().out == 'Parsing...\nEvent summary:\n\talias: 2\n' \
+                                      '\texclude_typedef: 1\n'
+
+
+def test_event_log_quiet(capsys):
+    # Without a sink the events are only counted, and quiet mode prints nothing
+    log = EventLog(quiet=True)
+    log.emit('alias', 'Pkg0_Alias', 'Pkg0')
+    log.info('Parsing...')
+    log.print_summary()
+    log.close()
+    assert log.summary() == {'alias': 1}
+    assert capsys.readouterr().out == ''
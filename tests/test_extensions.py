@@ -0,0 +1,22 @@
+from collections import OrderedDict
+
+from pybinder.extensions import group_modules, merge_cycles, order_extensions
+
+
+def test_merge_cycles():
+    extensions = group_modules(['A', 'B', 'C', 'D', 'E'], {'CE': ['C', 'E']})
+    module_extensions = {}
+    for ext, modules in extensions.items():
+        for mod in modules:
+            module_extensions[mod] = ext
+
+    # A, B, and the group of C need each other and D needs them
+    hard = {'A': {'B'}, 'B': {'C'}, 'C': {'A'}, 'D': {'A', 'E'}}
+    extensions, merged = merge_cycles(extensions, module_extensions, hard)
+    assert extensions == OrderedDict([('_A', ['A', 'B', 'C', 'E']), ('_D', ['D'])])
+    assert merged == {'_A': ['_B', '_CE']}
+    assert module_extensions == {'A': '_A', 'B': '_A', 'C': '_A', 'D': '_D', 'E': '_A'}
+
+    order, imports = order_extensions(extensions, module_extensions, hard)
+    assert order == ['_A', '_D']
+    assert imports == {'_A': [], '_D': ['_A']}
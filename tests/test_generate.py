@@ -0,0 +1,249 @@
+import io
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from pybinder.events import EventLog
+from pybinder.backend import get_backend
+from pybinder.generate import check_stable_abi, get_instantiations
+from pybinder.synthetic import write_corpus
+from conftest import generate
+
+
+def read_tree(path):
+    """
+    :param str path: The directory.
+
+    :return: The contents of each file by path relative to the directory.
+    :rtype: dict(str, bytes)
+    """
+    files = {}
+    for root, _dirs, names in os.walk(path):
+        for name in names:
+            filename = os.path.join(root, name)
+            with open(filename, 'rb') as fin:
+                files[os.path.relpath(filename, path)] = fin.read()
+    return files
+
+
+_generate_script = """
+import sys
+sys.path.insert(0, {root!r})
+sys.path.insert(0, {tests!r})
+from conftest import generate
+generate({corpus_dir!r}, {work_dir!r}, {out_dir!r})
+"""
+
+
+def test_deterministic(tmp_path):
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 3)
+    # Separate processes with different hash seeds so set and dict ordering differ between runs
+    tests = os.path.dirname(os.path.abspath(__file__))
+    for seed in ('1', '2'):
+        script = _generate_script.format(root=os.path.dirname(tests), tests=tests,
+                                         corpus_dir=corpus_dir, work_dir=str(tmp_path),
+                                         out_dir=str(tmp_path / ('out' + seed)))
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        subprocess.run([sys.executable, '-c', script], check=True, env=env)
+
+    first = read_tree(str(tmp_path / 'out1'))
+    second = read_tree(str(tmp_path / 'out2'))
+    assert first
+    assert sorted(first) == sorted(second)
+    for name in first:
+        assert first[name] == second[name], name
+
+
+def _typedef(name, parameters, canonical):
+    return SimpleNamespace(is_excluded=False, is_typedef_decl=True, is_templated=True,
+                           is_alias=False, register_name=name,
+                           function_name='bind_NCollection_Array1', parameters=parameters,
+                           canonical_type_name=canonical)
+
+
+def test_instantiation_spellings():
+    # One instantiation per canonical type however the template arguments are spelled
+    types = [_typedef('TColStd_Array1OfReal', '<Standard_Real>', 'NCollection_Array1<double>'),
+             _typedef('Spell_Array1OfDouble', '<double>', 'NCollection_Array1<double>'),
+             _typedef('TColStd_Array1OfInteger', '<Standard_Integer>', 'NCollection_Array1<int>')]
+    assert get_instantiations(types) == [
+        ('bind_NCollection_Array1', '<Standard_Real>', 'NCollection_Array1<double>'),
+        ('bind_NCollection_Array1', '<Standard_Integer>', 'NCollection_Array1<int>')]
+
+
+_templates = {
+    'Tpl_Base.hxx': """#pragma once
+
+template <class TheItemType>
+class Tpl_Base
+{
+public:
+  Tpl_Base() {}
+  TheItemType Value() const { return TheItemType(); }
+};
+""",
+    'Tpl_List.hxx': """#pragma once
+
+#include <Tpl_Base.hxx>
+
+template <class TheItemType>
+class Tpl_List : public Tpl_Base<TheItemType>
+{
+public:
+  Tpl_List() {}
+  void Append(const TheItemType& theItem) { (void)theItem; }
+};
+""",
+    'Tpl_ListOfInteger.hxx': """#pragma once
+
+#include <Tpl_List.hxx>
+
+typedef Tpl_List<int> Tpl_ListOfInteger;
+""",
+    'Tpl_Map.hxx': """#pragma once
+
+template <class TheKeyType>
+class Tpl_Map
+{
+public:
+  Tpl_Map() {}
+  int Extent() const { return 0; }
+  void Add(const TheKeyType& theKey) { (void)theKey; }
+};
+"""}
+
+
+def test_prune_templates(tmp_path):
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 1)
+    for name, txt in _templates.items():
+        with open(os.path.join(corpus_dir, name), 'w') as fout:
+            fout.write(txt)
+    out_dir = str(tmp_path / 'out')
+    sink = io.StringIO()
+    log = EventLog(sink, quiet=True)
+    generate(corpus_dir, str(tmp_path), out_dir, log)
+    log.close()
+    events = [json.loads(line) for line in sink.getvalue().splitlines()]
+
+    # The base of a reached template is reached too, the template no type uses is not written
+    pruned = [e['entity'] for e in events if e['event'] == 'prune_template']
+    assert pruned == ['Tpl_Map<TheKeyType>']
+    names = os.listdir(out_dir)
+    assert 'bind_Tpl_Map.hxx' not in names
+    assert 'bind_Tpl_List.hxx' in names and 'bind_Tpl_Base.hxx' in names
+
+    # The summary counts each template source not written and its lines
+    summary = [e for e in events if e['event'] == 'prune_templates']
+    assert len(summary) == 1
+    assert summary[0]['files'] == 1
+    assert summary[0]['lines'] > 0
+
+
+@pytest.mark.parametrize('version', ['3', '3.12.1', 'abi3', ''])
+def test_stable_abi_version(version):
+    config = SimpleNamespace(stable_abi=version)
+    with pytest.raises(RuntimeError, match='expected a Python version'):
+        check_stable_abi(get_backend('nanobind'), config, EventLog(quiet=True))
+
+
+_tables = """#pragma once
+
+class Tab_Values
+{
+public:
+  Tab_Values() {}
+  double First() const { return 0.0; }
+  double Get() const { return 0.0; }
+  double Get(const int theIndex) const { return theIndex; }
+  double Last() const { return 0.0; }
+};
+"""
+
+
+def test_method_tables(tmp_path):
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 1)
+    with open(os.path.join(corpus_dir, 'Tab_Values.hxx'), 'w') as fout:
+        fout.write(_tables)
+    out_dir = str(tmp_path / 'out')
+    generate(corpus_dir, str(tmp_path), out_dir, method_tables=True)
+
+    with open(os.path.join(out_dir, 'Tab.cxx')) as fin:
+        txt = fin.read()
+    # Overloads keep their own calls in declaration order
+    assert '\t{"First", &Tab_Values::First' in txt
+    assert '\t{"Last", &Tab_Values::Last' in txt
+    assert '{"Get"' not in txt
+    first = txt.index('cls_Tab_Values.def("Get", (double (Tab_Values::*)() const)')
+    second = txt.index('cls_Tab_Values.def("Get", (double (Tab_Values::*)(const int) const)')
+    assert first < second
+
+
+def test_pch_skips_extra_headers(tmp_path):
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 2)
+    out_dir = str(tmp_path / 'out')
+    generate(corpus_dir, str(tmp_path), out_dir, pch_fraction=0.5,
+             modules={'Pkg1': {'extra_headers': ['Pkg0_Point.hxx']}})
+
+    # The manually specified includes of Pkg1 must not follow the precompiled header
+    with open(os.path.join(out_dir, 'sources.cmake')) as fin:
+        txt = fin.read()
+    skipped = txt[txt.index('set(NO_PCH_SRCS'):]
+    skipped = skipped[:skipped.index(')')]
+    assert '/Pkg1.cxx' in skipped
+    assert '/Pkg0.cxx' not in skipped
+
+
+def test_usage_profile_modules(tmp_path):
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 2)
+    profile = str(tmp_path / 'profile.txt')
+    with open(profile, 'w') as fout:
+        fout.write('Pkg1.*\nNope.*\n')
+    model = generate(corpus_dir, str(tmp_path), str(tmp_path / 'out'), usage_profile=[profile])
+
+    # Unknown modules are skipped without adding them to the model
+    assert 'Nope' not in model.module_types
+    assert 'Pkg1' in model.submodules
+    assert not [t for t in model.module_types['Pkg1'] if t.is_excluded]
+
+
+_async = """#pragma once
+
+class Message_ProgressRange
+{
+public:
+  Message_ProgressRange() {}
+};
+
+class Prog_Algo
+{
+public:
+  Prog_Algo() {}
+  void Build(const Message_ProgressRange& theRange = Message_ProgressRange()) { (void)theRange; }
+  void Perform(const Message_ProgressRange& theRange = Message_ProgressRange()) { (void)theRange; }
+  void Perform(const int theMode) { (void)theMode; }
+};
+"""
+
+
+def test_async_progress(tmp_path):
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 1)
+    with open(os.path.join(corpus_dir, 'Prog_Algo.hxx'), 'w') as fout:
+        fout.write(_async)
+    out_dir = str(tmp_path / 'out')
+    generate(corpus_dir, str(tmp_path), out_dir, async_methods=['Prog_Algo::*'])
+
+    # The progress argument is only passed if every overload takes it
+    with open(os.path.join(out_dir, 'Prog.cxx')) as fin:
+        txt = fin.read()
+    assert 'bind_async(cls_Prog_Algo, "Build_async", "Build", "theRange", false);' in txt
+    assert 'bind_async(cls_Prog_Algo, "Perform_async", "Perform", nullptr, false);' in txt
@@ -0,0 +1,68 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from pybinder.synthetic import write_corpus
+from conftest import build, generate
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_lazy_types_source(tmp_path):
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 2)
+    out_dir = str(tmp_path / 'out')
+    generate(corpus_dir, str(tmp_path), out_dir, lazy_types=True)
+
+    with open(os.path.join(out_dir, 'OCCT.cxx')) as fin:
+        txt = fin.read()
+    # Types are not bound at import but listed with the types to bind before and after them
+    assert 'bind_Pkg1_Object(main);' not in txt
+    assert '\t{"Pkg1_Object", bind_Pkg1_Object, {{"Pkg0", "Pkg0_Object"}}, ' \
+           '{{"Pkg1", "Pkg1_Point"}}},\n' in txt
+    assert '\t{"Pkg1_SequenceOfObject", bind_Pkg1_SequenceOfObject, ' \
+           '{{"NCollection", "NCollection_BaseSequence"}}, {{"Pkg1", "Pkg1_Object"}}},\n' in txt
+    assert 'bind_lazy_types(main, "OCCT", "Pkg1", types_Pkg1);' in txt
+
+
+_import_script = """
+import sys
+sys.path.insert(0, sys.argv[1])
+import OCCT
+
+Pkg1 = OCCT.Pkg1
+assert 'Pkg1_Object' in Pkg1.__all__ and 'Pkg1_Object' in dir(Pkg1)
+assert 'Pkg1_Object' not in vars(Pkg1) and 'Pkg0_Object' not in vars(OCCT.Pkg0)
+
+# The base is bound with the type and the result types right after it
+obj = Pkg1.Pkg1_Object()
+assert 'Pkg0_Object' in vars(OCCT.Pkg0) and 'Pkg1_Point' in vars(Pkg1)
+assert isinstance(obj, OCCT.Pkg0.Pkg0_Object)
+assert Pkg1.__bind__('Pkg1_Tool') and 'Pkg1_Tool' in vars(Pkg1)
+try:
+    Pkg1.Pkg1_Nope
+except AttributeError:
+    pass
+else:
+    raise AssertionError('unknown type bound')
+"""
+
+
+@pytest.mark.skipif(not (shutil.which('clang++') or shutil.which('c++')),
+                    reason='no C++ compiler')
+@pytest.mark.parametrize('backend', ['pybind11', 'nanobind'])
+def test_lazy_types_import(tmp_path, backend):
+    pytest.importorskip(backend)
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 2)
+    options = dict(backend=backend, lazy_types=True, verify_args=['-fpermissive'],
+                   verify_include_paths=[os.path.join(_root, 'inc')],
+                   common_headers=[{'pybind11': 'pyOCCT.hxx', 'nanobind': 'nbOCCT.hxx'}[backend]])
+    out_dir = str(tmp_path / 'out')
+    generate(corpus_dir, str(tmp_path), out_dir, **options)
+    build_dir = str(tmp_path / 'build')
+    build(corpus_dir, str(tmp_path), out_dir, build_dir, **options)
+    subprocess.run([sys.executable, '-c', _import_script, build_dir], check=True)
@@ -0,0 +1,96 @@
+import os
+import shutil
+
+import pytest
+
+from pybinder.benchmark import make_config, read_import_profile
+from pybinder.events import EventLog
+from pybinder.generate import generate_bindings
+from pybinder.parse import Parser
+from pybinder.profile import Profiler, counters
+from pybinder.synthetic import write_corpus
+from conftest import build, generate
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_profiler_stages(tmp_path):
+    corpus_dir = str(tmp_path / 'inc')
+    out_dir = str(tmp_path / 'out')
+    write_corpus(corpus_dir, 1)
+    os.makedirs(out_dir)
+    config = make_config(corpus_dir, str(tmp_path))
+
+    profiler = Profiler(trace_memory=False)
+    profiler.start()
+    parser = Parser(config)
+    with profiler.stage('parse'):
+        parser.generate_header_file(corpus_dir)
+        parser.parse()
+    generate_bindings(parser, config, out_dir, True, EventLog(quiet=True), profiler)
+    profiler.stop()
+
+    report = profiler.report()
+    stages = dict([(s['name'], s) for s in report['stages']])
+    assert list(stages) == ['parse', 'wrap', 'process', 'bind_templates', 'bind_modules',
+                            'bind_main', 'build_plan']
+    for stage in stages.values():
+        assert stage['seconds'] >= 0
+        assert stage['process_peak_rss'] > 0
+        assert stage['peak_rss_increase'] >= 0
+
+    # Each stage reports the counts made while it ran and the report the totals
+    assert stages['parse']['counters'] == {}
+    assert stages['wrap']['counters']['cursors_visited'] > 0
+    assert stages['wrap']['counters']['wrappers_created'] > 0
+    assert report['counters']['wrappers_created'] == stages['wrap']['counters']['wrappers_created']
+
+
+def test_profiler_disabled(tmp_path):
+    corpus_dir = str(tmp_path / 'inc')
+    out_dir = str(tmp_path / 'out')
+    write_corpus(corpus_dir, 1)
+    os.makedirs(out_dir)
+    config = make_config(corpus_dir, str(tmp_path))
+
+    # Nothing is counted unless a profiler is running
+    profiler = Profiler(enabled=False)
+    profiler.start()
+    assert not counters.enabled
+    parser = Parser(config)
+    parser.generate_header_file(corpus_dir)
+    parser.parse()
+    generate_bindings(parser, config, out_dir, True, EventLog(quiet=True), profiler)
+    profiler.stop()
+    assert profiler.stages == []
+    assert counters == {}
+
+
+@pytest.mark.skipif(not (shutil.which('clang++') or shutil.which('c++')),
+                    reason='no C++ compiler')
+@pytest.mark.parametrize('backend', ['pybind11', 'nanobind'])
+def test_import_profile(tmp_path, backend):
+    pytest.importorskip(backend)
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 2)
+    options = dict(backend=backend, import_profile=True, verify_args=['-fpermissive'],
+                   verify_include_paths=[os.path.join(_root, 'inc')],
+                   common_headers=[{'pybind11': 'pyOCCT.hxx', 'nanobind': 'nbOCCT.hxx'}[backend]])
+    out_dir = str(tmp_path / 'out')
+    model = generate(corpus_dir, str(tmp_path), out_dir, **options)
+    build_dir = str(tmp_path / 'build')
+    build(corpus_dir, str(tmp_path), out_dir, build_dir, **options)
+    profile = read_import_profile(build_dir)
+
+    # One entry per binding function called at import with the types it added to its module
+    entries = dict([((e['kind'], e['name']), e) for e in profile['entries']])
+    assert len(entries) == len(profile['entries'])
+    for mod in model.submodules:
+        assert ('enums', mod) in entries and ('functions', mod) in entries
+        for type_ in model.module_types[mod]:
+            if not type_.is_excluded and not type_.is_nested:
+                assert entries[('type', type_.python_name)]['types'] == 1
+    assert entries[('enums', 'Pkg0')]['types'] == 1
+    assert entries[('functions', 'Pkg0')]['types'] == 0
+    assert all([e['extension'] == 'OCCT' and e['seconds'] >= 0 for e in entries.values()])
+    assert profile['seconds'] >= sum([e['seconds'] for e in entries.values()])
@@ -0,0 +1,80 @@
+import io
+import json
+import os
+
+import pytest
+
+from pybinder.events import EventLog
+from pybinder.synthetic import write_corpus
+from conftest import generate
+
+_headers = {
+    'Ord_List.hxx': """#pragma once
+
+template <class TheItemType>
+class Ord_List
+{
+public:
+  Ord_List() {}
+  int Size() const { return 0; }
+};
+""",
+    'Ord_Derived.hxx': """#pragma once
+
+#include <Ord_List.hxx>
+
+class Ord_Derived : public Ord_List<int>
+{
+public:
+  Ord_Derived() {}
+};
+""",
+    'Ord_ListOfInteger.hxx': """#pragma once
+
+#include <Ord_List.hxx>
+
+typedef Ord_List<int> Ord_ListOfInteger;
+"""}
+
+
+def test_ordered_registration(tmp_path):
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 2)
+    for name, txt in _headers.items():
+        with open(os.path.join(corpus_dir, name), 'w') as fout:
+            fout.write(txt)
+    out_dir = str(tmp_path / 'out')
+    sink = io.StringIO()
+    log = EventLog(sink, quiet=True)
+    generate(corpus_dir, str(tmp_path), out_dir, log, ordered_registration=True)
+    log.close()
+    events = [json.loads(line) for line in sink.getvalue().splitlines()]
+
+    # Types are registered on their submodule after their bases, and the typedef of an
+    # instantiation used as a base comes first so the class does not register it again
+    with open(os.path.join(out_dir, 'OCCT.cxx')) as fin:
+        txt = fin.read()
+    assert txt.index('bind_Standard_Transient(mod_Standard);') < \
+        txt.index('bind_Pkg0_Object(mod_Pkg0);') < txt.index('bind_Pkg1_Object(mod_Pkg1);')
+    assert txt.index('bind_Ord_ListOfInteger(mod_Ord);') < txt.index('bind_Ord_Derived(mod_Ord);')
+    with open(os.path.join(out_dir, 'Ord.cxx')) as fin:
+        txt = fin.read()
+    assert 'main.attr(' not in txt
+    assert '// Register base: Ord_List<int>\n// Already registered\n' in txt
+
+    # Template bindings are not checked for registered types at import
+    with open(os.path.join(out_dir, 'bind_NCollection_Sequence.hxx')) as fin:
+        assert 'get_type_handle' not in fin.read()
+
+    order = [e for e in events if e['event'] == 'registration_order']
+    assert len(order) == 1
+    assert order[0]['moved'] > 0 and order[0]['removed_bases'] == 1
+    assert order[0]['cycles'] == 0
+
+
+def test_ordered_registration_lazy(tmp_path):
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 1)
+    with pytest.raises(RuntimeError, match='lazy types'):
+        generate(corpus_dir, str(tmp_path), str(tmp_path / 'out'), lazy_types=True,
+                 ordered_registration=True)
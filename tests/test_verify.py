@@ -0,0 +1,143 @@
+import os
+import shutil
+import subprocess
+import sys
+import sysconfig
+
+import pytest
+
+from pybinder.synthetic import write_corpus
+from conftest import generate
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_common_headers = {'pybind11': 'pyOCCT.hxx', 'nanobind': 'nbOCCT.hxx'}
+
+
+@pytest.mark.skipif(not (shutil.which('clang++') or shutil.which('c++')),
+                    reason='no C++ compiler')
+@pytest.mark.parametrize('backend', ['pybind11', 'nanobind'])
+def test_verify_synthetic(tmp_path, monkeypatch, backend):
+    pytest.importorskip(backend)
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 3)
+
+    # Relative output directory and include paths as in the shipped configuration
+    monkeypatch.chdir(_root)
+    out_dir = os.path.relpath(str(tmp_path / 'out'), _root)
+    model = generate(corpus_dir, str(tmp_path), out_dir, backend=backend, verify=True,
+                     verify_jobs=1, verify_args=['-fpermissive'], verify_include_paths=['inc'],
+                     common_headers=[_common_headers[backend]])
+    assert model.verify_errors == []
+
+
+@pytest.mark.skipif(not (shutil.which('clang++') or shutil.which('c++')),
+                    reason='no C++ compiler')
+@pytest.mark.parametrize('backend', ['pybind11', 'nanobind'])
+def test_verify_arrays(tmp_path, backend):
+    pytest.importorskip(backend)
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 1)
+
+    # Arrays of numbers and gp points instantiate the buffer views, arrays of other classes the
+    # unsupported path
+    out_dir = str(tmp_path / 'out')
+    model = generate(corpus_dir, str(tmp_path), out_dir, backend=backend, verify=True,
+                     verify_jobs=1, verify_args=['-fpermissive'],
+                     verify_include_paths=[os.path.join(_root, 'inc')],
+                     common_headers=[_common_headers[backend]],
+                     array_templates=['NCollection_Array1', 'NCollection_Array2'])
+    assert model.verify_errors == []
+    with open(os.path.join(out_dir, 'TColgp.cxx')) as fin:
+        assert 'bind_NCollection_Array1<gp_Pnt>' in fin.read()
+
+
+def _limited_api_include():
+    """
+    :return: The include directory of a Python 3.12 or newer, if one is installed.
+    :rtype: str or None
+    """
+    if sys.version_info >= (3, 12):
+        return sysconfig.get_paths()['include']
+    script = 'import sysconfig; print(sysconfig.get_paths()["include"])'
+    for name in ('python3.14', 'python3.13', 'python3.12'):
+        python = shutil.which(name)
+        if python is None:
+            continue
+        out = subprocess.run([python, '-c', script], stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL, universal_newlines=True)
+        if out.returncode == 0:
+            return out.stdout.strip()
+    return None
+
+
+@pytest.mark.skipif(not (shutil.which('clang++') or shutil.which('c++')),
+                    reason='no C++ compiler')
+def test_verify_stable_abi(tmp_path):
+    pytest.importorskip('nanobind')
+    include = _limited_api_include()
+    if include is None:
+        pytest.skip('no Python 3.12 or newer headers')
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 1)
+
+    # Compiled against the limited C API the sources are generated for
+    out_dir = str(tmp_path / 'out')
+    model = generate(corpus_dir, str(tmp_path), out_dir, backend='nanobind', stable_abi='3.12',
+                     verify=True, verify_jobs=1,
+                     verify_args=['-fpermissive', '-DPy_LIMITED_API=0x030C0000'],
+                     verify_include_paths=[os.path.join(_root, 'inc'), include],
+                     common_headers=['nbOCCT.hxx'])
+    assert model.verify_errors == []
+    with open(os.path.join(out_dir, 'sources.cmake')) as fin:
+        assert 'set(STABLE_ABI 3.12)' in fin.read()
+
+
+_foo = """#pragma once
+
+class Pkz_Foo
+{
+public:
+  Pkz_Foo() {}
+  int Value() const { return 1; }
+};
+"""
+
+_bar = """#pragma once
+
+#ifndef PKZ_NO_FOO
+#include <Pkz_Foo.hxx>
+#endif
+
+class Pkz_Bar
+{
+public:
+  Pkz_Bar() {}
+};
+"""
+
+
+@pytest.mark.skipif(not (shutil.which('clang++') or shutil.which('c++')),
+                    reason='no C++ compiler')
+@pytest.mark.parametrize('source_cost', [0, 1000000])
+def test_verify_full_includes(tmp_path, source_cost):
+    pytest.importorskip('pybind11')
+    corpus_dir = str(tmp_path / 'inc')
+    write_corpus(corpus_dir, 1)
+    for name, txt in (('Pkz_Bar.hxx', _bar), ('Pkz_Foo.hxx', _foo)):
+        with open(os.path.join(corpus_dir, name), 'w') as fout:
+            fout.write(txt)
+
+    # The parser sees Pkz_Bar.hxx include Pkz_Foo.hxx, so the minimal include set drops the
+    # latter, but it does not when compiled with PKZ_NO_FOO
+    out_dir = str(tmp_path / 'out')
+    model = generate(corpus_dir, str(tmp_path), out_dir, verify=True, verify_jobs=1,
+                     verify_args=['-fpermissive', '-DPKZ_NO_FOO'],
+                     verify_include_paths=[os.path.join(_root, 'inc')], minimal_includes=True,
+                     source_cost=source_cost)
+    assert model.verify_errors == []
+    with open(os.path.join(out_dir, 'Pkz.cxx')) as fin:
+        assert '#include <Pkz_Foo.hxx>' in fin.read()
+    if source_cost:
+        # The source is batched into a unity source, which is what the sources map to
+        assert 'Pkz.cxx' not in model.source_modules